@@ -2,14 +2,24 @@ import argparse
 from random import choice
 from typing import Optional
 
-from cryptography.hazmat.primitives.asymmetric import rsa
-
-from bb.common.block import Data, Transaction
+from bb.common.block import Block, Data, InclusionProof, Transaction
+from bb.common.config import DEFAULT_SIGNATURE_SCHEME
 from bb.common.log import Logger
 from bb.common.names import NODE_ENDPOINT
-from bb.common.net.papi import CommunicationError, Proxy, get_all_uris, invoke, proxy_of
-from bb.common.sec.asymmetric import encode_public_key, generate_private_key
+from bb.common.net.papi import (
+    CommunicationError,
+    Proxy,
+    get_all_uris,
+    invoke,
+    proxy_of,
+    received_bytes,
+)
 from bb.common.sec.guid import generate_guid
+from bb.common.sec.scheme import (
+    PrivateKey,
+    encode_any_public_key,
+    generate_signing_key,
+)
 
 
 class Client:
@@ -24,12 +34,13 @@ class Client:
         except IndexError:
             self.log.critical("no nodes are on the network")
             exit(1)
+        self.node_uri = node_uri
         self.node = proxy_of(node_uri)
 
     def create_transaction(
         self,
         user_guid: str,
-        private_key: rsa.RSAPrivateKey,
+        private_key: PrivateKey,
         transaction_type: Data.TransactionType,
         payload: str,
     ):
@@ -37,25 +48,71 @@ class Client:
         transaction = Transaction(user_guid=user_guid, data=transaction_data)
         transaction.sign(private_key)
         self.log.debug(f"{payload}")
+        self.log.info(f"transaction id: {transaction.id()}")
         try:
-            invoke(self.node.upload_transaction, transaction.to_json())
+            invoke(self.node.upload_transaction_bytes, transaction.to_bytes())
         except CommunicationError:
             self.log.warn("connection with node lost")
             self.choose_random_node()
 
-    def start(self, initial_user_guid: Optional[str] = None):
+    def get_inclusion_proof(self, transaction_id: str) -> Optional[InclusionProof]:
+        proof_json = invoke(self.node.get_inclusion_proof, transaction_id)
+        return InclusionProof.from_json(proof_json) if proof_json else None
+
+    def get_trusted_hash(self, proof: InclusionProof) -> Optional[str]:
+        """Returns the hash of the block at the index of the proof's header,
+        as held by another node than the one which sent the proof, or None
+        if there is no other node."""
+        other_uris = [
+            uri for uri in get_all_uris(NODE_ENDPOINT) if uri != self.node_uri
+        ]
+        if not other_uris:
+            self.log.warn("no other node to check the block against")
+            return None
+        block_bytes = invoke(
+            proxy_of(choice(other_uris)).get_block_bytes, proof.header.index
+        )
+        if not block_bytes:
+            return None
+        return Block.from_bytes(received_bytes(block_bytes)).hash()
+
+    @staticmethod
+    def verify_inclusion(
+        transaction_id: str, proof: InclusionProof, trusted_hash: str
+    ) -> bool:
+        """verify_inclusion checks locally that the proof commits the
+        transaction to a block header with a valid proof of work, and that
+        the header hashes to trusted_hash.
+
+        The check is only as strong as trusted_hash: it has to come from
+        another source than the proof, e.g. another node or the user, as a
+        header with a valid proof of work is cheap to forge at the default
+        target."""
+        try:
+            anchored = proof.header.verify_hash(trusted_hash)
+        except ValueError:
+            return False
+        return anchored and proof.transaction_id == transaction_id and proof.verify()
+
+    def start(
+        self,
+        initial_user_guid: Optional[str] = None,
+        scheme: str = DEFAULT_SIGNATURE_SCHEME,
+    ):
         user_guid = (
             initial_user_guid if initial_user_guid is not None else generate_guid()
         )
         self.log.info(f"user id: {user_guid}")
-        private_key = generate_private_key()
-        public_key = encode_public_key(private_key.public_key())
+        self.log.info(f"signature scheme: {scheme}")
+        private_key = generate_signing_key(scheme)
+        public_key = encode_any_public_key(private_key.public_key())
 
         print(
             "\nEnter:\n"
             + '"register" to register user in the system,\n'
             + '"data <your data>" to create transaction with payload,\n'
             + '"revoke" to revoke public key from network,\n'
+            + '"verify <transaction id> [block hash]" to verify that transaction is in a block,\n'
             + '"commit" to freeze transactions list and inform nodes to start looking for proof of work.'
         )
 
@@ -86,6 +143,31 @@ class Client:
                     )
                     self.log.info("revoking done")
 
+                elif operation_type == "verify":
+                    arguments = client_input.split()[1:]
+                    transaction_id = arguments[0]
+                    # the proof is checked against the given block hash,
+                    # or the block held by another node
+                    trusted_hash = arguments[1] if len(arguments) > 1 else None
+                    try:
+                        proof = self.get_inclusion_proof(transaction_id)
+                        if proof is not None and trusted_hash is None:
+                            trusted_hash = self.get_trusted_hash(proof)
+                    except CommunicationError:
+                        self.log.warn("connection with node lost")
+                        self.choose_random_node()
+                        continue
+                    if proof is None:
+                        self.log.warn("transaction not found in any block")
+                    elif trusted_hash is None:
+                        self.log.warn("block of the proof could not be confirmed")
+                    elif self.verify_inclusion(transaction_id, proof, trusted_hash):
+                        self.log.info(
+                            f"transaction included in block {proof.header.index}"
+                        )
+                    else:
+                        self.log.error("inclusion proof not valid")
+
                 elif operation_type == "commit":
                     try:
                         invoke(self.node.commit)
@@ -0,0 +1,53 @@
+import unittest
+from dataclasses import replace
+
+from bb.common.block import Block, Data, Transaction
+
+from .client import Client
+
+
+class TestVerifyInclusion(unittest.TestCase):
+    # given
+    transaction = Transaction(user_guid="test_user_guid", data=Data(payload="test"))
+
+    def mined(self, timestamp: str) -> Block:
+        block = Block(index=1, timestamp=timestamp, transactions=[self.transaction])
+        block.seal()
+        block.proof_of_work()
+        return block
+
+    def test_proof_anchored_to_trusted_hash(self):
+        # given
+        block = self.mined("2021-01-01T00:00:00")
+        forged = self.mined("2021-01-01T00:00:01")
+        transaction_id = self.transaction.id()
+        proof = block.inclusion_proof(transaction_id)
+        forged_proof = forged.inclusion_proof(transaction_id)
+
+        # when
+        tested = [
+            Client.verify_inclusion(transaction_id, p, block.hash())  # type: ignore
+            for p in (proof, forged_proof)
+        ]
+
+        # then
+        self.assertEqual(tested, [True, False])
+        self.assertTrue(forged_proof.verify())  # type: ignore
+
+    def test_malformed_header_not_verified(self):
+        # given
+        block = self.mined("2021-01-01T00:00:00")
+        proof = block.inclusion_proof(self.transaction.id())
+        malformed = replace(
+            proof, header=replace(proof.header, prev_hash="zz")  # type: ignore
+        )
+
+        # when
+        tested = Client.verify_inclusion(self.transaction.id(), malformed, block.hash())
+
+        # then
+        self.assertFalse(tested)
+
+
+if __name__ == "__main__":
+    unittest.main()
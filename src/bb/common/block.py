@@ -1,15 +1,32 @@
 import json
+import struct
 from dataclasses import asdict, dataclass, field, replace
 from datetime import datetime as Timestamp
-from typing import Literal
+from typing import Literal, Optional
 
-from bb.common.sec.asymmetric import (
-    RSAPrivateKey,
-    RSAPublicKey,
-    sign_rsa_base64,
-    verify_rsa,
+from bb.common.codec import Reader, Writer
+from bb.common.config import DEFAULT_DIFFICULTY, DEFAULT_ENCODING
+from bb.common.merkle import merkle_path, merkle_root, merkle_root_from_path
+from bb.common.pow import (
+    DEFAULT_TARGET,
+    MAX_TARGET,
+    ProofOfWork,
+    difficulty_target,
+    target_bytes,
+    u64_nonce,
+)
+from bb.common.sec.cache import verify_cached
+from bb.common.sec.encode import bytes_to_hex, hex_to_bytes
+from bb.common.sec.hash import hash_bytes, hash_hex
+from bb.common.sec.scheme import (
+    LEGACY_SCHEME,
+    SCHEME_NAMES,
+    PrivateKey,
+    PublicKey,
+    SchemeName,
+    scheme_of,
+    sign_base64,
 )
-from bb.common.sec.hash import hash_hex
 
 
 @dataclass(frozen=True)
@@ -19,13 +36,39 @@ class Data:
     payload: str = ""
     """payload contains data payload (if T == 'data') or public key (otherwise)"""
 
+    TRANSACTION_TYPES = ("register", "data", "revoke")
+    """binary codes of transaction types, by position"""
+
     def to_json(self, indent=None):
         return json.dumps(asdict(self), indent=indent)
 
+    def write(self, writer: Writer):
+        writer.enum(self.T, Data.TRANSACTION_TYPES)
+        writer.str(self.payload)
+
+    def to_bytes(self) -> bytes:
+        writer = Writer()
+        self.write(writer)
+        return writer.to_bytes()
+
     @staticmethod
     def of(data_dict: dict):
         return Data(T=data_dict["T"], payload=data_dict["payload"])
 
+    @staticmethod
+    def read(reader: Reader):
+        return Data(
+            T=reader.enum(Data.TRANSACTION_TYPES),  # type: ignore (one of types)
+            payload=reader.str(),
+        )
+
+    @staticmethod
+    def from_bytes(serialized_data: bytes | memoryview):
+        reader = Reader(serialized_data)
+        data = Data.read(reader)
+        reader.expect_end()
+        return data
+
     @staticmethod
     def from_json(serialized_data: str | dict):
         if isinstance(serialized_data, str):
@@ -38,23 +81,53 @@ class Transaction:
     user_guid: str = ""
     fingerprint: str = ""
     data: Data = field(default_factory=Data)
+    scheme: SchemeName = LEGACY_SCHEME
+    """signature scheme, omitted from JSON for the legacy scheme"""
+
+    def to_dict(self) -> dict:
+        transaction_dict = asdict(self)
+        if self.scheme == LEGACY_SCHEME:
+            del transaction_dict["scheme"]
+        return transaction_dict
 
     def to_json(self, indent=None):
-        return json.dumps(asdict(self), indent=indent)
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def write(self, writer: Writer):
+        writer.str(self.user_guid)
+        writer.str(self.fingerprint)
+        self.data.write(writer)
+        writer.enum(self.scheme, SCHEME_NAMES)
+
+    def to_bytes(self) -> bytes:
+        writer = Writer()
+        self.write(writer)
+        return writer.to_bytes()
+
+    def digest(self) -> bytes:
+        return hash_bytes(self.to_json().encode(DEFAULT_ENCODING))
+
+    def id(self) -> str:
+        """id is the hex digest of the signed transaction,
+        used as its Merkle tree leaf"""
+        return bytes_to_hex(self.digest())
 
     def __transaction_without_fingerprint_json(self):
         transaction_without_fingerprint = replace(self, fingerprint="")
         return transaction_without_fingerprint.to_json()
 
-    def sign(self, private_key: RSAPrivateKey):
+    def sign(self, private_key: PrivateKey):
+        self.scheme = scheme_of(private_key).name
         twf = self.__transaction_without_fingerprint_json()
-        signature = sign_rsa_base64(twf, private_key)
+        signature = sign_base64(twf, private_key)
         self.fingerprint = signature
 
-    def verify(self, public_key: RSAPublicKey) -> bool:
+    def verify(self, public_key: PublicKey) -> bool:
+        if scheme_of(public_key).name != self.scheme:
+            return False
         twf = self.__transaction_without_fingerprint_json()
         signature = self.fingerprint
-        return verify_rsa(twf, signature, public_key)
+        return verify_cached(twf, signature, public_key)
 
     @staticmethod
     def of(transaction_dict: dict):
@@ -62,8 +135,25 @@ class Transaction:
             user_guid=transaction_dict["user_guid"],
             fingerprint=transaction_dict["fingerprint"],
             data=Data.of(transaction_dict["data"]),
+            scheme=transaction_dict.get("scheme", LEGACY_SCHEME),
         )
 
+    @staticmethod
+    def read(reader: Reader):
+        return Transaction(
+            user_guid=reader.str(),
+            fingerprint=reader.str(),
+            data=Data.read(reader),
+            scheme=reader.enum(SCHEME_NAMES),  # type: ignore (one of schemes)
+        )
+
+    @staticmethod
+    def from_bytes(serialized_transaction: bytes | memoryview):
+        reader = Reader(serialized_transaction)
+        transaction = Transaction.read(reader)
+        reader.expect_end()
+        return transaction
+
     @staticmethod
     def from_json(serialized_transaction: str | dict):
         if isinstance(serialized_transaction, str):
@@ -73,33 +163,183 @@ class Transaction:
 
 @dataclass(frozen=False)
 class Block:
+    LEGACY_VERSION = 1
+    """blocks hashed as a whole JSON document, without a header"""
+    HEADER_VERSION = 2
+    """blocks hashed by their fixed-size header with a Merkle root"""
+    HEADER_FORMAT = struct.Struct(">IQ32s32s32sQ")
+    """version, index, timestamp, prev_hash, merkle_root, proof"""
+    TARGET_VERSION = 3
+    """blocks with the proof of work target in their header"""
+    TARGET_HEADER_FORMAT = struct.Struct(">IQ32s32s32s32sQ")
+    """version, index, timestamp, prev_hash, merkle_root, target, proof"""
+
     index: int = 0
-    timestamp: str = Timestamp.now().isoformat(timespec="milliseconds")
+    timestamp: str = field(
+        default_factory=lambda: Timestamp.now().isoformat(timespec="milliseconds")
+    )
     transactions: list[Transaction] = field(default_factory=list)
     prev_hash: str = ""
     proof: int = 0
+    version: int = TARGET_VERSION
+    merkle_root: str = ""
+    target: int = DEFAULT_TARGET
+    """highest hash, as an integer, the proof of work may result in;
+    blocks of earlier versions have the default target"""
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name != "_memoized_hash":
+            # any field change invalidates the memoized hash
+            self.__dict__.pop("_memoized_hash", None)
 
     def get_timestamp(self):
         return Timestamp.fromisoformat(self.timestamp)
 
+    def to_dict(self) -> dict:
+        block_dict = asdict(self)
+        block_dict["transactions"] = [
+            transaction.to_dict() for transaction in self.transactions
+        ]
+        if self.version < Block.TARGET_VERSION:
+            del block_dict["target"]
+        if self.version == Block.LEGACY_VERSION:
+            del block_dict["version"]
+            del block_dict["merkle_root"]
+        return block_dict
+
     def to_json(self, indent=None):
-        return json.dumps(asdict(self), indent=indent)
+        return json.dumps(self.to_dict(), indent=indent)
 
-    def hash(self):
-        return hash_hex(self.to_json())
+    def write(self, writer: Writer):
+        writer.uint(self.version)
+        writer.uint(self.index)
+        writer.str(self.timestamp)
+        writer.uint(len(self.transactions))
+        for transaction in self.transactions:
+            transaction_writer = Writer()
+            transaction.write(transaction_writer)
+            writer.bytes(transaction_writer.buffer)
+        writer.hash(self.prev_hash)
+        writer.uint(self.proof)
+        writer.hash(self.merkle_root)
+        if self.version >= Block.TARGET_VERSION:
+            writer.uint(self.target)
+
+    def to_bytes(self) -> bytes:
+        """to_bytes returns the canonical binary encoding of the block,
+        see bb.common.codec"""
+        writer = Writer()
+        self.write(writer)
+        return writer.to_bytes()
+
+    def seal(self):
+        """seal computes the Merkle root of the transactions, which commits
+        them to the header. Transactions must not be changed afterwards."""
+        leaves = [transaction.digest() for transaction in self.transactions]
+        self.merkle_root = bytes_to_hex(merkle_root(leaves))
+
+    def verify_merkle_root(self) -> bool:
+        """Checks that the header commits to the transactions of the block.
+        Legacy blocks have no Merkle root, their hash covers the transactions."""
+        if self.version == Block.LEGACY_VERSION:
+            return True
+        leaves = [transaction.digest() for transaction in self.transactions]
+        return bytes_to_hex(merkle_root(leaves)) == self.merkle_root
+
+    def header(self) -> bytes:
+        timestamp = self.timestamp.encode(DEFAULT_ENCODING)
+        if len(timestamp) > 32:
+            raise ValueError(f"timestamp too long for block header: {timestamp}")
+        if self.version < Block.TARGET_VERSION:
+            return Block.HEADER_FORMAT.pack(
+                self.version,
+                self.index,
+                timestamp,
+                hex_to_bytes(self.prev_hash),
+                hex_to_bytes(self.merkle_root),
+                self.proof,
+            )
+        return Block.TARGET_HEADER_FORMAT.pack(
+            self.version,
+            self.index,
+            timestamp,
+            hex_to_bytes(self.prev_hash),
+            hex_to_bytes(self.merkle_root),
+            target_bytes(self.target),
+            self.proof,
+        )
+
+    def header_only(self) -> "Block":
+        """header_only returns a copy without transactions, which has the same
+        hash if the block has a header"""
+        return replace(self, transactions=[])
+
+    def inclusion_proof(self, transaction_id: str) -> Optional["InclusionProof"]:
+        if self.version == Block.LEGACY_VERSION:
+            return None
+        leaves = [transaction.digest() for transaction in self.transactions]
+        transaction_digest = hex_to_bytes(transaction_id)
+        if transaction_digest not in leaves:
+            return None
+        path = merkle_path(leaves, leaves.index(transaction_digest))
+        return InclusionProof(
+            transaction_id=transaction_id,
+            header=self.header_only(),
+            path=[
+                (sibling_is_left, bytes_to_hex(sibling))
+                for sibling_is_left, sibling in path
+            ],
+        )
+
+    def hash(self) -> str:
+        """hash of a block with a header is memoized until a field of the
+        block is assigned. Changing the transactions list in place does not
+        invalidate it; the header commits to the transactions only through
+        the Merkle root, which is assigned by seal. Legacy blocks hash all
+        their transactions, so their hash is not memoized."""
+        if self.version == Block.LEGACY_VERSION:
+            return hash_hex(self.to_json())
+        memoized_hash = self.__dict__.get("_memoized_hash")
+        if memoized_hash is not None:
+            return memoized_hash
+        memoized_hash = bytes_to_hex(hash_bytes(self.header()))
+        self._memoized_hash = memoized_hash
+        return memoized_hash
 
     def verify_hash(self, hash: str) -> bool:
         return self.hash() == hash
 
+    def proof_of_work_engine(self, difficulty: Optional[int] = None):
+        """Splits the serialized block around the proof value, so the rest
+        of the block is serialized and hashed only once for all nonces.
+        The block's target is used unless a difficulty is given."""
+        target = (
+            difficulty_target(difficulty)
+            if difficulty is not None
+            else target_bytes(self.target)
+        )
+        if self.version != Block.LEGACY_VERSION:
+            header_prefix = self.header()[: -len(u64_nonce(0))]
+            return ProofOfWork(header_prefix, b"", target, u64_nonce)
+
+        block_json = replace(self, proof=0).to_json()
+        if not block_json.endswith('"proof": 0}'):
+            raise ValueError("proof must be the last serialized block field")
+        prefix = block_json.removesuffix("0}").encode(DEFAULT_ENCODING)
+        return ProofOfWork(prefix, b"}", target)
+
     def proof_of_work(self):
-        found = False
-        while not found:
-            if Block.verify_hash_difficulty(self.hash()):
-                return self.proof
-            self.proof += 1
+        self.proof = self.proof_of_work_engine().search(start=self.proof)
+        return self.proof
+
+    def verify_proof(self) -> bool:
+        """Checks the hash of the block against its target, compared as
+        integers, and that the target is not easier than MAX_TARGET."""
+        return self.target <= MAX_TARGET and int(self.hash(), 16) <= self.target
 
     @staticmethod
-    def verify_hash_difficulty(hash: str, difficulty: int = 4) -> bool:
+    def verify_hash_difficulty(hash: str, difficulty: int = DEFAULT_DIFFICULTY) -> bool:
         return list(hash[0:difficulty]) == ["0"] * difficulty
 
     @staticmethod
@@ -113,6 +353,9 @@ class Block:
             ],
             prev_hash=block_dict["prev_hash"],
             proof=block_dict["proof"],
+            version=block_dict.get("version", Block.LEGACY_VERSION),
+            merkle_root=block_dict.get("merkle_root", ""),
+            target=block_dict.get("target", DEFAULT_TARGET),
         )
 
     @staticmethod
@@ -120,3 +363,96 @@ class Block:
         if isinstance(serialized_block, str):
             return Block.of(json.loads(serialized_block))
         return Block.of(serialized_block)
+
+    @staticmethod
+    def read(reader: Reader):
+        version = reader.uint()
+        index = reader.uint()
+        timestamp = reader.str()
+        transactions = []
+        for _ in range(reader.uint()):
+            transaction_reader = reader.record()
+            transactions.append(Transaction.read(transaction_reader))
+            transaction_reader.expect_end()
+        return Block(
+            index=index,
+            timestamp=timestamp,
+            transactions=transactions,
+            prev_hash=reader.hash(),
+            proof=reader.uint(),
+            version=version,
+            merkle_root=reader.hash(),
+            target=reader.uint() if version >= Block.TARGET_VERSION else DEFAULT_TARGET,
+        )
+
+    @staticmethod
+    def from_bytes(serialized_block: bytes | memoryview):
+        reader = Reader(serialized_block)
+        block = Block.read(reader)
+        reader.expect_end()
+        return block
+
+
+def block_json_to_bytes(serialized_block: str) -> bytes:
+    return Block.from_json(serialized_block).to_bytes()
+
+
+def block_bytes_to_json(serialized_block: bytes | memoryview) -> str:
+    return Block.from_bytes(serialized_block).to_json()
+
+
+def block_index_of(serialized_block: bytes | memoryview) -> int:
+    """block_index_of reads the index of a binary encoded block, without
+    decoding its transactions"""
+    reader = Reader(serialized_block)
+    reader.uint()  # version
+    return reader.uint()
+
+
+@dataclass(frozen=True)
+class InclusionProof:
+    """InclusionProof shows that a transaction is committed to a block,
+    with the block header and the Merkle path from the transaction to the
+    header's Merkle root. Its size is logarithmic in the block size."""
+
+    transaction_id: str = ""
+    header: Block = field(default_factory=Block)
+    path: list[tuple[bool, str]] = field(default_factory=list)
+    """(sibling_is_left, sibling) pairs from the transaction up to the root"""
+
+    def verify(self) -> bool:
+        if self.header.version == Block.LEGACY_VERSION:
+            return False
+        path = [
+            (sibling_is_left, hex_to_bytes(sibling))
+            for sibling_is_left, sibling in self.path
+        ]
+        root = merkle_root_from_path(hex_to_bytes(self.transaction_id), path)
+        return (
+            bytes_to_hex(root) == self.header.merkle_root and self.header.verify_proof()
+        )
+
+    def to_json(self, indent=None):
+        proof_dict = {
+            "transaction_id": self.transaction_id,
+            "header": self.header.to_dict(),
+            "path": self.path,
+        }
+        return json.dumps(proof_dict, indent=indent)
+
+    @staticmethod
+    def of(proof_dict: dict):
+        return InclusionProof(
+            transaction_id=proof_dict["transaction_id"],
+            header=Block.of(proof_dict["header"]),
+            path=[
+                (sibling_is_left, sibling)
+                for sibling_is_left, sibling in proof_dict["path"]
+            ],
+        )
+
+    @staticmethod
+    def from_json(serialized_proof: str | dict):
+        if isinstance(serialized_proof, str):
+            return InclusionProof.of(json.loads(serialized_proof))
+        return InclusionProof.of(serialized_proof)
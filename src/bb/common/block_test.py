@@ -2,9 +2,20 @@ import unittest
 from dataclasses import replace
 from datetime import datetime as Timestamp
 
+from bb.common.codec import DecodeError
+from bb.common.pow import MAX_TARGET
 from bb.common.sec.asymmetric import generate_private_key
+from bb.common.sec.hash import hash_hex
+from bb.common.sec.scheme import generate_signing_key
 
-from .block import Block, Data, Transaction
+from .block import (
+    Block,
+    Data,
+    InclusionProof,
+    Transaction,
+    block_bytes_to_json,
+    block_json_to_bytes,
+)
 
 
 class TestData(unittest.TestCase):
@@ -89,6 +100,21 @@ class TestTransaction(unittest.TestCase):
         # then
         self.assertEqual(verified, False)
 
+    def test_sign_and_verify_ed25519(self):
+        # given
+        private_key = generate_signing_key("ed25519")
+        rsa_public_key = generate_private_key().public_key()
+        tested_transaction = replace(self.transaction, fingerprint="")
+
+        # when
+        tested_transaction.sign(private_key)
+        deserialized = Transaction.from_json(tested_transaction.to_json())
+
+        # then
+        self.assertEqual(deserialized.scheme, "ed25519")
+        self.assertTrue(deserialized.verify(private_key.public_key()))
+        self.assertFalse(deserialized.verify(rsa_public_key))
+
 
 class TestBlock(unittest.TestCase):
     # given
@@ -102,6 +128,7 @@ class TestBlock(unittest.TestCase):
         transactions=[transaction],
         prev_hash="test_prev_hash",
         proof=1,
+        version=Block.LEGACY_VERSION,
     )
 
     serialized_block = """\
@@ -156,6 +183,244 @@ class TestBlock(unittest.TestCase):
         # then
         self.assertEqual(tested, hash)
 
+    def test_proof_of_work_matches_naive_search(self):
+        # given
+        block = replace(self.block, proof=0)
+        naive_proof = 0
+        while not Block.verify_hash_difficulty(
+            replace(block, proof=naive_proof).hash(), difficulty=2
+        ):
+            naive_proof += 1
+
+        # when
+        tested = block.proof_of_work_engine(difficulty=2).search()
+
+        # then
+        self.assertEqual(tested, naive_proof)
+
+    def test_proof_of_work_engine_digest(self):
+        # when
+        tested = self.block.proof_of_work_engine().digest(self.block.proof)
+
+        # then
+        self.assertEqual(tested.hex(), self.block.hash())
+
+
+class TestHeaderBlock(unittest.TestCase):
+    # given
+    transactions = [
+        Transaction(
+            user_guid=f"test_user_guid_{i}",
+            fingerprint="test_fingerprint",
+            data=Data(T="data", payload="test_payload"),
+        )
+        for i in range(3)
+    ]
+    prev_hash = "0000b4b9e0c1c0c9e8d4a0f27f9f3cc6a6c0c4d0b0a0a0b0c0d0e0f000000000"
+
+    def sealed_block(self) -> Block:
+        block = Block(
+            index=1,
+            timestamp="2021-01-01T00:00:00.000",
+            transactions=list(self.transactions),
+            prev_hash=self.prev_hash,
+        )
+        block.seal()
+        return block
+
+    def test_header_size_independent_of_transactions(self):
+        # given
+        block = self.sealed_block()
+        empty_block = replace(block, transactions=[])
+
+        # then
+        self.assertEqual(len(block.header()), Block.TARGET_HEADER_FORMAT.size)
+        self.assertEqual(block.hash(), empty_block.hash())
+
+    def test_header_commits_target(self):
+        # given
+        block = self.sealed_block()
+        header_block = replace(block, version=Block.HEADER_VERSION)
+
+        # when
+        tested = replace(block, target=block.target // 2)
+
+        # then
+        self.assertEqual(len(header_block.header()), Block.HEADER_FORMAT.size)
+        self.assertNotEqual(tested.hash(), block.hash())
+        self.assertEqual(Block.from_json(tested.to_json()), tested)
+        self.assertEqual(Block.from_bytes(tested.to_bytes()), tested)
+
+    def test_seal_commits_transactions(self):
+        # given
+        block = self.sealed_block()
+        other_block = replace(block, transactions=self.transactions[:2])
+
+        # when
+        other_block.seal()
+
+        # then
+        self.assertNotEqual(block.merkle_root, other_block.merkle_root)
+        self.assertNotEqual(block.hash(), other_block.hash())
+
+    def test_json_round_trip(self):
+        # given
+        block = self.sealed_block()
+
+        # when
+        tested = Block.from_json(block.to_json())
+
+        # then
+        self.assertEqual(tested, block)
+        self.assertEqual(tested.hash(), block.hash())
+
+    def test_proof_of_work(self):
+        # given
+        block = self.sealed_block()
+
+        # when
+        block.proof_of_work()
+
+        # then
+        self.assertTrue(Block.verify_hash_difficulty(block.hash()))
+        self.assertTrue(block.verify_proof())
+
+    def test_proof_of_work_with_target(self):
+        # given
+        block = replace(self.sealed_block(), target=MAX_TARGET)
+
+        # when
+        block.proof_of_work()
+
+        # then
+        self.assertTrue(block.verify_proof())
+        self.assertFalse(replace(block, target=MAX_TARGET + 1).verify_proof())
+        self.assertLessEqual(int(block.hash(), 16), MAX_TARGET)
+
+    def test_hash_memoized_until_field_assigned(self):
+        # given
+        block = self.sealed_block()
+        memoized_hash = block.hash()
+
+        # when
+        block.proof += 1
+
+        # then
+        self.assertNotEqual(block.hash(), memoized_hash)
+        self.assertEqual(block.hash(), replace(block).hash())
+
+    def test_legacy_hash_follows_transactions(self):
+        # given
+        block = replace(self.sealed_block(), version=Block.LEGACY_VERSION)
+        first_hash = block.hash()
+
+        # when
+        block.transactions.append(self.transactions[0])
+
+        # then
+        self.assertNotEqual(block.hash(), first_hash)
+        self.assertEqual(block.hash(), hash_hex(block.to_json()))
+
+    def test_inclusion_proof(self):
+        # given
+        block = self.sealed_block()
+        block.proof_of_work()
+
+        for transaction in self.transactions:
+            # when
+            proof = block.inclusion_proof(transaction.id())
+            tested = InclusionProof.from_json(proof.to_json())  # type: ignore
+
+            # then
+            self.assertEqual(tested, proof)
+            self.assertTrue(tested.verify())
+
+    def test_inclusion_proof_tampered_path(self):
+        # given
+        block = self.sealed_block()
+        block.proof_of_work()
+        proof = block.inclusion_proof(self.transactions[0].id())
+        sibling_is_left, _ = proof.path[0]  # type: ignore
+        tampered_path = [(sibling_is_left, "00" * 32)] + proof.path[1:]  # type: ignore
+
+        # when
+        tested = replace(proof, path=tampered_path)  # type: ignore
+
+        # then
+        self.assertFalse(tested.verify())
+
+    def test_inclusion_proof_unknown_transaction(self):
+        # given
+        block = self.sealed_block()
+
+        # when
+        tested = block.inclusion_proof("00" * 32)
+
+        # then
+        self.assertIsNone(tested)
+
+
+class TestBinary(unittest.TestCase):
+    # given
+    private_key = generate_signing_key("ed25519")
+    transactions = [
+        Transaction(user_guid="test_user_guid", data=Data(T=T, payload="test_payload"))
+        for T in ("register", "data", "revoke")
+    ]
+    for transaction in transactions:
+        transaction.sign(private_key)
+    transactions.append(
+        Transaction(
+            user_guid="test_user_guid",
+            fingerprint="test_fingerprint",
+            data=Data(T="data", payload="zażółć"),
+        )
+    )
+    block = Block(
+        index=7,
+        timestamp="2021-01-01T00:00:00.000",
+        transactions=transactions,
+        prev_hash="00" * 32,
+        proof=123456,
+    )
+    block.seal()
+
+    def test_round_trip(self):
+        for tested in [self.block, self.block.header_only(), *self.transactions]:
+            with self.subTest(tested=tested):
+                # when
+                encoded = tested.to_bytes()
+                decoded = type(tested).from_bytes(memoryview(encoded))
+
+                # then
+                self.assertEqual(decoded, tested)
+                self.assertEqual(decoded.to_bytes(), encoded)
+
+    def test_json_conversion(self):
+        # given
+        legacy_block = replace(
+            TestBlock.block, version=Block.LEGACY_VERSION, merkle_root=""
+        )
+
+        for block in [self.block, legacy_block]:
+            # when
+            tested = block_bytes_to_json(block_json_to_bytes(block.to_json()))
+
+            # then
+            self.assertEqual(tested, block.to_json())
+            self.assertEqual(Block.from_json(tested).hash(), block.hash())
+
+    def test_smaller_than_json(self):
+        # when
+        tested = self.block.to_bytes()
+
+        # then
+        self.assertLess(len(tested), len(self.block.to_json()))
+
+    def test_trailing_data(self):
+        with self.assertRaises(DecodeError):
+            Block.from_bytes(self.block.to_bytes() + b"\x00")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,137 @@
+import hashlib
+import math
+from typing import Optional
+
+from bb.common.codec import DecodeError, Reader, Writer
+from bb.common.config import DEFAULT_ENCODING
+
+
+class BloomFilter:
+    """BloomFilter is a set of strings in bounded memory, answering
+    membership with no false negatives and false positives at about
+    error_rate while no more than capacity items are added. Each item
+    sets num_hashes bits, derived from one digest by double hashing."""
+
+    def __init__(
+        self,
+        num_bits: int,
+        num_hashes: int,
+        bits: Optional[bytearray] = None,
+        count: int = 0,
+    ):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bits if bits is not None else bytearray((num_bits + 7) // 8)
+        self.count = count
+        """number of items added, including ones added more than once"""
+
+    @staticmethod
+    def for_capacity(capacity: int, error_rate: float) -> "BloomFilter":
+        num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        num_hashes = max(round(num_bits / capacity * math.log(2)), 1)
+        return BloomFilter(num_bits, num_hashes)
+
+    def __positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(DEFAULT_ENCODING), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item: str):
+        for position in self.__positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.__positions(item)
+        )
+
+    def copy(self) -> "BloomFilter":
+        return BloomFilter(
+            self.num_bits, self.num_hashes, bytearray(self.bits), self.count
+        )
+
+    def write(self, writer: Writer):
+        writer.uint(self.num_bits)
+        writer.uint(self.num_hashes)
+        writer.uint(self.count)
+        writer.raw(bytes(self.bits))
+
+    @staticmethod
+    def read(reader: Reader) -> "BloomFilter":
+        num_bits = reader.uint()
+        num_hashes = reader.uint()
+        count = reader.uint()
+        if num_bits == 0 or num_hashes == 0:
+            raise DecodeError("empty bloom filter")
+        bits = bytearray(reader.raw((num_bits + 7) // 8))
+        return BloomFilter(num_bits, num_hashes, bits, count)
+
+
+class ScalableBloomFilter:
+    """ScalableBloomFilter keeps the false positive rate bounded however
+    many items are added. Once its last BloomFilter holds its capacity, a
+    filter with GROWTH times the capacity and TIGHTENING times the error
+    rate is added, so the rate of all filters stays below
+    error_rate / (1 - TIGHTENING) and the memory grows with the items."""
+
+    GROWTH = 2
+    TIGHTENING = 0.5
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float,
+        filters: Optional[list[BloomFilter]] = None,
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.filters = filters or [BloomFilter.for_capacity(capacity, error_rate)]
+
+    @property
+    def count(self) -> int:
+        return sum(bloom_filter.count for bloom_filter in self.filters)
+
+    def add(self, item: str):
+        generation = len(self.filters) - 1
+        last = self.filters[-1]
+        if last.count >= self.capacity * self.GROWTH**generation:
+            last = BloomFilter.for_capacity(
+                self.capacity * self.GROWTH ** (generation + 1),
+                self.error_rate * self.TIGHTENING ** (generation + 1),
+            )
+            # appended after it is filled, for readers on other threads
+            last.add(item)
+            self.filters.append(last)
+            return
+        last.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return any(item in bloom_filter for bloom_filter in self.filters)
+
+    def copy(self) -> "ScalableBloomFilter":
+        return ScalableBloomFilter(
+            self.capacity,
+            self.error_rate,
+            [bloom_filter.copy() for bloom_filter in self.filters],
+        )
+
+    def write(self, writer: Writer):
+        writer.uint(self.capacity)
+        writer.value(self.error_rate)
+        writer.uint(len(self.filters))
+        for bloom_filter in self.filters:
+            bloom_filter.write(writer)
+
+    @staticmethod
+    def read(reader: Reader) -> "ScalableBloomFilter":
+        capacity = reader.uint()
+        error_rate = reader.value()
+        if capacity == 0 or not isinstance(error_rate, float):
+            raise DecodeError("invalid scalable bloom filter")
+        filters = [BloomFilter.read(reader) for _ in range(reader.uint())]
+        if not filters:
+            raise DecodeError("empty scalable bloom filter")
+        return ScalableBloomFilter(capacity, error_rate, filters)
@@ -0,0 +1,83 @@
+import unittest
+
+from bb.common.codec import Reader, Writer
+
+from .bloom import BloomFilter, ScalableBloomFilter
+
+
+class TestBloomFilter(unittest.TestCase):
+    # given
+    items = [f"test_item_{i}" for i in range(1000)]
+    other_items = [f"other_item_{i}" for i in range(10000)]
+
+    def test_no_false_negatives(self):
+        # given
+        bloom_filter = BloomFilter.for_capacity(1000, 0.01)
+
+        # when
+        for item in self.items:
+            bloom_filter.add(item)
+
+        # then
+        self.assertTrue(all(item in bloom_filter for item in self.items))
+        false_positives = sum(item in bloom_filter for item in self.other_items)
+        self.assertLess(false_positives, 0.02 * len(self.other_items))
+
+    def test_round_trip(self):
+        # given
+        bloom_filter = BloomFilter.for_capacity(1000, 0.01)
+        for item in self.items[:10]:
+            bloom_filter.add(item)
+        writer = Writer()
+
+        # when
+        bloom_filter.write(writer)
+        tested = BloomFilter.read(Reader(writer.to_bytes()))
+
+        # then
+        self.assertEqual(tested.bits, bloom_filter.bits)
+        self.assertEqual(tested.count, 10)
+        self.assertIn(self.items[0], tested)
+
+
+class TestScalableBloomFilter(unittest.TestCase):
+    # given
+    items = [f"test_item_{i}" for i in range(5000)]
+    other_items = [f"other_item_{i}" for i in range(10000)]
+
+    def test_rate_kept_past_capacity(self):
+        # given
+        bloom_filter = ScalableBloomFilter(500, 0.01)
+
+        # when
+        for item in self.items:
+            bloom_filter.add(item)
+
+        # then
+        self.assertGreater(len(bloom_filter.filters), 1)
+        self.assertEqual(bloom_filter.count, len(self.items))
+        self.assertTrue(all(item in bloom_filter for item in self.items))
+        false_positives = sum(item in bloom_filter for item in self.other_items)
+        self.assertLess(false_positives, 0.03 * len(self.other_items))
+
+    def test_round_trip(self):
+        # given
+        bloom_filter = ScalableBloomFilter(5, 0.01)
+        for item in self.items[:10]:
+            bloom_filter.add(item)
+        writer = Writer()
+
+        # when
+        bloom_filter.write(writer)
+        tested = ScalableBloomFilter.read(Reader(writer.to_bytes()))
+
+        # then
+        self.assertEqual(
+            [f.bits for f in tested.filters], [f.bits for f in bloom_filter.filters]
+        )
+        self.assertEqual((tested.capacity, tested.error_rate), (5, 0.01))
+        self.assertIn(self.items[9], tested)
+
+
+if __name__ == "__main__":
+    unittest.main()
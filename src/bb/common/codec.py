@@ -0,0 +1,218 @@
+import struct
+
+from bb.common.config import DEFAULT_ENCODING, DEFAULT_HASH
+
+HASH_SIZE = DEFAULT_HASH.digest_size
+FLOAT_FORMAT = struct.Struct(">d")
+
+VALUE_TYPES = (
+    "none",
+    "false",
+    "true",
+    "uint",
+    "negative",
+    "str",
+    "bytes",
+    "list",
+    "dict",
+    "float",
+)
+"""tags of the self-describing values, see Writer.value"""
+
+
+class DecodeError(ValueError):
+    pass
+
+
+class Writer:
+    """Writer builds the canonical binary encoding: unsigned integers are
+    minimal LEB128 varints, strings and nested records are prefixed with
+    their varint length."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def uint(self, value: int):
+        if value < 0:
+            raise ValueError(f"negative value cannot be encoded: {value}")
+        while value > 0x7F:
+            self.buffer.append((value & 0x7F) | 0x80)
+            value >>= 7
+        self.buffer.append(value)
+
+    def enum(self, value: str, options: tuple[str, ...]):
+        self.uint(options.index(value))
+
+    def raw(self, value: bytes):
+        self.buffer += value
+
+    def bytes(self, value: bytes):
+        self.uint(len(value))
+        self.buffer += value
+
+    def str(self, value: str):
+        self.bytes(value.encode(DEFAULT_ENCODING))
+
+    def hash(self, value: str):
+        """Hex digests take their raw size, other strings are kept as is."""
+        if len(value) == 2 * HASH_SIZE and value == value.lower():
+            try:
+                raw = bytes.fromhex(value)
+            except ValueError:
+                pass
+            else:
+                self.buffer.append(1)
+                self.buffer += raw
+                return
+        self.buffer.append(0)
+        self.str(value)
+
+    def value(self, value):
+        """Encodes None, bools, ints, floats, strings, bytes, lists and dicts of
+        them, prefixed with their tag, for payloads without a fixed layout,
+        e.g. RPC arguments. Bytes are kept raw, unlike in JSON."""
+        if value is None or isinstance(value, bool):
+            self.enum({None: "none", False: "false", True: "true"}[value], VALUE_TYPES)
+        elif isinstance(value, int):
+            self.enum("uint" if value >= 0 else "negative", VALUE_TYPES)
+            self.uint(value if value >= 0 else -value)
+        elif isinstance(value, float):
+            self.enum("float", VALUE_TYPES)
+            self.raw(FLOAT_FORMAT.pack(value))
+        elif isinstance(value, str):
+            self.enum("str", VALUE_TYPES)
+            self.str(value)
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            self.enum("bytes", VALUE_TYPES)
+            self.bytes(bytes(value))
+        elif isinstance(value, (list, tuple)):
+            self.enum("list", VALUE_TYPES)
+            self.uint(len(value))
+            for item in value:
+                self.value(item)
+        elif isinstance(value, dict):
+            self.enum("dict", VALUE_TYPES)
+            self.uint(len(value))
+            for key, item in value.items():
+                self.value(key)
+                self.value(item)
+        else:
+            raise ValueError(f"cannot encode value of type {type(value).__name__}")
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.buffer)
+
+
+class Reader:
+    """Reader decodes the canonical binary encoding from bytes or a
+    memoryview without copying; only the decoded values are allocated."""
+
+    def __init__(self, data: bytes | bytearray | memoryview):
+        self.view = memoryview(data)
+        self.offset = 0
+
+    def __take(self, size: int) -> memoryview:
+        end = self.offset + size
+        if end > len(self.view):
+            raise DecodeError("unexpected end of data")
+        chunk = self.view[self.offset : end]
+        self.offset = end
+        return chunk
+
+    def uint(self) -> int:
+        view = self.view
+        offset = self.offset
+        try:
+            byte = view[offset]
+            if byte < 0x80:
+                # fast path for single byte varints
+                self.offset = offset + 1
+                return byte
+            value = 0
+            shift = 0
+            while byte & 0x80:
+                value |= (byte & 0x7F) << shift
+                shift += 7
+                offset += 1
+                byte = view[offset]
+        except IndexError:
+            raise DecodeError("unexpected end of data")
+        if byte == 0:
+            raise DecodeError("non-minimal varint")
+        self.offset = offset + 1
+        return value | (byte << shift)
+
+    def enum(self, options: tuple[str, ...]) -> str:
+        code = self.uint()
+        if code >= len(options):
+            raise DecodeError(f"unknown enum code: {code}")
+        return options[code]
+
+    def raw(self, size: int) -> memoryview:
+        return self.__take(size)
+
+    def bytes(self) -> memoryview:
+        return self.__take(self.uint())
+
+    def str(self) -> str:
+        size = self.uint()
+        end = self.offset + size
+        if end > len(self.view):
+            raise DecodeError("unexpected end of data")
+        try:
+            value = str(self.view[self.offset : end], DEFAULT_ENCODING)
+        except UnicodeDecodeError as e:
+            raise DecodeError(f"invalid string: {e}")
+        self.offset = end
+        return value
+
+    def hash(self) -> str:
+        tag = self.__take(1)[0]
+        if tag == 1:
+            return self.__take(HASH_SIZE).hex()
+        if tag == 0:
+            value = self.str()
+            if len(value) == 2 * HASH_SIZE and value == value.lower():
+                try:
+                    bytes.fromhex(value)
+                except ValueError:
+                    return value
+                raise DecodeError("hex digest not encoded as raw bytes")
+            return value
+        raise DecodeError(f"unknown hash tag: {tag}")
+
+    def value(self):
+        value_type = self.enum(VALUE_TYPES)
+        if value_type in ("none", "false", "true"):
+            return {"none": None, "false": False, "true": True}[value_type]
+        if value_type == "uint":
+            return self.uint()
+        if value_type == "negative":
+            return -self.uint()
+        if value_type == "float":
+            return FLOAT_FORMAT.unpack(self.raw(FLOAT_FORMAT.size))[0]
+        if value_type == "str":
+            return self.str()
+        if value_type == "bytes":
+            return self.bytes().tobytes()
+        if value_type == "list":
+            return [self.value() for _ in range(self.uint())]
+        dict_value = {}
+        for _ in range(self.uint()):
+            key = self.value()
+            try:
+                dict_value[key] = self.value()
+            except TypeError:
+                raise DecodeError(f"unhashable dict key: {key!r}")
+        return dict_value
+
+    def record(self) -> "Reader":
+        """Returns a reader over the next length-prefixed record."""
+        return Reader(self.bytes())
+
+    def at_end(self) -> bool:
+        return self.offset == len(self.view)
+
+    def expect_end(self):
+        if not self.at_end():
+            raise DecodeError("trailing data")
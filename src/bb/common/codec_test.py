@@ -0,0 +1,83 @@
+import unittest
+
+from .codec import DecodeError, Reader, Writer
+
+
+class TestCodec(unittest.TestCase):
+    def test_uint_round_trip(self):
+        for value in [0, 1, 127, 128, 300, 2**32, 2**64 + 1]:
+            # given
+            writer = Writer()
+            writer.uint(value)
+
+            # when
+            tested = Reader(writer.to_bytes()).uint()
+
+            # then
+            self.assertEqual(tested, value)
+
+    def test_uint_non_minimal(self):
+        with self.assertRaises(DecodeError):
+            Reader(b"\x80\x00").uint()
+
+    def test_hash(self):
+        # given
+        digest = "ab" * 32
+        writer = Writer()
+        writer.hash(digest)
+        writer.hash("test_prev_hash")
+
+        # when
+        encoded = writer.to_bytes()
+        reader = Reader(encoded)
+
+        # then
+        self.assertEqual(len(encoded), 1 + 32 + 1 + 1 + len("test_prev_hash"))
+        self.assertEqual(reader.hash(), digest)
+        self.assertEqual(reader.hash(), "test_prev_hash")
+        reader.expect_end()
+
+    def test_value_round_trip(self):
+        # given
+        value = {
+            "id": 7,
+            "args": [None, True, False, -300, 0.5, "zażółć", b"\x00\xff", [], {}],
+            b"key": {"nested": [1, 2]},
+        }
+        writer = Writer()
+        writer.value(value)
+
+        # when
+        reader = Reader(writer.to_bytes())
+        tested = reader.value()
+
+        # then
+        self.assertEqual(tested, value)
+        reader.expect_end()
+
+    def test_value_unsupported(self):
+        with self.assertRaises(ValueError):
+            Writer().value(object())
+
+    def test_truncated(self):
+        # given
+        writer = Writer()
+        writer.str("test_payload")
+
+        # when
+        reader = Reader(writer.to_bytes()[:-1])
+
+        # then
+        with self.assertRaises(DecodeError):
+            reader.str()
+
+    def test_invalid_string(self):
+        for encoded in (b"\x01\xff", b"\x02\xc3\x28"):
+            with self.subTest(encoded=encoded):
+                # then
+                with self.assertRaises(DecodeError):
+                    Reader(encoded).str()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,44 @@
+import os
+
 from cryptography.hazmat.primitives.hashes import SHA256
 
 DEFAULT_ENCODING = "utf-8"
 DEFAULT_HASH = SHA256
 DEFAULT_RSA_PUBLIC_EXPONENT = 65537
+DEFAULT_DIFFICULTY = 4
+DEFAULT_MINING_WORKERS = 1
+DEFAULT_INTAKE_WORKERS = os.cpu_count() or 1
+DEFAULT_INTAKE_BATCH_SIZE = 64
+DEFAULT_INTAKE_BATCH_WAIT = 0.005
+DEFAULT_PUBLIC_KEY_CACHE_SIZE = 4096
+DEFAULT_VERIFICATION_CACHE_SIZE = 65536
+DEFAULT_SIGNATURE_SCHEME = "ed25519"
+DEFAULT_SYNC_BATCH_SIZE = 256
+DEFAULT_SNAPSHOT_INTERVAL = 30.0
+DEFAULT_PROXY_POOL_SIZE = 4
+DEFAULT_MEMBERSHIP_TTL = 5.0
+DEFAULT_BROADCAST_WORKERS = 16
+DEFAULT_PEER_TIMEOUT = 2.0
+DEFAULT_GOSSIP_BATCH_SIZE = 256
+DEFAULT_GOSSIP_BATCH_WAIT = 0.01
+DEFAULT_MEMPOOL_MAX_COUNT = 100_000
+DEFAULT_MEMPOOL_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_BLOCK_MAX_TRANSACTIONS = 10_000
+DEFAULT_SEEN_FILTER_CAPACITY = 1_000_000
+DEFAULT_SEEN_FILTER_ERROR_RATE = 0.001
+DEFAULT_RECENT_TRANSACTIONS_SIZE = 65536
+DEFAULT_SEAL_MAX_TRANSACTIONS = 1000
+DEFAULT_SEAL_MAX_BYTES = 1024 * 1024
+DEFAULT_SEAL_MAX_WAIT = 2.0
+DEFAULT_SEAL_CHECK_INTERVAL = 0.05
+DEFAULT_BLOCK_TIME = 5.0
+DEFAULT_RETARGET_INTERVAL = 16
+DEFAULT_MAX_CLOCK_DRIFT = 60.0
+DEFAULT_FRAME_HOST = "localhost"
+DEFAULT_FRAME_WORKERS = 32
+DEFAULT_FRAME_MAX_SIZE = 64 * 1024 * 1024
+DEFAULT_FRAME_MAX_IN_FLIGHT = 16
+DEFAULT_PYRO_SERIALIZER = "marshal"
+DEFAULT_WRITE_BATCH_SIZE = 64
+DEFAULT_WRITE_RETRY_INTERVAL = 0.5
+DEFAULT_WRITE_TAKEOVER_AFTER = 5.0
@@ -0,0 +1,54 @@
+from bb.common.config import DEFAULT_HASH
+from bb.common.sec.hash import hash_bytes
+
+EMPTY_ROOT = bytes(DEFAULT_HASH.digest_size)
+
+
+def merkle_parent(left: bytes, right: bytes) -> bytes:
+    return hash_bytes(left + right)
+
+
+def _parent_level(level: list[bytes]) -> list[bytes]:
+    parents = [
+        merkle_parent(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)
+    ]
+    if len(level) % 2 == 1:
+        parents.append(level[-1])
+    return parents
+
+
+def merkle_root(leaves: list[bytes]) -> bytes:
+    """Computes the Merkle root of leaf digests. A node without a sibling is
+    promoted to the next level unchanged, so no leaf is ever duplicated."""
+    if not leaves:
+        return EMPTY_ROOT
+    level = leaves
+    while len(level) > 1:
+        level = _parent_level(level)
+    return level[0]
+
+
+def merkle_path(leaves: list[bytes], index: int) -> list[tuple[bool, bytes]]:
+    """Returns the sibling path of the leaf at index, from the leaf level up,
+    as (sibling_is_left, sibling) pairs. Levels where the node is promoted
+    without a sibling have no entry."""
+    path: list[tuple[bool, bytes]] = []
+    level = leaves
+    while len(level) > 1:
+        sibling_index = index ^ 1
+        if sibling_index < len(level):
+            path.append((sibling_index < index, level[sibling_index]))
+        level = _parent_level(level)
+        index //= 2
+    return path
+
+
+def merkle_root_from_path(leaf: bytes, path: list[tuple[bool, bytes]]) -> bytes:
+    node = leaf
+    for sibling_is_left, sibling in path:
+        node = (
+            merkle_parent(sibling, node)
+            if sibling_is_left
+            else merkle_parent(node, sibling)
+        )
+    return node
@@ -0,0 +1,423 @@
+"""Frame API: an asyncio transport for the exposed methods of the node.
+
+Every message is a dict encoded as a codec value, see Writer.value, in
+a frame prefixed with its big-endian u32 length, so bytes arguments and
+results travel raw. A request names the object, the method and its arguments;
+it is answered, unless the method is oneway, by a result or an error, or
+by a stream of items followed by an end marker if the method returned a
+generator. Requests carry an id, so a connection may have many of them
+in flight and the replies may come in any order. The server reads the
+next request of a connection only while fewer than max_in_flight are.
+
+An error raised by the remote method is raised again by the proxy with
+its type if it is a builtin or Pyro error, as Pyro does; broken or
+unexpected frames raise CommunicationError, like a lost connection.
+
+Frame uris have the Pyro syntax with a marked object id, so they are
+registered in the nameserver and pooled like the uris of Pyro objects,
+see papi.proxy_of."""
+
+import asyncio
+import builtins
+import socket
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import count
+from threading import Event
+from types import GeneratorType
+from typing import Any, Iterator, Optional
+
+from Pyro5 import api, errors
+from Pyro5.core import URI
+from Pyro5.errors import CommunicationError, DaemonError, PyroError
+from Pyro5.errors import TimeoutError as PyroTimeoutError
+from Pyro5.server import _get_exposed_members
+
+from bb.common.codec import DecodeError, Reader, Writer
+from bb.common.config import (
+    DEFAULT_FRAME_HOST,
+    DEFAULT_FRAME_MAX_IN_FLIGHT,
+    DEFAULT_FRAME_MAX_SIZE,
+    DEFAULT_FRAME_WORKERS,
+)
+from bb.common.log import Logger
+
+FRAME_HEADER = struct.Struct(">I")
+"""payload length"""
+FRAME_OBJECT_PREFIX = "frame:"
+METADATA_METHOD = "_frameMetadata"
+"""lists the oneway methods of an object, so clients do not wait for them"""
+
+
+class FrameError(PyroError):
+    """FrameError is raised for frames too large to send, and for errors
+    raised by the remote method which are neither builtin nor Pyro errors,
+    which are passed as their type name and message."""
+
+
+ERROR_MODULES = {"builtins": builtins, "Pyro5.errors": errors}
+"""modules of the error types raised again by the proxy"""
+
+
+def frame_uri(object_id: str, host: str, port: int) -> str:
+    return f"PYRO:{FRAME_OBJECT_PREFIX}{object_id}@{host}:{port}"
+
+
+def is_frame_uri(uri: str) -> bool:
+    return str(uri).startswith(f"PYRO:{FRAME_OBJECT_PREFIX}")
+
+
+def encode_frame(message: dict, max_size: int = DEFAULT_FRAME_MAX_SIZE) -> bytes:
+    writer = Writer()
+    writer.raw(FRAME_HEADER.pack(0))
+    writer.value(message)
+    size = len(writer.buffer) - FRAME_HEADER.size
+    if size > max_size:
+        raise FrameError(f"frame of {size} bytes exceeds {max_size}")
+    FRAME_HEADER.pack_into(writer.buffer, 0, size)
+    return writer.to_bytes()
+
+
+def decode_frame(payload: bytes) -> dict:
+    try:
+        reader = Reader(payload)
+        message = reader.value()
+        reader.expect_end()
+    except (DecodeError, RecursionError) as e:
+        raise FrameError(f"malformed frame: {e}")
+    if not isinstance(message, dict):
+        raise FrameError("malformed frame: not an object")
+    return message
+
+
+def remote_error(reply: dict) -> Exception:
+    message = str(reply.get("error"))
+    error_name = str(reply.get("type"))
+    module = ERROR_MODULES.get(reply.get("module", ""))
+    error_type = getattr(module, error_name, None) if module is not None else None
+    if isinstance(error_type, type) and issubclass(error_type, Exception):
+        try:
+            return error_type(message)
+        except Exception:
+            pass
+    return FrameError(f"{error_name}: {message}")
+
+
+def frame_size(header: bytes, max_size: int) -> int:
+    (size,) = FRAME_HEADER.unpack(header)
+    if size > max_size:
+        raise FrameError(f"frame of {size} bytes exceeds {max_size}")
+    return size
+
+
+async def read_frame(
+    reader: asyncio.StreamReader, max_size: int = DEFAULT_FRAME_MAX_SIZE
+) -> dict:
+    size = frame_size(await reader.readexactly(FRAME_HEADER.size), max_size)
+    return decode_frame(await reader.readexactly(size))
+
+
+class FrameServer:
+    """FrameServer serves the exposed methods of its objects, the same ones
+    a Pyro daemon would, over asyncio connections. An idle connection costs
+    a coroutine instead of a thread; the calls themselves run on a pool of
+    workers threads, as the methods may block. Its interface follows
+    papi.Daemon, so either can be used to start a node."""
+
+    def __init__(
+        self,
+        host: str = DEFAULT_FRAME_HOST,
+        port: int = 0,
+        workers: int = DEFAULT_FRAME_WORKERS,
+        max_frame_size: int = DEFAULT_FRAME_MAX_SIZE,
+        max_in_flight: int = DEFAULT_FRAME_MAX_IN_FLIGHT,
+    ):
+        self.log = Logger(self)
+        self.socket = socket.create_server((host, port))
+        self.host = host
+        self.port = self.socket.getsockname()[1]
+        self.max_frame_size = max_frame_size
+        self.max_in_flight = max_in_flight
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="frames")
+        self.objects: dict[str, object] = {}
+        self.registered_names: list[str] = []
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stopping: Optional[asyncio.Event] = None
+        self.started = Event()
+        self.connections: dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    def add(self, obj: object, object_id: str) -> str:
+        """Serves the object without registering it in the nameserver,
+        returns its uri."""
+        self.objects[f"{FRAME_OBJECT_PREFIX}{object_id}"] = obj
+        return frame_uri(object_id, self.host, self.port)
+
+    def register(self, obj: object, ns_name: str) -> str:
+        """Serves the object and registers it in the nameserver,
+        returns its uri."""
+        uri = self.add(obj, ns_name)
+        api.locate_ns().register(ns_name, uri)
+        self.log.debug(f"registered {ns_name} in ns")
+        self.registered_names.append(ns_name)
+        return uri
+
+    def start(self):
+        """Serves connections until shut down or interrupted."""
+        self.log.info(f"starting frame server on {self.host}:{self.port}")
+        try:
+            asyncio.run(self.__serve())
+        except KeyboardInterrupt:
+            self.log.info("interrupted")
+
+    def shutdown(self):
+        loop, stopping = self.loop, self.stopping
+        if loop is not None and stopping is not None:
+            loop.call_soon_threadsafe(stopping.set)
+
+    def shutdown_with_ns_cleanup(self):
+        self.log.info("shutting down...")
+        ns = api.locate_ns()
+        for name in self.registered_names:
+            ns.remove(name)
+            self.log.debug(f"removed {name} from ns")
+        self.shutdown()
+        self.pool.shutdown()
+        self.log.info("done")
+
+    async def __serve(self):
+        self.loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        server = await asyncio.start_server(self.__handle, sock=self.socket)
+        self.started.set()
+        async with server:
+            await self.stopping.wait()
+            # closed connections end their handlers, which are then awaited
+            for writer in self.connections.values():
+                writer.close()
+            await asyncio.gather(*self.connections, return_exceptions=True)
+        self.loop = None
+
+    async def __handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        connection = asyncio.current_task()
+        assert connection is not None
+        self.connections[connection] = writer
+        calls: set[asyncio.Task] = set()
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+
+        def _done(call: asyncio.Task):
+            calls.discard(call)
+            in_flight.release()
+
+        try:
+            while True:
+                # a client pipelining requests waits for its earlier calls
+                await in_flight.acquire()
+                try:
+                    request = await read_frame(reader, self.max_frame_size)
+                except BaseException:
+                    in_flight.release()
+                    raise
+                call = asyncio.create_task(self.__call(request, writer))
+                calls.add(call)
+                call.add_done_callback(_done)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except FrameError as e:
+            self.log.warn(f"closing connection: {e}")
+        finally:
+            # calls in flight, e.g. oneway ones, are still completed
+            writer.close()
+            del self.connections[connection]
+
+    async def __call(self, request: dict, writer: asyncio.StreamWriter):
+        request_id = request.get("id")
+        oneway = bool(request.get("oneway"))
+        loop = asyncio.get_running_loop()
+        try:
+            obj = self.objects.get(request.get("object", ""))
+            if obj is None:
+                raise DaemonError(f"unknown object: {request.get('object')}")
+            exposed = _get_exposed_members(obj)
+            method_name = request.get("method")
+            if method_name == METADATA_METHOD:
+                result: Any = {"oneway": sorted(exposed["oneway"])}
+            elif method_name in exposed["methods"]:
+                method = getattr(obj, method_name)
+                args = request.get("args", [])
+                result = await loop.run_in_executor(self.pool, partial(method, *args))
+            else:
+                raise AttributeError(f"method not exposed: {method_name}")
+            if oneway:
+                return
+            if isinstance(result, GeneratorType):
+                await self.__stream(request_id, result, writer)
+                return
+            await self.__send(writer, {"id": request_id, "result": result})
+        except Exception as e:
+            if oneway:
+                self.log.error(f"oneway call failed: {e}")
+                return
+            error = {
+                "id": request_id,
+                "error": str(e),
+                "type": type(e).__name__,
+                "module": type(e).__module__,
+            }
+            await self.__send(writer, error)
+
+    async def __stream(
+        self, request_id: Any, items: GeneratorType, writer: asyncio.StreamWriter
+    ):
+        """Sends the items one at a time, while the client is connected."""
+        loop = asyncio.get_running_loop()
+        end = object()
+        try:
+            while not writer.is_closing():
+                item = await loop.run_in_executor(self.pool, next, items, end)
+                if item is end:
+                    await self.__send(writer, {"id": request_id, "end": True})
+                    return
+                await self.__send(writer, {"id": request_id, "item": item})
+        finally:
+            items.close()
+
+    async def __send(self, writer: asyncio.StreamWriter, message: dict):
+        if writer.is_closing():
+            return
+        writer.write(encode_frame(message, self.max_frame_size))
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+class FrameMethod:
+    def __init__(self, proxy: "FrameProxy", name: str):
+        self.proxy = proxy
+        self.name = name
+
+    def __call__(self, *args):
+        return self.proxy._frameCall(self.name, args)
+
+
+class FrameProxy:
+    """FrameProxy calls the methods of an object served by a FrameServer
+    like a Pyro proxy does, e.g. invoke(proxy.get_tip). The attributes
+    used by pools, _pyroTimeout, _pyroClaimOwnership and _pyroRelease,
+    behave the same. A proxy is used by one thread at a time, and a
+    returned stream has to be consumed before the next call."""
+
+    def __init__(self, uri: str, max_frame_size: int = DEFAULT_FRAME_MAX_SIZE):
+        self._frameUri = URI(uri)
+        self._pyroTimeout: Optional[float] = None
+        self._frameMaxSize = max_frame_size
+        self._frameSocket: Optional[socket.socket] = None
+        self._frameOneway: Optional[set[str]] = None
+        self._frameIds = count()
+
+    def __getattr__(self, name: str) -> FrameMethod:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return FrameMethod(self, name)
+
+    def __enter__(self) -> "FrameProxy":
+        return self
+
+    def __exit__(self, *exc_info):
+        self._pyroRelease()
+
+    def _pyroClaimOwnership(self):
+        pass
+
+    def _pyroRelease(self):
+        if self._frameSocket is not None:
+            self._frameSocket.close()
+            self._frameSocket = None
+
+    def _frameCall(self, method_name: str, args: tuple) -> Any:
+        if self._frameOneway is None:
+            metadata = self._frameRequest(METADATA_METHOD, (), oneway=False)
+            self._frameOneway = set(metadata["oneway"])
+        oneway = method_name in self._frameOneway
+        return self._frameRequest(method_name, args, oneway)
+
+    def _frameRequest(self, method_name: str, args: tuple, oneway: bool) -> Any:
+        request_id = next(self._frameIds)
+        request = {
+            "id": request_id,
+            "object": self._frameUri.object,
+            "method": method_name,
+            "args": list(args),
+        }
+        if oneway:
+            request["oneway"] = True
+        self._frameSend(encode_frame(request, self._frameMaxSize))
+        if oneway:
+            return None
+        reply = self._frameReceive(request_id)
+        if "item" in reply or "end" in reply:
+            return self._frameStream(request_id, reply)
+        return reply.get("result")
+
+    def _frameStream(self, request_id: int, reply: dict) -> Iterator[Any]:
+        while "end" not in reply:
+            yield reply["item"]
+            reply = self._frameReceive(request_id)
+
+    def _frameConnect(self) -> socket.socket:
+        if self._frameSocket is None:
+            try:
+                self._frameSocket = socket.create_connection(
+                    (self._frameUri.host, self._frameUri.port), self._pyroTimeout
+                )
+            except OSError as e:
+                raise CommunicationError(f"cannot connect to {self._frameUri}: {e}")
+        self._frameSocket.settimeout(self._pyroTimeout)
+        return self._frameSocket
+
+    def _frameSend(self, frame: bytes):
+        try:
+            self._frameConnect().sendall(frame)
+        except socket.timeout:
+            self._pyroRelease()
+            raise PyroTimeoutError("send timed out")
+        except OSError as e:
+            self._pyroRelease()
+            raise CommunicationError(f"connection lost: {e}")
+
+    def _frameReceive(self, request_id: int) -> dict:
+        try:
+            header = self._frameReceiveExactly(FRAME_HEADER.size)
+            size = frame_size(header, self._frameMaxSize)
+            reply = decode_frame(self._frameReceiveExactly(size))
+        except socket.timeout:
+            self._pyroRelease()
+            raise PyroTimeoutError("receive timed out")
+        except OSError as e:
+            self._pyroRelease()
+            raise CommunicationError(f"connection lost: {e}")
+        except FrameError as e:
+            self._pyroRelease()
+            raise CommunicationError(f"broken frame: {e}")
+        if reply.get("id") != request_id:
+            # e.g. an item of a stream which was not consumed
+            self._pyroRelease()
+            raise CommunicationError(
+                f"reply to {reply.get('id')}, expected {request_id}"
+            )
+        if "error" in reply:
+            raise remote_error(reply)
+        return reply
+
+    def _frameReceiveExactly(self, size: int) -> bytes:
+        assert self._frameSocket is not None
+        chunks = bytearray()
+        while len(chunks) < size:
+            chunk = self._frameSocket.recv(size - len(chunks))
+            if not chunk:
+                raise ConnectionResetError("connection closed by the server")
+            chunks += chunk
+        return bytes(chunks)
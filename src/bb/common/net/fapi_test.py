@@ -0,0 +1,250 @@
+import socket
+import unittest
+from threading import Event, Lock, Thread
+from time import sleep
+
+from .fapi import (
+    FRAME_HEADER,
+    FrameError,
+    FrameProxy,
+    FrameServer,
+    encode_frame,
+    is_frame_uri,
+)
+from .papi import (
+    CommunicationError,
+    PyroTimeoutError,
+    expose,
+    invoke,
+    invoke_stream,
+    oneway,
+    proxy_of,
+)
+from .pool import ProxyPool
+
+
+class Custom(Exception):
+    pass
+
+
+class Echo:
+    def __init__(self):
+        self.received = Event()
+        self.lock = Lock()
+        self.active = 0
+        self.max_active = 0
+
+    @expose
+    def echo(self, s: str) -> str:
+        return s
+
+    @expose
+    def count(self, n: int):
+        yield from range(n)
+
+    @expose
+    def fail(self):
+        raise ValueError("test_error")
+
+    @expose
+    def fail_custom(self):
+        raise Custom("test_error")
+
+    @expose
+    def slow(self, seconds: float) -> float:
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        sleep(seconds)
+        with self.lock:
+            self.active -= 1
+        return seconds
+
+    @oneway
+    @expose
+    def notify(self):
+        self.received.set()
+
+    def hidden(self):
+        return "hidden"
+
+
+class TestFrameServer(unittest.TestCase):
+    def setUp(self):
+        self.echo = Echo()
+        self.server = FrameServer(max_in_flight=2)
+        self.uri = self.server.add(self.echo, "test.echo")
+        self.thread = Thread(target=self.server.start, daemon=True)
+        self.thread.start()
+        self.server.started.wait()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.pool.shutdown()
+
+    def test_call(self):
+        # given
+        proxy = proxy_of(self.uri)
+
+        # when
+        tested = invoke(proxy.echo, "zażółć")
+
+        # then
+        self.assertTrue(is_frame_uri(self.uri))
+        self.assertIsInstance(proxy, FrameProxy)
+        self.assertEqual(tested, "zażółć")
+        proxy._pyroRelease()
+
+    def test_bytes_passed_raw(self):
+        # given
+        proxy = proxy_of(self.uri)
+        payload = bytes(range(256))
+
+        # when
+        tested = invoke(proxy.echo, payload)
+
+        # then
+        self.assertEqual(tested, payload)
+        proxy._pyroRelease()
+
+    def test_oneway_call_not_awaited(self):
+        # given
+        proxy = proxy_of(self.uri)
+
+        # when
+        tested = invoke(proxy.notify)
+
+        # then
+        self.assertIsNone(tested)
+        self.assertTrue(self.echo.received.wait(timeout=5))
+        proxy._pyroRelease()
+
+    def test_stream(self):
+        # given
+        proxy = proxy_of(self.uri)
+
+        # when
+        tested = list(invoke_stream(proxy, "count", 5))
+
+        # then
+        self.assertEqual(tested, [0, 1, 2, 3, 4])
+        self.assertEqual(invoke(proxy.echo, "after"), "after")
+        proxy._pyroRelease()
+
+    def test_errors(self):
+        # given
+        proxy = proxy_of(self.uri)
+
+        for method_name, error_type in (
+            ("fail", ValueError),
+            ("fail_custom", FrameError),
+            ("hidden", AttributeError),
+            ("missing", AttributeError),
+        ):
+            with self.subTest(method_name=method_name):
+                # then
+                with self.assertRaisesRegex(error_type, "test_error|not exposed"):
+                    invoke(getattr(proxy, method_name))
+        self.assertEqual(invoke(proxy.echo, "after"), "after")
+        proxy._pyroRelease()
+
+    def test_unexpected_reply_breaks_connection(self):
+        # given
+        proxy = proxy_of(self.uri)
+        next(invoke(proxy.count, 5))
+
+        # then
+        with self.assertRaises(CommunicationError):
+            invoke(proxy.echo, "test")
+        self.assertEqual(invoke(proxy.echo, "after"), "after")
+        proxy._pyroRelease()
+
+    def test_pipelined_calls_limited(self):
+        # given
+        object_id = self.uri.split(":")[2].split("@")[0]
+        connection = socket.create_connection(("localhost", self.server.port))
+        requests = [
+            encode_frame(
+                {
+                    "id": i,
+                    "object": f"frame:{object_id}",
+                    "method": "slow",
+                    "args": [0.1],
+                }
+            )
+            for i in range(6)
+        ]
+
+        # when
+        connection.sendall(b"".join(requests))
+        replies = 0
+        buffer = b""
+        while replies < len(requests):
+            buffer += connection.recv(65536)
+            while len(buffer) >= FRAME_HEADER.size:
+                (size,) = FRAME_HEADER.unpack(buffer[: FRAME_HEADER.size])
+                if len(buffer) < FRAME_HEADER.size + size:
+                    break
+                buffer = buffer[FRAME_HEADER.size + size :]
+                replies += 1
+        connection.close()
+
+        # then
+        self.assertEqual(self.echo.max_active, 2)
+
+    def test_timeout(self):
+        # given
+        proxy = proxy_of(self.uri)
+        proxy._pyroTimeout = 0.05
+
+        # then
+        with self.assertRaises(PyroTimeoutError):
+            invoke(proxy.slow, 0.5)
+        self.assertEqual(invoke(proxy.echo, "after"), "after")
+        proxy._pyroRelease()
+
+    def test_many_connections(self):
+        # given
+        proxies = [proxy_of(self.uri) for _ in range(200)]
+
+        # when
+        tested = [invoke(proxy.echo, str(i)) for i, proxy in enumerate(proxies)]
+
+        # then
+        self.assertEqual(tested, [str(i) for i in range(200)])
+        for proxy in proxies:
+            proxy._pyroRelease()
+
+    def test_pooled(self):
+        # given
+        pool = ProxyPool()
+        with pool.proxy(self.uri) as first:
+            invoke(first.echo, "test")
+
+        # when
+        tested = pool.invoke(self.uri, "echo", "test")
+        with pool.proxy(self.uri) as second:
+            pass
+
+        # then
+        self.assertEqual(tested, "test")
+        self.assertIs(first, second)
+        pool.close()
+
+    def test_server_down(self):
+        # given
+        proxy = proxy_of(self.uri)
+        invoke(proxy.echo, "test")
+
+        # when
+        self.tearDown()
+
+        # then
+        with self.assertRaises(CommunicationError):
+            invoke(proxy.echo, "test")
+        self.setUp()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,24 @@
+from typing import Any, Iterator
+
+import serpent
 from Pyro5 import api
 from Pyro5.client import Proxy, _RemoteMethod, _StreamResultIterator
 from Pyro5.errors import CommunicationError
+from Pyro5.errors import TimeoutError as PyroTimeoutError
 from Pyro5.protocol import ReceivingMessage
 from Pyro5.server import Daemon as PDaemon
 from Pyro5.server import expose, oneway
 
+from bb.common.config import DEFAULT_PYRO_SERIALIZER
 from bb.common.log import Logger
 
-ProxyProperty = ReceivingMessage | _StreamResultIterator | _RemoteMethod | None
+from .fapi import FrameMethod, FrameProxy, is_frame_uri
+
+ProxyProperty = (
+    ReceivingMessage | _StreamResultIterator | _RemoteMethod | FrameMethod | None
+)
+AnyProxy = Proxy | FrameProxy
+"""a Pyro proxy, or a proxy of an object served by a fapi.FrameServer"""
 
 
 def locate_ns() -> Proxy:
@@ -17,12 +28,28 @@ def locate_ns() -> Proxy:
 def invoke(method: ProxyProperty, *args, **kwargs):
     """Runs the method on the remote pyro instance.
     Example usage: invoke(node.add_transaction, register_transaction.to_json())"""
-    if isinstance(method, _RemoteMethod):
+    if isinstance(method, (_RemoteMethod, FrameMethod)):
         return method(*args, **kwargs)
     else:
         raise TypeError(f"{method} could not be invoked, is it a field?")
 
 
+def invoke_stream(proxy: AnyProxy, method_name: str, *args, **kwargs) -> Iterator:
+    """Runs the remote generator method and yields its items.
+    Proxy ownership is claimed for every item, so the items can be consumed
+    from different threads, e.g. when the stream is passed on by a daemon.
+    Example usage: for block_json in invoke_stream(db, "get_range", 0, 10)"""
+    proxy._pyroClaimOwnership()
+    items = invoke(getattr(proxy, method_name), *args, **kwargs)
+    while True:
+        proxy._pyroClaimOwnership()
+        try:
+            item = next(items)
+        except StopIteration:
+            return
+        yield item
+
+
 def get_all_uris_as_dict(prefix: str) -> dict[str, str]:
     ns = locate_ns()
     return invoke(ns.list, prefix)
@@ -33,8 +60,23 @@ def get_all_uris(prefix: str) -> list[str]:
     return list(objs.values())
 
 
-def proxy_of(uri: str) -> Proxy:
-    return Proxy(uri)
+def proxy_of(uri: str) -> AnyProxy:
+    """Returns a proxy of the uri, for the transport the uri is served by."""
+    if is_frame_uri(uri):
+        return FrameProxy(uri)
+    proxy = Proxy(uri)
+    # a binary-capable serializer passes bytes payloads as they are
+    proxy._pyroSerializer = DEFAULT_PYRO_SERIALIZER
+    return proxy
+
+
+def received_bytes(value: Any) -> bytes:
+    """Returns a bytes argument or result as bytes. Serpent, the default
+    serializer of proxies not created by proxy_of, passes them as a dict
+    with their base64 encoding."""
+    if isinstance(value, bytes):
+        return value
+    return serpent.tobytes(value)
 
 
 class Daemon(PDaemon):
@@ -44,13 +86,15 @@ class Daemon(PDaemon):
         super().__init__()
         self.log = Logger(self)
 
-    def register(self, obj_or_class: object, ns_name: str):
-        """Register an object or class in daemon and nameserver."""
+    def register(self, obj_or_class: object, ns_name: str) -> str:
+        """Register an object or class in daemon and nameserver,
+        returns its uri."""
         ns = locate_ns()
         uri = super().register(obj_or_class)
         invoke(ns.register, ns_name, uri)
         self.log.debug(f"registered {ns_name} in ns")
         self.registered_names.append(ns_name)
+        return str(uri)
 
     def shutdown_with_ns_cleanup(self):
         self.log.info("shutting down...")
@@ -74,3 +118,4 @@ expose
 oneway
 Proxy
 CommunicationError
+PyroTimeoutError
@@ -0,0 +1,128 @@
+from contextlib import contextmanager
+from threading import Lock
+from time import monotonic
+from typing import Callable, Iterator, Optional
+
+from bb.common.config import DEFAULT_MEMBERSHIP_TTL, DEFAULT_PROXY_POOL_SIZE
+
+from .papi import AnyProxy, CommunicationError, PyroTimeoutError, invoke, proxy_of
+
+
+class ProxyPool:
+    """ProxyPool keeps connected proxies for reuse, up to max_idle for
+    each uri, so a call does not pay for a new connection and handshake.
+    Uris served by a frame server are pooled the same way, see fapi.
+    A proxy is lent to one thread at a time. With a timeout, calls of the
+    proxies raise PyroTimeoutError after that many seconds."""
+
+    def __init__(
+        self,
+        max_idle: int = DEFAULT_PROXY_POOL_SIZE,
+        timeout: Optional[float] = None,
+    ):
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.idle: dict[str, list[AnyProxy]] = {}
+        self.lock = Lock()
+
+    def __acquire(self, uri: str) -> tuple[AnyProxy, bool]:
+        with self.lock:
+            idle = self.idle.get(uri)
+            proxy = idle.pop() if idle else None
+        if proxy is None:
+            return self.__connect(uri), False
+        proxy._pyroClaimOwnership()
+        return proxy, True
+
+    def __connect(self, uri: str) -> AnyProxy:
+        proxy = proxy_of(uri)
+        if self.timeout is not None:
+            proxy._pyroTimeout = self.timeout
+        return proxy
+
+    def __release(self, uri: str, proxy: AnyProxy):
+        with self.lock:
+            idle = self.idle.setdefault(uri, [])
+            if len(idle) < self.max_idle:
+                idle.append(proxy)
+                return
+        proxy._pyroRelease()
+
+    @contextmanager
+    def proxy(self, uri: str) -> Iterator[AnyProxy]:
+        """Lends a proxy of the uri. It is returned to the pool only if it
+        was used without errors, otherwise its connection is closed."""
+        proxy, _ = self.__acquire(uri)
+        with self.__lent(uri, proxy):
+            yield proxy
+
+    @contextmanager
+    def __lent(self, uri: str, proxy: AnyProxy):
+        try:
+            yield
+        except BaseException:
+            proxy._pyroRelease()
+            raise
+        self.__release(uri, proxy)
+
+    def invoke(self, uri: str, method_name: str, *args, **kwargs):
+        """Invokes the method with a pooled proxy. If the connection of a
+        reused proxy turns out to be broken, the call is retried once with
+        a new connection; timed out calls are not retried."""
+        proxy, reused = self.__acquire(uri)
+        try:
+            with self.__lent(uri, proxy):
+                return invoke(getattr(proxy, method_name), *args, **kwargs)
+        except PyroTimeoutError:
+            raise
+        except CommunicationError:
+            if not reused:
+                raise
+        proxy = self.__connect(uri)
+        with self.__lent(uri, proxy):
+            return invoke(getattr(proxy, method_name), *args, **kwargs)
+
+    def discard(self, uri: str):
+        """Closes the idle proxies of the uri."""
+        with self.lock:
+            idle = self.idle.pop(uri, [])
+        for proxy in idle:
+            proxy._pyroClaimOwnership()
+            proxy._pyroRelease()
+
+    def close(self):
+        with self.lock:
+            uris = list(self.idle)
+        for uri in uris:
+            self.discard(uri)
+
+
+class Membership:
+    """Membership caches the uris returned by lookup, usually a nameserver
+    listing, for ttl seconds. It is refreshed early if invalidated, e.g.
+    after a member turned out to be unreachable."""
+
+    def __init__(
+        self, lookup: Callable[[], list[str]], ttl: float = DEFAULT_MEMBERSHIP_TTL
+    ):
+        self.lookup = lookup
+        self.ttl = ttl
+        self.members: list[str] = []
+        self.expires: Optional[float] = None
+        self.lock = Lock()
+
+    def uris(self) -> list[str]:
+        with self.lock:
+            if self.expires is None or monotonic() >= self.expires:
+                self.members = self.lookup()
+                self.expires = monotonic() + self.ttl
+            return list(self.members)
+
+    def discard(self, uri: str):
+        with self.lock:
+            if uri in self.members:
+                self.members.remove(uri)
+
+    def invalidate(self):
+        with self.lock:
+            self.expires = None
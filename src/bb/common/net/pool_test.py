@@ -0,0 +1,124 @@
+import unittest
+from threading import Thread
+
+from Pyro5.server import Daemon
+
+from .papi import CommunicationError, Proxy, expose, invoke, proxy_of, received_bytes
+from .pool import Membership, ProxyPool
+
+
+@expose
+class Echo:
+    def echo(self, s: str) -> str:
+        return s
+
+
+class TestProxyPool(unittest.TestCase):
+    def setUp(self):
+        self.start_daemon()
+
+    def tearDown(self):
+        self.stop_daemon()
+
+    def start_daemon(self, port: int = 0):
+        self.daemon = Daemon(port=port)
+        self.uri = str(self.daemon.register(Echo, "test.echo"))
+        self.thread = Thread(target=self.daemon.requestLoop, daemon=True)
+        self.thread.start()
+
+    def stop_daemon(self):
+        self.daemon.shutdown()
+        self.thread.join()
+
+    def test_proxy_reused(self):
+        # given
+        pool = ProxyPool()
+
+        # when
+        with pool.proxy(self.uri) as first:
+            invoke(first.echo, "test")
+        with pool.proxy(self.uri) as second:
+            tested = invoke(second.echo, "test")
+
+        # then
+        self.assertEqual(tested, "test")
+        self.assertIs(first, second)
+        pool.close()
+
+    def test_broken_proxy_not_reused(self):
+        # given
+        pool = ProxyPool()
+
+        # when
+        with self.assertRaises(ValueError):
+            with pool.proxy(self.uri) as first:
+                raise ValueError("test")
+        with pool.proxy(self.uri) as second:
+            pass
+
+        # then
+        self.assertIsNot(first, second)
+        pool.close()
+
+    def test_bytes_passed_raw(self):
+        # given
+        payload = bytes(range(256))
+        serpent_proxy = Proxy(self.uri)
+
+        # when
+        tested = invoke(proxy_of(self.uri).echo, payload)
+        serpent_tested = invoke(serpent_proxy.echo, payload)
+
+        # then
+        self.assertEqual(tested, payload)
+        self.assertNotIsInstance(serpent_tested, bytes)
+        self.assertEqual(received_bytes(serpent_tested), payload)
+
+    def test_invoke_reconnects(self):
+        # given
+        pool = ProxyPool()
+        pool.invoke(self.uri, "echo", "test")
+        port = self.daemon.locationStr.rsplit(":", 1)[1]
+        self.stop_daemon()
+        self.start_daemon(int(port))
+
+        # when
+        tested = pool.invoke(self.uri, "echo", "test")
+
+        # then
+        self.assertEqual(tested, "test")
+        pool.close()
+
+    def test_invoke_unreachable(self):
+        # given
+        pool = ProxyPool()
+        uri = self.uri
+        self.stop_daemon()
+        self.start_daemon()
+
+        # then
+        with self.assertRaises(CommunicationError):
+            pool.invoke(uri, "echo", "test")
+
+
+class TestMembership(unittest.TestCase):
+    def test_cached_until_invalidated(self):
+        # given
+        lookups = [["test_uri"], ["test_uri", "other_uri"]]
+        membership = Membership(lambda: lookups.pop(0), ttl=60)
+
+        # when
+        cached = [membership.uris(), membership.uris()]
+        membership.discard("test_uri")
+        discarded = membership.uris()
+        membership.invalidate()
+        refreshed = membership.uris()
+
+        # then
+        self.assertEqual(cached, [["test_uri"], ["test_uri"]])
+        self.assertEqual(discarded, [])
+        self.assertEqual(refreshed, ["test_uri", "other_uri"])
+
+
+if __name__ == "__main__":
+    unittest.main()
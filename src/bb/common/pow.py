@@ -0,0 +1,97 @@
+import hashlib
+from typing import Callable, Optional
+
+from bb.common.config import DEFAULT_DIFFICULTY, DEFAULT_ENCODING, DEFAULT_HASH
+
+DIGEST_SIZE = DEFAULT_HASH.digest_size
+
+
+def difficulty_target(difficulty: int = DEFAULT_DIFFICULTY) -> bytes:
+    """Highest digest (inclusive) that has `difficulty` leading hex zeros."""
+    target = (1 << (4 * (2 * DIGEST_SIZE - difficulty))) - 1
+    return target_bytes(target)
+
+
+def target_bytes(target: int) -> bytes:
+    return target.to_bytes(DIGEST_SIZE, "big")
+
+
+DEFAULT_TARGET = int.from_bytes(difficulty_target(), "big")
+MAX_TARGET = int.from_bytes(difficulty_target(1), "big")
+"""easiest target a block may have"""
+MAX_RETARGET_FACTOR = 4
+"""the target changes by at most this factor in one retargeting"""
+
+
+def retarget(target: int, actual_time: int, expected_time: int) -> int:
+    """Scales the target by the ratio of the time the last blocks took to
+    the time they were expected to take, so a faster network gets a lower,
+    harder target. Integer arithmetic keeps the result the same on every
+    node; the times just have to be in the same unit."""
+    actual_time = max(actual_time, expected_time // MAX_RETARGET_FACTOR, 1)
+    actual_time = min(actual_time, expected_time * MAX_RETARGET_FACTOR)
+    return max(min(target * actual_time // expected_time, MAX_TARGET), 1)
+
+
+def ascii_nonce(nonce: int) -> bytes:
+    """nonce encoding used by blocks serialized as JSON"""
+    return str(nonce).encode(DEFAULT_ENCODING)
+
+
+def u64_nonce(nonce: int) -> bytes:
+    """nonce encoding used by fixed-size block headers"""
+    return nonce.to_bytes(8, "big")
+
+
+class ProofOfWork:
+    """Proof of work search over a message of form `prefix + nonce + suffix`.
+
+    The hash state of the invariant prefix is computed once, so each attempt
+    only hashes the nonce and the suffix. Digests are compared as raw bytes
+    against the target, see target_bytes, instead of being hex-encoded."""
+
+    def __init__(
+        self,
+        prefix: bytes,
+        suffix: bytes,
+        target: bytes = difficulty_target(),
+        encode_nonce: Callable[[int], bytes] = ascii_nonce,
+    ):
+        self.prefix = prefix
+        self.prefix_state = hashlib.new(DEFAULT_HASH.name, prefix)
+        self.suffix = suffix
+        self.target = target
+        self.encode_nonce = encode_nonce
+
+    def __reduce__(self):
+        # hash states cannot be pickled, so worker processes rebuild them
+        return (
+            ProofOfWork,
+            (self.prefix, self.suffix, self.target, self.encode_nonce),
+        )
+
+    def digest(self, nonce: int) -> bytes:
+        state = self.prefix_state.copy()
+        state.update(self.encode_nonce(nonce) + self.suffix)
+        return state.digest()
+
+    def check(self, nonce: int) -> bool:
+        return self.digest(nonce) <= self.target
+
+    def search(
+        self, start: int = 0, step: int = 1, stop: Optional[int] = None
+    ) -> Optional[int]:
+        """Returns the first nonce in range(start, stop, step) satisfying the
+        target, or None if the range is exhausted."""
+        copy_state = self.prefix_state.copy
+        encode_nonce = self.encode_nonce
+        suffix = self.suffix
+        target = self.target
+        nonce = start
+        while stop is None or nonce < stop:
+            state = copy_state()
+            state.update(encode_nonce(nonce) + suffix)
+            if state.digest() <= target:
+                return nonce
+            nonce += step
+        return None
@@ -8,13 +8,18 @@ from cryptography.hazmat.primitives.serialization import (
 
 from bb.common.config import DEFAULT_HASH, DEFAULT_RSA_PUBLIC_EXPONENT
 
-from .encode import base64_str_to_bytes, bytes_to_base64_str, str_to_bytes
-
+from .encode import (
+    base64_str_to_bytes,
+    bytes_to_base64_str,
+    signature_base64_to_bytes,
+    str_to_bytes,
+)
 
-def __pss_padding():
-    return padding.PSS(
-        mgf=padding.MGF1(DEFAULT_HASH()), salt_length=padding.PSS.MAX_LENGTH
-    )
+__HASH = DEFAULT_HASH()
+__PSS_PADDING = padding.PSS(
+    mgf=padding.MGF1(__HASH), salt_length=padding.PSS.MAX_LENGTH
+)
+"""padding and hash parameters are immutable, so they are shared by all calls"""
 
 
 def generate_private_key() -> rsa.RSAPrivateKey:
@@ -23,7 +28,7 @@ def generate_private_key() -> rsa.RSAPrivateKey:
 
 def sign_rsa_base64(message: str, private_key: rsa.RSAPrivateKey) -> str:
     message_bytes = str_to_bytes(message)
-    signed_bytes = private_key.sign(message_bytes, __pss_padding(), DEFAULT_HASH())
+    signed_bytes = private_key.sign(message_bytes, __PSS_PADDING, __HASH)
 
     return bytes_to_base64_str(signed_bytes)
 
@@ -32,13 +37,11 @@ def verify_rsa(
     message: str, signature_base64: str, public_key: rsa.RSAPublicKey
 ) -> bool:
     verified = True
-    signature_bytes = base64_str_to_bytes(signature_base64)
     message_bytes = str_to_bytes(message)
     try:
-        public_key.verify(
-            signature_bytes, message_bytes, __pss_padding(), DEFAULT_HASH()
-        )
-    except InvalidSignature:
+        signature_bytes = signature_base64_to_bytes(signature_base64)
+        public_key.verify(signature_bytes, message_bytes, __PSS_PADDING, __HASH)
+    except (InvalidSignature, ValueError):
         verified = False
 
     return verified
@@ -0,0 +1,79 @@
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+from typing import Generic, Hashable, Optional, TypeVar
+
+from bb.common.config import (
+    DEFAULT_PUBLIC_KEY_CACHE_SIZE,
+    DEFAULT_VERIFICATION_CACHE_SIZE,
+)
+
+from .encode import str_to_bytes
+from .hash import hash_bytes
+from .scheme import (
+    PublicKey,
+    decode_any_public_key,
+    public_key_to_der,
+    verify_signature,
+)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Thread-safe mapping bounded to maxsize entries,
+    evicting the least recently used one first."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries: OrderedDict[K, V] = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key: K) -> Optional[V]:
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key: K, value: V):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+__verified = LRUCache[tuple[bytes, str, bytes], bool](DEFAULT_VERIFICATION_CACHE_SIZE)
+"""results of signature verifications, keyed by
+(message digest, signature, DER encoded public key)"""
+
+
+@lru_cache(maxsize=DEFAULT_PUBLIC_KEY_CACHE_SIZE)
+def decode_public_key_cached(public_key_base64: str) -> PublicKey:
+    """Same as decode_any_public_key, but returns the same key object for
+    the same encoded key, without decoding it again."""
+    return decode_any_public_key(public_key_base64)
+
+
+def public_key_id(public_key: PublicKey) -> bytes:
+    return public_key_to_der(public_key)
+
+
+def verify_cached(message: str, signature_base64: str, public_key: PublicKey) -> bool:
+    """Same as verify_signature, but remembers the results, so a message
+    delivered multiple times is verified only once."""
+    key = (
+        hash_bytes(str_to_bytes(message)),
+        signature_base64,
+        public_key_id(public_key),
+    )
+    verified = __verified.get(key)
+    if verified is None:
+        verified = verify_signature(message, signature_base64, public_key)
+        __verified.put(key, verified)
+    return verified
@@ -0,0 +1,56 @@
+import unittest
+
+from .asymmetric import encode_public_key, generate_private_key, sign_rsa_base64
+from .cache import LRUCache, decode_public_key_cached, verify_cached
+
+
+class TestCache(unittest.TestCase):
+    def test_lru_cache_evicts_least_recently_used(self):
+        # given
+        cache = LRUCache[str, int](2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+
+        # when
+        cache.put("c", 3)
+
+        # then
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(len(cache), 2)
+
+    def test_decode_public_key_cached(self):
+        # given
+        encoded_pk = encode_public_key(generate_private_key().public_key())
+
+        # when
+        tested = decode_public_key_cached(encoded_pk)
+
+        # then
+        self.assertIs(decode_public_key_cached(encoded_pk), tested)
+        self.assertEqual(encode_public_key(tested), encoded_pk)
+
+    def test_verify_cached(self):
+        # given
+        private_key = generate_private_key()
+        other_public_key = generate_private_key().public_key()
+        signature = sign_rsa_base64("test_message", private_key)
+
+        for _ in range(2):
+            # when
+            verified = verify_cached(
+                "test_message", signature, private_key.public_key()
+            )
+            verified_other_key = verify_cached(
+                "test_message", signature, other_public_key
+            )
+
+            # then
+            self.assertTrue(verified)
+            self.assertFalse(verified_other_key)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -25,3 +25,14 @@ def bytes_to_base64_str(b: bytes) -> str:
 
 def base64_str_to_bytes(b64: str) -> bytes:
     return base64.b64decode(b64)
+
+
+def signature_base64_to_bytes(b64: str) -> bytes:
+    """Same as base64_str_to_bytes, but only for the one canonical encoding
+    of the bytes, raises ValueError otherwise. Lenient decoding would let
+    anyone change a valid fingerprint, e.g. by appending a newline, and so
+    the id of a signed transaction, which has to be fixed by its signer."""
+    signature = base64.b64decode(b64, validate=True)
+    if bytes_to_base64_str(signature) != b64:
+        raise ValueError("signature not in canonical base64")
+    return signature
@@ -1,3 +1,5 @@
+import hashlib
+
 from cryptography.hazmat.primitives.hashes import Hash
 
 from bb.common.config import DEFAULT_ENCODING, DEFAULT_HASH
@@ -14,6 +16,10 @@ def hash_hex(str_to_hash: str):
     return bytes_to_hex(hash_bytes)
 
 
+def hash_bytes(bytes_to_hash: bytes) -> bytes:
+    return hashlib.new(DEFAULT_HASH.name, bytes_to_hash).digest()
+
+
 # re-export
 DEFAULT_HASH
 Hash
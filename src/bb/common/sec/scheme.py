@@ -0,0 +1,147 @@
+from abc import ABC, abstractmethod
+from typing import Literal
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    PublicFormat,
+    load_der_public_key,
+    load_pem_public_key,
+)
+
+from .asymmetric import generate_private_key, sign_rsa_base64, verify_rsa
+from .encode import (
+    base64_str_to_bytes,
+    bytes_to_base64_str,
+    signature_base64_to_bytes,
+    str_to_bytes,
+)
+
+SchemeName = Literal["rsa", "ed25519"]
+PrivateKey = rsa.RSAPrivateKey | ed25519.Ed25519PrivateKey
+PublicKey = rsa.RSAPublicKey | ed25519.Ed25519PublicKey
+
+SCHEME_NAMES: tuple[SchemeName, ...] = ("rsa", "ed25519")
+"""binary codes of signature schemes, by position"""
+LEGACY_SCHEME: SchemeName = "rsa"
+"""scheme of transactions which do not state their scheme"""
+
+
+class SignatureScheme(ABC):
+    name: SchemeName
+    private_key_type: type
+    public_key_type: type
+
+    @abstractmethod
+    def generate_private_key(self) -> PrivateKey: ...
+
+    @abstractmethod
+    def sign_base64(self, message: str, private_key) -> str: ...
+
+    @abstractmethod
+    def verify(self, message: str, signature_base64: str, public_key) -> bool: ...
+
+
+class RSAScheme(SignatureScheme):
+    """RSA-1024 with PSS padding"""
+
+    name = "rsa"
+    private_key_type = rsa.RSAPrivateKey
+    public_key_type = rsa.RSAPublicKey
+
+    def generate_private_key(self) -> rsa.RSAPrivateKey:
+        return generate_private_key()
+
+    def sign_base64(self, message: str, private_key: rsa.RSAPrivateKey) -> str:
+        return sign_rsa_base64(message, private_key)
+
+    def verify(
+        self, message: str, signature_base64: str, public_key: rsa.RSAPublicKey
+    ) -> bool:
+        return verify_rsa(message, signature_base64, public_key)
+
+
+class Ed25519Scheme(SignatureScheme):
+    """Ed25519, with much cheaper key generation and signing than RSA,
+    and 64 byte signatures"""
+
+    name = "ed25519"
+    private_key_type = ed25519.Ed25519PrivateKey
+    public_key_type = ed25519.Ed25519PublicKey
+
+    def generate_private_key(self) -> ed25519.Ed25519PrivateKey:
+        return ed25519.Ed25519PrivateKey.generate()
+
+    def sign_base64(self, message: str, private_key: ed25519.Ed25519PrivateKey) -> str:
+        return bytes_to_base64_str(private_key.sign(str_to_bytes(message)))
+
+    def verify(
+        self,
+        message: str,
+        signature_base64: str,
+        public_key: ed25519.Ed25519PublicKey,
+    ) -> bool:
+        try:
+            public_key.verify(
+                signature_base64_to_bytes(signature_base64), str_to_bytes(message)
+            )
+        except (InvalidSignature, ValueError):
+            return False
+        return True
+
+
+SCHEMES: dict[str, SignatureScheme] = {
+    scheme.name: scheme for scheme in (RSAScheme(), Ed25519Scheme())
+}
+
+
+def get_scheme(name: str) -> SignatureScheme:
+    if name not in SCHEMES:
+        raise ValueError(f"unsupported signature scheme: {name}")
+    return SCHEMES[name]
+
+
+def scheme_of(key: PrivateKey | PublicKey) -> SignatureScheme:
+    for scheme in SCHEMES.values():
+        if isinstance(key, (scheme.private_key_type, scheme.public_key_type)):
+            return scheme
+    raise ValueError(f"unsupported key type: {type(key).__name__}")
+
+
+def generate_signing_key(scheme_name: str) -> PrivateKey:
+    return get_scheme(scheme_name).generate_private_key()
+
+
+def sign_base64(message: str, private_key: PrivateKey) -> str:
+    return scheme_of(private_key).sign_base64(message, private_key)
+
+
+def verify_signature(
+    message: str, signature_base64: str, public_key: PublicKey
+) -> bool:
+    return scheme_of(public_key).verify(message, signature_base64, public_key)
+
+
+def encode_any_public_key(public_key: PublicKey) -> str:
+    pk_bytes = public_key.public_bytes(Encoding.PEM, PublicFormat.SubjectPublicKeyInfo)
+    return bytes_to_base64_str(pk_bytes)
+
+
+def decode_any_public_key(public_key_base64: str) -> PublicKey:
+    """Decodes a public key of any supported scheme,
+    raises ValueError for other key types."""
+    key = load_pem_public_key(base64_str_to_bytes(public_key_base64))
+    scheme_of(key)  # type: ignore (checked here)
+    return key  # type: ignore (checked above)
+
+
+def public_key_to_der(public_key: PublicKey) -> bytes:
+    return public_key.public_bytes(Encoding.DER, PublicFormat.SubjectPublicKeyInfo)
+
+
+def public_key_from_der(public_key_der: bytes) -> PublicKey:
+    """Same as decode_any_public_key, for DER encoded keys."""
+    key = load_der_public_key(public_key_der)
+    scheme_of(key)  # type: ignore (checked here)
+    return key  # type: ignore (checked above)
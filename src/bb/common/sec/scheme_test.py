@@ -0,0 +1,77 @@
+import unittest
+
+from .scheme import (
+    SCHEMES,
+    decode_any_public_key,
+    encode_any_public_key,
+    generate_signing_key,
+    scheme_of,
+    sign_base64,
+    verify_signature,
+)
+
+
+class TestScheme(unittest.TestCase):
+    def test_sign_and_verify(self):
+        for scheme_name in SCHEMES:
+            with self.subTest(scheme=scheme_name):
+                # given
+                private_key = generate_signing_key(scheme_name)
+                other_public_key = generate_signing_key(scheme_name).public_key()
+
+                # when
+                signature = sign_base64("test_message", private_key)
+
+                # then
+                self.assertEqual(scheme_of(private_key).name, scheme_name)
+                self.assertTrue(
+                    verify_signature(
+                        "test_message", signature, private_key.public_key()
+                    )
+                )
+                self.assertFalse(
+                    verify_signature(
+                        "other_message", signature, private_key.public_key()
+                    )
+                )
+                self.assertFalse(
+                    verify_signature("test_message", signature, other_public_key)
+                )
+
+    def test_only_canonical_signature_verified(self):
+        for scheme_name in SCHEMES:
+            with self.subTest(scheme=scheme_name):
+                # given
+                private_key = generate_signing_key(scheme_name)
+                signature = sign_base64("test_message", private_key)
+
+                # when
+                tested = [
+                    verify_signature("test_message", s, private_key.public_key())
+                    for s in (signature + "\n", "!" + signature, signature[:-1])
+                ]
+
+                # then
+                self.assertEqual(tested, [False, False, False])
+
+    def test_encode_and_decode_public_key(self):
+        for scheme_name in SCHEMES:
+            with self.subTest(scheme=scheme_name):
+                # given
+                public_key = generate_signing_key(scheme_name).public_key()
+                encoded_pk = encode_any_public_key(public_key)
+
+                # when
+                tested = decode_any_public_key(encoded_pk)
+
+                # then
+                self.assertEqual(scheme_of(tested).name, scheme_name)
+                self.assertEqual(encode_any_public_key(tested), encoded_pk)
+
+    def test_unsupported_scheme(self):
+        with self.assertRaises(ValueError):
+            generate_signing_key("test_scheme")
+
+
+if __name__ == "__main__":
+    unittest.main()
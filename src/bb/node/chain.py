@@ -0,0 +1,55 @@
+from typing import Iterator, Optional
+
+from bb.common.block import Block
+
+
+class Chain:
+    """Chain keeps the blocks accepted by the node, keyed by block index,
+    with the tip and its hash cached, so no operation depends on the
+    length of the chain."""
+
+    def __init__(self):
+        self.blocks: dict[int, Block] = {}
+        self.indexes_by_hash: dict[str, int] = {}
+        self.first_index: Optional[int] = None
+        self.tip: Optional[Block] = None
+        self.tip_hash = ""
+
+    def append(self, block: Block) -> bool:
+        """Returns False, without adding the block, if a block with the
+        same index is already in the chain."""
+        if block.index in self.blocks:
+            return False
+        self.blocks[block.index] = block
+        self.indexes_by_hash[block.hash()] = block.index
+        if self.first_index is None or block.index < self.first_index:
+            self.first_index = block.index
+        if self.tip is None or block.index > self.tip.index:
+            self.tip = block
+            self.tip_hash = block.hash()
+        return True
+
+    def get(self, index: int) -> Optional[Block]:
+        return self.blocks.get(index)
+
+    def get_by_hash(self, hash: str) -> Optional[Block]:
+        index = self.indexes_by_hash.get(hash)
+        return self.blocks[index] if index is not None else None
+
+    def range(self, start: int, end: int) -> Iterator[Block]:
+        """Yields the blocks with indexes from start up to end (exclusive)
+        which are in the chain."""
+        end = min(end, self.next_index())
+        return (self.blocks[i] for i in range(start, end) if i in self.blocks)
+
+    def next_index(self) -> int:
+        return self.tip.index + 1 if self.tip is not None else 0
+
+    def __contains__(self, index: int) -> bool:
+        return index in self.blocks
+
+    def __len__(self) -> int:
+        return len(self.blocks)
+
+    def __iter__(self) -> Iterator[Block]:
+        return (self.blocks[index] for index in sorted(self.blocks))
@@ -0,0 +1,52 @@
+import unittest
+
+from bb.common.block import Block
+
+from .chain import Chain
+
+
+class TestChain(unittest.TestCase):
+    def test_append(self):
+        # given
+        chain = Chain()
+        genesis = Block(index=0)
+        block = Block(index=1, prev_hash=genesis.hash())
+
+        # when
+        appended = [chain.append(genesis), chain.append(block)]
+        duplicate_appended = chain.append(Block(index=1))
+
+        # then
+        self.assertEqual(appended, [True, True])
+        self.assertFalse(duplicate_appended)
+        self.assertIs(chain.get(1), block)
+        self.assertEqual(chain.tip_hash, block.hash())
+        self.assertEqual(chain.next_index(), 2)
+        self.assertEqual(list(chain), [genesis, block])
+
+    def test_lookup(self):
+        # given
+        chain = Chain()
+        blocks = [Block(index=i) for i in range(2, 6)]
+        for block in blocks:
+            chain.append(block)
+
+        # then
+        self.assertEqual(chain.first_index, 2)
+        self.assertIs(chain.get_by_hash(blocks[1].hash()), blocks[1])
+        self.assertIsNone(chain.get_by_hash("test_hash"))
+        self.assertEqual(list(chain.range(0, 4)), blocks[:2])
+        self.assertEqual(list(chain.range(4, 100)), blocks[2:])
+
+    def test_empty(self):
+        # given
+        chain = Chain()
+
+        # then
+        self.assertEqual(chain.next_index(), 0)
+        self.assertEqual(chain.tip_hash, "")
+        self.assertNotIn(0, chain)
+
+
+if __name__ == "__main__":
+    unittest.main()
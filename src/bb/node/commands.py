@@ -0,0 +1,81 @@
+from concurrent.futures import Future
+from queue import Queue
+from threading import Thread, get_ident
+from typing import Any, Callable, Optional, TypeVar
+
+from bb.common.log import Logger
+
+T = TypeVar("T")
+
+Command = tuple["Future[Any]", Callable[..., Any], tuple]
+
+
+class CommandLoop:
+    """CommandLoop is the single writer of a state. Commands are applied one
+    at a time on its thread, in the order they were submitted, so they never
+    race each other and need no locks. After each command, published is
+    called on the same thread, e.g. to publish an immutable view of the new
+    state for readers on other threads."""
+
+    def __init__(self, published: Callable[[], None] = lambda: None):
+        self.log = Logger(self)
+        self.published = published
+        self.que: Queue[Optional[Command]] = Queue()
+        self.thread = Thread(target=self.__run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def submit(self, command: Callable[..., T], *args) -> "Future[T]":
+        future: Future[T] = Future()
+        self.que.put((future, command, args))
+        return future
+
+    def post(self, command: Callable[..., Any], *args):
+        """Submits the command without waiting for it, its errors are logged."""
+        self.submit(command, *args).add_done_callback(self.__log_error)
+
+    def call(self, command: Callable[..., T], *args) -> T:
+        """Applies the command and returns its result or raises its error.
+        A command calling another one from the loop applies it inline."""
+        if get_ident() == self.thread.ident:
+            return command(*args)
+        return self.submit(command, *args).result()
+
+    def flush(self):
+        """Blocks until the commands submitted so far are applied."""
+        self.call(lambda: None)
+
+    def shutdown(self):
+        """Applies the commands submitted so far and stops the loop."""
+        if self.thread.is_alive():
+            self.que.put(None)
+            self.thread.join()
+
+    def __run(self):
+        while True:
+            item = self.que.get()
+            if item is None:
+                return
+            future, command, args = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = command(*args)
+            except BaseException as e:
+                # e.g. SystemExit, which would otherwise end the loop
+                self.__publish()
+                future.set_exception(e)
+                continue
+            self.__publish()
+            future.set_result(result)
+
+    def __publish(self):
+        try:
+            self.published()
+        except Exception as e:
+            self.log.error(f"could not publish state: {e}")
+
+    def __log_error(self, future: "Future[Any]"):
+        if future.exception() is not None:
+            self.log.error(f"command failed: {future.exception()}")
@@ -0,0 +1,79 @@
+import unittest
+from threading import Thread, current_thread
+
+from .commands import CommandLoop
+
+
+class TestCommandLoop(unittest.TestCase):
+    def setUp(self):
+        self.published = []
+        self.loop = CommandLoop(lambda: self.published.append(len(self.applied)))
+        self.applied = []
+        self.loop.start()
+
+    def tearDown(self):
+        self.loop.shutdown()
+
+    def test_commands_applied_in_order_on_one_thread(self):
+        # given
+        threads = set()
+
+        def _apply(i):
+            threads.add(current_thread())
+            self.applied.append(i)
+
+        # when
+        submitters = [
+            Thread(target=lambda: [self.loop.post(_apply, i) for i in range(100)])
+            for _ in range(4)
+        ]
+        for submitter in submitters:
+            submitter.start()
+        for submitter in submitters:
+            submitter.join()
+        self.loop.flush()
+
+        # then
+        self.assertEqual(len(self.applied), 400)
+        self.assertEqual(threads, {self.loop.thread})
+        self.assertEqual(self.published[:400], list(range(1, 401)))
+
+    def test_call_returns_result_or_raises(self):
+        # when
+        tested = self.loop.call(lambda a, b: a + b, 1, 2)
+
+        # then
+        self.assertEqual(tested, 3)
+        with self.assertRaises(ZeroDivisionError):
+            self.loop.call(lambda: 1 / 0)
+
+    def test_loop_survives_system_exit(self):
+        # when
+        future = self.loop.submit(exit, 127)
+
+        # then
+        with self.assertRaises(SystemExit):
+            future.result(timeout=5)
+        self.assertEqual(self.loop.call(lambda: "after"), "after")
+
+    def test_nested_call_applied_inline(self):
+        # when
+        tested = self.loop.call(lambda: self.loop.call(lambda: "nested"))
+
+        # then
+        self.assertEqual(tested, "nested")
+
+    def test_shutdown_applies_submitted_commands(self):
+        # given
+        future = self.loop.submit(self.applied.append, "last")
+
+        # when
+        self.loop.shutdown()
+
+        # then
+        self.assertTrue(future.done())
+        self.assertEqual(self.applied, ["last"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,17 +1,71 @@
-from bb.common.block import Block
-from bb.common.net.papi import expose, oneway
+from typing import Callable, Iterator, Optional, TypeVar
+
+from bb.common.block import Block, Transaction
+from bb.common.codec import DecodeError
+from bb.common.log import Logger
+from bb.common.net.papi import expose, invoke_stream, oneway, received_bytes
+from bb.node.gossip import GossipCoalescer
 from bb.node.network import Network, Node
 
+T = TypeVar("T")
+
 
 class Endpoint:
+    """Endpoint serves the clients. Every method taking or returning
+    transactions or blocks as JSON has a *_bytes variant for their binary
+    encoding, see bb.common.codec; transactions are gossiped to the nodes
+    in the binary encoding either way."""
+
     def __init__(self, network: Network, node: Node):
+        self.log = Logger(self)
         self.network = network
         self.node = node
+        self.gossip = GossipCoalescer(
+            lambda batch: self.network.broadcast("add_transactions_bytes", batch)
+        )
 
     @oneway
     @expose
     def upload_transaction(self, transaction_json: str):
-        self.network.broadcast("add_transaction", transaction_json)
+        """upload_transaction gossips the transaction to all the nodes,
+        coalesced with other ones uploaded shortly before or after it"""
+        self.__submit_json(transaction_json)
+
+    @oneway
+    @expose
+    def upload_transactions(self, transaction_jsons: list[str]):
+        for transaction_json in transaction_jsons:
+            self.__submit_json(transaction_json)
+
+    @oneway
+    @expose
+    def upload_transaction_bytes(self, transaction_bytes: bytes):
+        self.__submit_bytes(transaction_bytes)
+
+    @oneway
+    @expose
+    def upload_transactions_bytes(self, transaction_bytes_list: list[bytes]):
+        for transaction_bytes in transaction_bytes_list:
+            self.__submit_bytes(transaction_bytes)
+
+    def __submit_bytes(self, transaction_bytes: bytes):
+        """The transaction is decoded, so malformed ones are not gossiped;
+        its encoding is canonical, so the received bytes are sent on."""
+        try:
+            transaction_bytes = received_bytes(transaction_bytes)
+            Transaction.from_bytes(transaction_bytes)
+        except (DecodeError, ValueError, KeyError, TypeError) as e:
+            self.log.error(f"malformed transaction skipped: {e}")
+            return
+        self.gossip.submit(transaction_bytes)
+
+    def __submit_json(self, transaction_json: str):
+        try:
+            transaction = Transaction.from_json(transaction_json)
+        except (ValueError, KeyError, TypeError) as e:
+            self.log.error(f"malformed transaction skipped: {e}")
+            return
+        self.gossip.submit(transaction.to_bytes())
 
     @oneway
     @expose
@@ -20,11 +74,86 @@ class Endpoint:
         commit synchronizes all the nodes, freezes the transaction list
         in the block, and informs all the nodes to start working for proof
         """
+        self.gossip.flush()
         self.network.broadcast("start_proofing")
 
     @expose
-    def get_last_block(self) -> str:
-        return Block().to_json()
+    def get_last_block(self) -> Optional[str]:
+        return self.get_tip()
+
+    @expose
+    def get_tip(self) -> Optional[str]:
+        tip = self.node.view.tip
+        if tip is not None:
+            return tip.to_json()
+        return self.node.invoke_db("get_tip")
+
+    @expose
+    def get_block(self, index: int) -> Optional[str]:
+        block = self.node.view.get(index)
+        if block is not None:
+            return block.to_json()
+        return self.node.invoke_db("get_block", index)
+
+    @expose
+    def get_block_by_hash(self, hash: str) -> Optional[str]:
+        block = self.node.view.get_by_hash(hash)
+        if block is not None:
+            return block.to_json()
+        return self.node.invoke_db("get_block_by_hash", hash)
+
+    @expose
+    def get_range(self, start: int, end: int) -> Iterator[str]:
+        """Streams blocks with indexes from start up to end (exclusive).
+        Blocks older than the ones held by the node are streamed from the DB."""
+        return self.__range(start, end, "get_range", Block.to_json)
+
+    @expose
+    def get_last_block_bytes(self) -> Optional[bytes]:
+        return self.get_tip_bytes()
+
+    @expose
+    def get_tip_bytes(self) -> Optional[bytes]:
+        tip = self.node.view.tip
+        if tip is not None:
+            return tip.to_bytes()
+        return self.node.invoke_db("get_tip_bytes")
+
+    @expose
+    def get_block_bytes(self, index: int) -> Optional[bytes]:
+        block = self.node.view.get(index)
+        if block is not None:
+            return block.to_bytes()
+        return self.node.invoke_db("get_block_bytes", index)
+
+    @expose
+    def get_block_by_hash_bytes(self, hash: str) -> Optional[bytes]:
+        block = self.node.view.get_by_hash(hash)
+        if block is not None:
+            return block.to_bytes()
+        return self.node.invoke_db("get_block_by_hash_bytes", hash)
+
+    @expose
+    def get_range_bytes(self, start: int, end: int) -> Iterator[bytes]:
+        return self.__range(start, end, "get_range_bytes", Block.to_bytes)
+
+    def __range(
+        self, start: int, end: int, db_method_name: str, encode: Callable[[Block], T]
+    ) -> Iterator[T]:
+        view = self.node.view
+        first_index = view.first_index
+        if first_index is None or start < first_index:
+            db_end = end if first_index is None else min(end, first_index)
+            with self.node.db() as db:
+                yield from invoke_stream(db, db_method_name, start, db_end)
+            start = db_end
+        for block in view.range(start, end):
+            yield encode(block)
+
+    @expose
+    def get_inclusion_proof(self, transaction_id: str) -> Optional[str]:
+        proof = self.node.get_inclusion_proof(transaction_id)
+        return proof.to_json() if proof is not None else None
 
     @expose
     def echo(self, s: str) -> str:
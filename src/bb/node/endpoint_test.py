@@ -0,0 +1,43 @@
+import unittest
+
+from bb.common.block import Data, Transaction
+
+from .endpoint import Endpoint
+from .gossip import GossipCoalescer
+from .miner import Miner
+from .network import Network, Node
+
+
+class TestEndpoint(unittest.TestCase):
+    def setUp(self):
+        network = Network()
+        self.node = Node(network, Miner())
+        self.endpoint = Endpoint(network, self.node)
+        self.batches: list[list[bytes]] = []
+        self.endpoint.gossip = GossipCoalescer(self.batches.append)
+        self.endpoint.gossip.start()
+
+    def tearDown(self):
+        self.endpoint.gossip.shutdown()
+        self.node.intake.shutdown()
+        self.node.commands.shutdown()
+
+    def test_malformed_transaction_bytes_not_gossiped(self):
+        # given
+        transaction = Transaction(
+            user_guid="test_user_guid", data=Data(T="data", payload="test_payload")
+        )
+
+        # when
+        self.endpoint.upload_transactions_bytes(
+            [transaction.to_bytes(), b"test_malformed", transaction.to_bytes()[:-1]]
+        )
+        self.endpoint.upload_transaction_bytes(b"\x01\xff")
+        self.endpoint.gossip.flush()
+
+        # then
+        self.assertEqual(self.batches, [[transaction.to_bytes()]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+from queue import Empty, Queue
+from threading import Event, Thread
+from time import monotonic
+from typing import Callable, Optional
+
+from bb.common.config import DEFAULT_GOSSIP_BATCH_SIZE, DEFAULT_GOSSIP_BATCH_WAIT
+from bb.common.log import Logger
+
+
+class GossipCoalescer:
+    """GossipCoalescer collects transactions submitted one by one and
+    passes them on to send in batches, once batch_size transactions are
+    collected or batch_wait seconds after the first one arrived, so the
+    network sees one call per batch instead of one per transaction.
+    The order of submission is kept."""
+
+    def __init__(
+        self,
+        send: Callable[[list[bytes]], None],
+        batch_size: int = DEFAULT_GOSSIP_BATCH_SIZE,
+        batch_wait: float = DEFAULT_GOSSIP_BATCH_WAIT,
+    ):
+        self.log = Logger(self)
+        self.send = send
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.que: Queue[bytes | Event | None] = Queue()
+        self.collector = Thread(target=self.__collect, daemon=True)
+
+    def start(self):
+        self.collector.start()
+
+    def submit(self, transaction_bytes: bytes):
+        self.que.put(transaction_bytes)
+
+    def flush(self):
+        """Blocks until the transactions submitted so far are sent."""
+        if not self.collector.is_alive():
+            return
+        flushed = Event()
+        self.que.put(flushed)
+        flushed.wait()
+
+    def shutdown(self):
+        if self.collector.is_alive():
+            self.que.put(None)
+            self.collector.join()
+
+    def __collect(self):
+        batch: list[bytes] = []
+        deadline: Optional[float] = None
+        while True:
+            timeout = None if deadline is None else max(deadline - monotonic(), 0)
+            try:
+                item = self.que.get(timeout=timeout)
+            except Empty:
+                self.__send(batch)
+                batch, deadline = [], None
+                continue
+            if item is not None and not isinstance(item, Event):
+                batch.append(item)
+                if deadline is None:
+                    deadline = monotonic() + self.batch_wait
+                if len(batch) < self.batch_size:
+                    continue
+            self.__send(batch)
+            batch, deadline = [], None
+            if item is None:
+                return
+            if isinstance(item, Event):
+                item.set()
+
+    def __send(self, batch: list[bytes]):
+        if not batch:
+            return
+        self.log.debug(f"gossiping batch of {len(batch)} transactions")
+        try:
+            self.send(batch)
+        except Exception as e:
+            self.log.error(f"could not gossip transactions: {e}")
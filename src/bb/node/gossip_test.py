@@ -0,0 +1,50 @@
+import unittest
+
+from .gossip import GossipCoalescer
+
+
+class TestGossipCoalescer(unittest.TestCase):
+    def test_batches_by_size(self):
+        # given
+        batches = []
+        gossip = GossipCoalescer(batches.append, batch_size=2, batch_wait=60)
+        gossip.start()
+
+        # when
+        for i in range(5):
+            gossip.submit(f"test_transaction_{i}".encode())
+        gossip.flush()
+
+        # then
+        self.assertEqual(
+            batches,
+            [
+                [b"test_transaction_0", b"test_transaction_1"],
+                [b"test_transaction_2", b"test_transaction_3"],
+                [b"test_transaction_4"],
+            ],
+        )
+        gossip.shutdown()
+
+    def test_batches_by_time(self):
+        # given
+        batches = []
+        gossip = GossipCoalescer(batches.append, batch_size=100, batch_wait=0.01)
+        gossip.start()
+
+        # when
+        gossip.submit(b"test_transaction_0")
+        gossip.submit(b"test_transaction_1")
+        gossip.collector.join(timeout=0.2)
+        gossip.submit(b"test_transaction_2")
+        gossip.shutdown()
+
+        # then
+        self.assertEqual(
+            batches,
+            [[b"test_transaction_0", b"test_transaction_1"], [b"test_transaction_2"]],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+from concurrent.futures import ThreadPoolExecutor
+from queue import Empty, Queue
+from threading import Thread
+from time import monotonic
+from typing import Callable, Mapping, Optional
+
+from bb.common.block import Transaction
+from bb.common.config import (
+    DEFAULT_INTAKE_BATCH_SIZE,
+    DEFAULT_INTAKE_BATCH_WAIT,
+    DEFAULT_INTAKE_WORKERS,
+)
+from bb.common.log import Logger
+from bb.common.sec.cache import decode_public_key_cached
+from bb.common.sec.scheme import PublicKey
+
+
+def verify_transaction(transaction: Transaction, public_key: PublicKey) -> bool:
+    """Same as Transaction.verify, but a fingerprint which cannot be
+    decoded is not verified instead of raising."""
+    try:
+        return transaction.verify(public_key)
+    except ValueError:
+        return False
+
+
+class SignatureCheck:
+    """SignatureCheck verifies the signature of a transaction. If the node
+    asks for the same public key the signature was verified against ahead
+    of time, the precomputed result is reused, otherwise it verifies inline."""
+
+    def __init__(
+        self,
+        transaction: Transaction,
+        public_key: Optional[PublicKey] = None,
+        verified: Optional[bool] = None,
+    ):
+        self.transaction = transaction
+        self.public_key = public_key
+        self.verified = verified
+
+    def decode_public_key(self, public_key_base64: str) -> PublicKey:
+        data = self.transaction.data
+        if (
+            self.public_key is not None
+            and data.T == "register"
+            and data.payload == public_key_base64
+        ):
+            return self.public_key
+        return decode_public_key_cached(public_key_base64)
+
+    def verify(self, public_key: PublicKey) -> bool:
+        if self.verified is not None and public_key is self.public_key:
+            return self.verified
+        return verify_transaction(self.transaction, public_key)
+
+
+class TransactionIntake:
+    """TransactionIntake collects incoming transactions into micro-batches
+    and verifies their signatures in parallel on a thread pool. The
+    transactions are then applied one by one, in arrival order, so the
+    register and revoke semantics are the same as for inline verification.
+
+    The key each signature is verified against is presumed by replaying the
+    batch over the current registry. If applying an earlier transaction
+    changes that presumption, the signature is verified again inline."""
+
+    def __init__(
+        self,
+        registered_users: Callable[[], Mapping[str, PublicKey]],
+        apply: Callable[[Transaction, SignatureCheck], None],
+        workers: int = DEFAULT_INTAKE_WORKERS,
+        batch_size: int = DEFAULT_INTAKE_BATCH_SIZE,
+        batch_wait: float = DEFAULT_INTAKE_BATCH_WAIT,
+    ):
+        self.log = Logger(self)
+        self.registered_users = registered_users
+        self.apply = apply
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="intake")
+        self.que: Queue[Optional[Transaction]] = Queue()
+        self.collector = Thread(target=self.__collect, daemon=True)
+
+    def start(self):
+        self.collector.start()
+
+    def submit(self, transaction: Transaction):
+        self.que.put(transaction)
+
+    def shutdown(self):
+        if self.collector.is_alive():
+            self.que.put(None)
+            self.collector.join()
+        self.pool.shutdown()
+
+    def __collect(self):
+        while True:
+            first = self.que.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                try:
+                    transaction = self.que.get(timeout=max(deadline - monotonic(), 0))
+                except Empty:
+                    break
+                if transaction is None:
+                    self.process(batch)
+                    return
+                batch.append(transaction)
+            self.process(batch)
+
+    def process(self, batch: list[Transaction]):
+        try:
+            checks = self.verify_batch(batch)
+        except Exception as e:
+            # the collector must keep running, the signatures are then
+            # verified inline when applied
+            self.log.error(f"could not verify batch: {e}")
+            checks = [SignatureCheck(transaction) for transaction in batch]
+        for transaction, check in zip(batch, checks):
+            try:
+                self.apply(transaction, check)
+            except Exception as e:
+                self.log.error(f"could not apply transaction: {e}")
+
+    def verify_batch(self, batch: list[Transaction]) -> list[SignatureCheck]:
+        def _decode_register_key(transaction: Transaction) -> Optional[PublicKey]:
+            if transaction.data.T != "register":
+                return None
+            try:
+                return decode_public_key_cached(transaction.data.payload)
+            except ValueError:
+                return None
+
+        def _presumed_check(
+            transaction: Transaction, public_key: Optional[PublicKey]
+        ) -> SignatureCheck:
+            if public_key is None:
+                return SignatureCheck(transaction)
+            return SignatureCheck(
+                transaction, public_key, verify_transaction(transaction, public_key)
+            )
+
+        register_keys = list(self.pool.map(_decode_register_key, batch))
+
+        registered_users = self.registered_users()
+        presumed_users: dict[str, Optional[PublicKey]] = {}
+        presumed_keys: list[Optional[PublicKey]] = []
+        for transaction, register_key in zip(batch, register_keys):
+            user_guid = transaction.user_guid
+            if transaction.data.T == "register":
+                presumed_keys.append(register_key)
+                presumed_users[user_guid] = register_key
+                continue
+            public_key = presumed_users.get(user_guid, registered_users.get(user_guid))
+            presumed_keys.append(public_key)
+            if transaction.data.T == "revoke":
+                presumed_users[user_guid] = None
+
+        self.log.debug(f"verifying batch of {len(batch)} transactions")
+        return list(self.pool.map(_presumed_check, batch, presumed_keys))
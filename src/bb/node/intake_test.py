@@ -0,0 +1,102 @@
+import unittest
+
+from bb.common.block import Data, Transaction
+from bb.common.sec.asymmetric import encode_public_key, generate_private_key
+
+from .intake import SignatureCheck, TransactionIntake
+
+
+class TestTransactionIntake(unittest.TestCase):
+    # given
+    private_key = generate_private_key()
+    public_key_base64 = encode_public_key(private_key.public_key())
+    other_private_key = generate_private_key()
+
+    def signed(self, T, payload, private_key=None) -> Transaction:
+        transaction = Transaction(
+            user_guid="test_user_guid", data=Data(T=T, payload=payload)
+        )
+        transaction.sign(private_key or self.private_key)
+        return transaction
+
+    def test_verify_batch_presumes_keys_in_arrival_order(self):
+        # given
+        registered_users = {}
+        intake = TransactionIntake(lambda: registered_users, lambda *_: None)
+        batch = [
+            self.signed("data", "before_register"),
+            self.signed("register", self.public_key_base64),
+            self.signed("data", "test_payload"),
+            self.signed("data", "wrong_key", self.other_private_key),
+            self.signed("revoke", self.public_key_base64),
+            self.signed("data", "after_revoke"),
+        ]
+
+        # when
+        tested = intake.verify_batch(batch)
+
+        # then
+        self.assertEqual(
+            [check.verified for check in tested],
+            [None, True, True, False, True, None],
+        )
+        register_key = tested[1].decode_public_key(self.public_key_base64)
+        self.assertIs(register_key, tested[2].public_key)
+        intake.shutdown()
+
+    def test_malformed_fingerprint_not_verified(self):
+        # given
+        public_key = self.private_key.public_key()
+        applied: list[tuple[str, bool]] = []
+
+        def _apply(transaction: Transaction, check: SignatureCheck):
+            applied.append((transaction.data.payload, check.verify(public_key)))
+
+        intake = TransactionIntake(lambda: {"test_user_guid": public_key}, _apply)
+        malformed = self.signed("data", "malformed")
+        malformed.fingerprint = "a"
+        intake.start()
+
+        # when
+        intake.submit(malformed)
+        intake.submit(self.signed("data", "test_payload"))
+        intake.shutdown()
+
+        # then
+        self.assertEqual(applied, [("malformed", False), ("test_payload", True)])
+
+    def test_failed_batch_applied_with_inline_checks(self):
+        # given
+        applied: list[str] = []
+
+        def _registered_users():
+            raise RuntimeError("test_error")
+
+        intake = TransactionIntake(
+            _registered_users, lambda t, _: applied.append(t.data.payload)
+        )
+        intake.start()
+
+        # when
+        intake.submit(self.signed("data", "first_payload"))
+        intake.shutdown()
+
+        # then
+        self.assertEqual(applied, ["first_payload"])
+
+    def test_check_verifies_inline_for_other_key(self):
+        # given
+        transaction = self.signed("data", "test_payload")
+        other_public_key = self.other_private_key.public_key()
+        check = SignatureCheck(transaction, other_public_key, verified=True)
+
+        # when
+        tested = check.verify(self.private_key.public_key())
+
+        # then
+        self.assertTrue(tested)
+        self.assertFalse(SignatureCheck(transaction).verify(other_public_key))
+
+
+if __name__ == "__main__":
+    unittest.main()
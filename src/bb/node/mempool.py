@@ -0,0 +1,106 @@
+from collections import OrderedDict
+from itertools import islice
+from threading import RLock
+from time import monotonic
+from typing import Iterable, NamedTuple, Optional
+
+from bb.common.block import Transaction
+from bb.common.config import DEFAULT_MEMPOOL_MAX_BYTES, DEFAULT_MEMPOOL_MAX_COUNT
+
+EVICTABLE_TYPES = ("data",)
+"""register and revoke transactions are never evicted,
+as the user registry already reflects them"""
+
+
+class Entry(NamedTuple):
+    transaction: Transaction
+    size: int
+    added: float
+    """monotonic time the transaction was added at"""
+
+
+class Mempool:
+    """Mempool keeps the verified transactions waiting for a block, keyed
+    by transaction id, in arrival order. It is bounded by max_count
+    transactions and max_bytes of their binary encoding.
+
+    When full, the oldest data transactions are evicted to make room.
+    A transaction is rejected if it does not fit even after evicting all
+    of them, so fits should be checked before it changes the registry."""
+
+    def __init__(
+        self,
+        max_count: int = DEFAULT_MEMPOOL_MAX_COUNT,
+        max_bytes: int = DEFAULT_MEMPOOL_MAX_BYTES,
+    ):
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[str, Entry] = OrderedDict()
+        self.evictable: OrderedDict[str, None] = OrderedDict()
+        self.size = 0
+        self.evictable_size = 0
+        self.lock = RLock()
+
+    def __contains__(self, transaction_id: str) -> bool:
+        return transaction_id in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def fits(self, transaction: Transaction, size: Optional[int] = None) -> bool:
+        """Returns whether the transaction can be added,
+        possibly after evicting other transactions."""
+        size = size if size is not None else len(transaction.to_bytes())
+        with self.lock:
+            return (
+                len(self.entries) - len(self.evictable) < self.max_count
+                and self.size - self.evictable_size + size <= self.max_bytes
+            )
+
+    def add(self, transaction: Transaction) -> bool:
+        """Returns False, without adding the transaction, if it is already
+        in the mempool or does not fit."""
+        transaction_id = transaction.id()
+        size = len(transaction.to_bytes())
+        with self.lock:
+            if transaction_id in self.entries or not self.fits(transaction, size):
+                return False
+            while (
+                len(self.entries) >= self.max_count or self.size + size > self.max_bytes
+            ):
+                self.__remove(next(iter(self.evictable)))
+            self.entries[transaction_id] = Entry(transaction, size, monotonic())
+            self.size += size
+            if transaction.data.T in EVICTABLE_TYPES:
+                self.evictable[transaction_id] = None
+                self.evictable_size += size
+            return True
+
+    def remove(self, transactions: Iterable[Transaction]):
+        """Removes the transactions, e.g. once they are committed in a block."""
+        with self.lock:
+            for transaction in transactions:
+                transaction_id = transaction.id()
+                if transaction_id in self.entries:
+                    self.__remove(transaction_id)
+
+    def __remove(self, transaction_id: str):
+        entry = self.entries.pop(transaction_id)
+        self.size -= entry.size
+        if transaction_id in self.evictable:
+            del self.evictable[transaction_id]
+            self.evictable_size -= entry.size
+
+    def oldest_age(self) -> Optional[float]:
+        """Returns the seconds the oldest transaction has been waiting for,
+        None if the mempool is empty."""
+        with self.lock:
+            oldest = next(iter(self.entries.values()), None)
+        return monotonic() - oldest.added if oldest is not None else None
+
+    def select(self, max_count: Optional[int] = None) -> list[Transaction]:
+        """Returns up to max_count transactions for the next block,
+        the oldest first, without removing them."""
+        with self.lock:
+            entries = islice(self.entries.values(), max_count)
+            return [entry.transaction for entry in entries]
@@ -0,0 +1,91 @@
+import unittest
+
+from bb.common.block import Data, Transaction
+
+from .mempool import Mempool
+
+
+class TestMempool(unittest.TestCase):
+    def transaction(self, T: str, i: int) -> Transaction:
+        return Transaction(
+            user_guid=f"test_user_guid_{i}", data=Data(T=T, payload="test_payload")
+        )
+
+    def test_duplicate_rejected(self):
+        # given
+        mempool = Mempool()
+        transaction = self.transaction("data", 0)
+
+        # when
+        added = [mempool.add(transaction), mempool.add(self.transaction("data", 0))]
+
+        # then
+        self.assertEqual(added, [True, False])
+        self.assertIn(transaction.id(), mempool)
+        self.assertEqual(len(mempool), 1)
+
+    def test_oldest_data_evicted_first(self):
+        # given
+        mempool = Mempool(max_count=3)
+        register = self.transaction("register", 0)
+        data = [self.transaction("data", i) for i in range(1, 4)]
+        mempool.add(data[0])
+        mempool.add(register)
+        mempool.add(data[1])
+
+        # when
+        added = mempool.add(data[2])
+
+        # then
+        self.assertTrue(added)
+        self.assertEqual(mempool.select(), [register, data[1], data[2]])
+
+    def test_registry_transactions_never_evicted(self):
+        # given
+        mempool = Mempool(max_count=2)
+        for i in range(2):
+            mempool.add(self.transaction("register", i))
+        transaction = self.transaction("data", 2)
+
+        # when
+        fits = mempool.fits(transaction)
+        added = mempool.add(transaction)
+
+        # then
+        self.assertFalse(fits)
+        self.assertFalse(added)
+        self.assertEqual(len(mempool), 2)
+
+    def test_byte_limit(self):
+        # given
+        transactions = [self.transaction("data", i) for i in range(3)]
+        size = len(transactions[0].to_bytes())
+        mempool = Mempool(max_bytes=2 * size)
+
+        # when
+        for transaction in transactions:
+            mempool.add(transaction)
+
+        # then
+        self.assertEqual(mempool.select(), transactions[1:])
+        self.assertEqual(mempool.size, 2 * size)
+
+    def test_select_and_remove(self):
+        # given
+        mempool = Mempool()
+        transactions = [self.transaction("data", i) for i in range(3)]
+        for transaction in transactions:
+            mempool.add(transaction)
+
+        # when
+        selected = mempool.select(2)
+        mempool.remove(selected)
+
+        # then
+        self.assertEqual(selected, transactions[:2])
+        self.assertEqual(mempool.select(), transactions[2:])
+        self.assertEqual(mempool.size, len(transactions[2].to_bytes()))
+
+
+if __name__ == "__main__":
+    unittest.main()
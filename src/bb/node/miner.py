@@ -0,0 +1,155 @@
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from threading import Event, Lock, Thread
+from typing import Callable, Optional
+
+from bb.common.block import Block
+from bb.common.config import DEFAULT_MINING_WORKERS
+from bb.common.log import Logger
+from bb.common.pow import ProofOfWork
+
+STOP_CHECK_INTERVAL = 4096
+"""number of nonces a worker tries between checks of the stop event"""
+CANCEL_POLL_INTERVAL = 0.005
+"""seconds between checks of the cancellation token while workers search"""
+
+_worker_stop_event = None
+
+
+def search_until_stopped(
+    engine: ProofOfWork, start: int, step: int, stop_event
+) -> Optional[int]:
+    """Searches nonces start, start + step, start + 2 * step, ... until
+    a proof is found or the stop event is set."""
+    chunk = step * STOP_CHECK_INTERVAL
+    while not stop_event.is_set():
+        proof = engine.search(start=start, step=step, stop=start + chunk)
+        if proof is not None:
+            return proof
+        start += chunk
+    return None
+
+
+def _init_worker(stop_event):
+    global _worker_stop_event
+    _worker_stop_event = stop_event
+
+
+def _search_stride(engine: ProofOfWork, start: int, step: int) -> Optional[int]:
+    return search_until_stopped(engine, start, step, _worker_stop_event)
+
+
+class MiningJob:
+    """MiningJob runs the proof search for a block in a background thread.
+    Setting its cancellation token stops the search within milliseconds,
+    and on_proof is called only if the search finished uncancelled."""
+
+    def __init__(self, miner: "Miner", block: Block, on_proof: Callable[[int], None]):
+        self.block = block
+        self.cancelled = Event()
+        self.thread = Thread(target=self.__run, args=(miner, on_proof), daemon=True)
+
+    def __run(self, miner: "Miner", on_proof: Callable[[int], None]):
+        proof = miner.mine(self.block, self.cancelled)
+        if proof is not None and not self.cancelled.is_set():
+            on_proof(proof)
+
+    def start(self):
+        self.thread.start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def join(self):
+        self.thread.join()
+
+    def is_running(self) -> bool:
+        return self.thread.is_alive()
+
+
+class Miner:
+    """Miner searches for the proof of work of a block. With more than one
+    worker, the nonce space is split into disjoint strides, each searched
+    by a separate process, and the first proof found stops the others."""
+
+    def __init__(self, workers: int = DEFAULT_MINING_WORKERS):
+        self.log = Logger(self)
+        self.workers = max(workers, 1)
+        self.job: Optional[MiningJob] = None
+        self.job_lock = Lock()
+        self.pool: Optional[ProcessPoolExecutor] = None
+        if self.workers > 1:
+            context = multiprocessing.get_context("spawn")
+            self.stop_event = context.Event()
+            self.pool = ProcessPoolExecutor(
+                self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self.stop_event,),
+            )
+
+    def mine(self, block: Block, cancelled: Optional[Event] = None) -> Optional[int]:
+        """Searches for the proof of the block, blocking until it is found.
+        Returns None, leaving the block untouched, if cancelled."""
+        cancelled = cancelled if cancelled is not None else Event()
+        engine = block.proof_of_work_engine()
+        if self.pool is None:
+            proof = search_until_stopped(engine, block.proof, 1, cancelled)
+        else:
+            proof = self.__mine_on_pool(engine, block.proof, cancelled)
+
+        if proof is not None and not cancelled.is_set():
+            block.proof = proof
+            return proof
+        return None
+
+    def __mine_on_pool(
+        self, engine: ProofOfWork, start: int, cancelled: Event
+    ) -> Optional[int]:
+        assert self.pool is not None
+        self.log.debug(f"mining with {self.workers} workers")
+        self.stop_event.clear()
+        futures = [
+            self.pool.submit(_search_stride, engine, start + i, self.workers)
+            for i in range(self.workers)
+        ]
+        done = set()
+        while not done and not cancelled.is_set():
+            done, _ = wait(
+                futures, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED
+            )
+        self.stop_event.set()
+        wait(futures)
+        proofs = [f.result() for f in futures if f.result() is not None]
+        return min(proofs) if proofs else None
+
+    def start(self, block: Block, on_proof: Callable[[int], None]) -> MiningJob:
+        """Cancels the running job, if any, and starts mining the block
+        in the background."""
+        with self.job_lock:
+            self.__cancel_and_join()
+            self.job = MiningJob(self, block, on_proof)
+            self.job.start()
+            return self.job
+
+    def cancel(self):
+        with self.job_lock:
+            if self.job is not None:
+                self.job.cancel()
+                self.log.debug("mining cancelled")
+
+    def __cancel_and_join(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.job.join()
+            self.job = None
+
+    def is_mining(self) -> bool:
+        return self.job is not None and self.job.is_running()
+
+    def shutdown(self):
+        with self.job_lock:
+            self.__cancel_and_join()
+        if self.pool is not None:
+            self.stop_event.set()
+            self.pool.shutdown()
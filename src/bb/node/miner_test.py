@@ -0,0 +1,65 @@
+import unittest
+from threading import Event
+
+from bb.common.block import Block, Data, Transaction
+
+from .miner import Miner
+
+
+class TestMiner(unittest.TestCase):
+    # given
+    data = Data(T="data", payload="test_payload")
+    transaction = Transaction(
+        user_guid="test_user_guid", fingerprint="test_fingerprint", data=data
+    )
+
+    def mine_with_workers(self, workers: int) -> Block:
+        block = Block(index=1, transactions=[self.transaction])
+        miner = Miner(workers)
+        try:
+            miner.mine(block)
+        finally:
+            miner.shutdown()
+        return block
+
+    def test_mine_single_worker(self):
+        # when
+        tested = self.mine_with_workers(1)
+
+        # then
+        self.assertTrue(Block.verify_hash_difficulty(tested.hash()))
+
+    def test_mine_multiple_workers(self):
+        # when
+        tested = self.mine_with_workers(2)
+
+        # then
+        self.assertTrue(Block.verify_hash_difficulty(tested.hash()))
+
+    def test_start_and_cancel(self):
+        # given
+        block = Block(index=1, transactions=[self.transaction])
+        miner = Miner(1)
+        found = Event()
+        cancelled = Event()
+        cancelled.set()
+
+        # when
+        proof = miner.mine(block, cancelled)
+
+        # then
+        self.assertIsNone(proof)
+        self.assertEqual(block.proof, 0)
+
+        # when
+        job = miner.start(block, lambda _: found.set())
+        job.join()
+
+        # then
+        self.assertTrue(found.is_set())
+        self.assertTrue(Block.verify_hash_difficulty(block.hash()))
+        miner.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,60 +1,380 @@
-from dataclasses import replace
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, replace
 from datetime import datetime as Timestamp
-from queue import Queue
-from threading import Thread
-from typing import Literal, Optional
-
-from bb.common.block import Block, Transaction
+from datetime import timedelta
+from types import MappingProxyType
+from typing import ContextManager, Iterator, Literal, Mapping, Optional
+
+from bb.common.block import Block, InclusionProof, Transaction
+from bb.common.bloom import ScalableBloomFilter
+from bb.common.config import (
+    DEFAULT_BLOCK_MAX_TRANSACTIONS,
+    DEFAULT_BLOCK_TIME,
+    DEFAULT_BROADCAST_WORKERS,
+    DEFAULT_MAX_CLOCK_DRIFT,
+    DEFAULT_PEER_TIMEOUT,
+    DEFAULT_RECENT_TRANSACTIONS_SIZE,
+    DEFAULT_RETARGET_INTERVAL,
+    DEFAULT_SEEN_FILTER_CAPACITY,
+    DEFAULT_SEEN_FILTER_ERROR_RATE,
+)
 from bb.common.log import Logger
 from bb.common.names import DB_ENDPOINT, NETWORK_NODE
-from bb.common.net.papi import Proxy, expose, get_all_uris, invoke, oneway, proxy_of
-from bb.common.sec.asymmetric import RSAPublicKey, decode_public_key
+from bb.common.net.papi import (
+    CommunicationError,
+    Proxy,
+    PyroTimeoutError,
+    expose,
+    get_all_uris,
+    oneway,
+    received_bytes,
+)
+from bb.common.net.pool import Membership, ProxyPool
+from bb.common.pow import DEFAULT_TARGET, retarget
+from bb.common.sec.cache import LRUCache, decode_public_key_cached
+from bb.common.sec.scheme import PublicKey
+from bb.node.chain import Chain
+from bb.node.commands import CommandLoop
+from bb.node.intake import SignatureCheck, TransactionIntake
+from bb.node.mempool import Mempool
+from bb.node.miner import Miner
+from bb.node.snapshot import Snapshot
+from bb.node.writer import BlockWriter
+
+
+class RetargetError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class NodeView:
+    """NodeView is an immutable view of the node state, published after
+    every command, so queries are answered without locks. Blocks are never
+    removed from a chain, so the view shares the chain of the node and
+    hides the blocks appended after the view was published."""
+
+    registered_users: Mapping[str, PublicKey]
+    chain: Chain
+    tip: Optional[Block] = None
+    is_proofing: bool = False
+
+    @property
+    def tip_hash(self) -> str:
+        return self.tip.hash() if self.tip is not None else ""
+
+    @property
+    def first_index(self) -> Optional[int]:
+        return self.chain.first_index if self.tip is not None else None
+
+    def next_index(self) -> int:
+        return self.tip.index + 1 if self.tip is not None else 0
+
+    def get(self, index: int) -> Optional[Block]:
+        return self.chain.get(index) if index < self.next_index() else None
+
+    def get_by_hash(self, hash: str) -> Optional[Block]:
+        block = self.chain.get_by_hash(hash)
+        return block if block is not None and block.index < self.next_index() else None
+
+    def range(self, start: int, end: int) -> Iterator[Block]:
+        return self.chain.range(start, min(end, self.next_index()))
 
 
 class Node:
+    """Node holds the chain, the user registry and the pending transactions.
+    The state is changed only by commands applied one at a time by a single
+    writer, see CommandLoop, so the calls Pyro serves on its worker threads
+    never race each other. Queries are served from the published view."""
+
     SupportedMethod = Literal[
         "add_block",
         "add_transaction",
+        "add_transactions",
+        "add_transaction_bytes",
+        "add_transactions_bytes",
         "start_proofing",
         "proof_found",
     ]
 
-    registered_users: dict[str, RSAPublicKey] = {}
-    """registered_users keeps track of public keys for certain user_guids
-    {"<user_guid>": <public_key>}"""
-    blocks: list[Block] = []
-    current_block: Optional[Block] = Block()
-    is_proof_found: bool = False
-    last_transaction_json = ""
-
-    def __init__(self, network: "Network"):
+    def __init__(self, network: "Network", miner: Miner):
         self.log = Logger(self)
         self.network = network
-
-        self.que = Queue()
+        self.miner = miner
+
+        self.registered_users: dict[str, PublicKey] = {}
+        """registered_users keeps track of public keys for certain user_guids
+        {"<user_guid>": <public_key>}"""
+        self.chain = Chain()
+        self.mempool = Mempool()
+        """mempool keeps the verified transactions waiting for a block"""
+        self.current_block: Optional[Block] = None
+        """current_block is the block being proofed, opened from the mempool"""
+        self.transaction_blocks = LRUCache[str, Block](DEFAULT_RECENT_TRANSACTIONS_SIZE)
+        """transaction_blocks maps ids of recently committed transactions to
+        their blocks, the older ones are looked up in the DB"""
+        self.committed = ScalableBloomFilter(
+            DEFAULT_SEEN_FILTER_CAPACITY, DEFAULT_SEEN_FILTER_ERROR_RATE
+        )
+        """committed holds the ids of all committed transactions, the exact
+        index is kept by the DB, see Database.has_transactions"""
+        self.is_proof_found = False
+        self.users_changed = False
+        """users_changed tells the registry has to be copied to the next view"""
+        self.writer: Optional[BlockWriter] = None
+        """writer saves the appended blocks to the DB, without it they are
+        saved before add_block returns"""
+
+        self.view = NodeView(MappingProxyType({}), self.chain)
+        self.commands = CommandLoop(self.__publish)
+        self.commands.start()
+        self.intake = TransactionIntake(
+            lambda: self.view.registered_users, self.__admit_transaction
+        )
+        self.intake.start()
 
         self.prev_hash = ""
 
-    def __locate_db(self) -> Proxy:
-        db_uris = get_all_uris(DB_ENDPOINT)
+    def __publish(self):
+        registered_users = self.view.registered_users
+        if self.users_changed:
+            registered_users = MappingProxyType(dict(self.registered_users))
+            self.users_changed = False
+        self.view = NodeView(
+            registered_users,
+            self.chain,
+            self.chain.tip,
+            self.current_block is not None,
+        )
+
+    def locate_db(self) -> str:
+        """Returns the uri of the DB, the nameserver is asked again only
+        when the cached listing expires, see Membership"""
+        db_uris = self.network.dbs.uris()
         if len(db_uris) != 1:
             self.log.critical("DB not running or multiple instances running")
-            exit(127)
-        return proxy_of(db_uris[0])
+            self.network.dbs.invalidate()
+            raise CommunicationError(f"{len(db_uris)} DBs running instead of one")
+        return db_uris[0]
+
+    def db(self) -> ContextManager[Proxy]:
+        """Lends a pooled proxy of the DB, e.g. for streaming."""
+        return self.network.db_proxies.proxy(self.locate_db())
+
+    def invoke_db(self, method_name: str, *args):
+        try:
+            return self.network.db_proxies.invoke(self.locate_db(), method_name, *args)
+        except CommunicationError:
+            self.network.dbs.invalidate()
+            raise
+
+    def get_inclusion_proof(self, transaction_id: str) -> Optional[InclusionProof]:
+        block = self.transaction_blocks.get(transaction_id)
+        if block is not None:
+            return block.inclusion_proof(transaction_id)
+        proof_json = self.invoke_db("get_inclusion_proof", transaction_id)
+        return InclusionProof.from_json(proof_json) if proof_json else None
+
+    def get_block(self, index: int) -> Optional[Block]:
+        block = self.chain.get(index)
+        if block is not None:
+            return block
+        try:
+            block_bytes = self.invoke_db("get_block_bytes", index)
+        except CommunicationError as e:
+            self.log.error(f"could not get block {index} from DB: {e}")
+            return None
+        return Block.from_bytes(received_bytes(block_bytes)) if block_bytes else None
+
+    def interval_start(self, next_index: int) -> Optional[Block]:
+        """Returns the first block of the interval retargeted before the
+        block with next_index, if it is retargeted. The block may have to be
+        read from the DB, so it is fetched before submitting a command which
+        opens or appends the block, see next_target."""
+        if next_index == 0 or next_index % DEFAULT_RETARGET_INTERVAL != 0:
+            return None
+        return self.get_block(next_index - DEFAULT_RETARGET_INTERVAL)
+
+    def next_target(self, interval_start: Optional[Block] = None) -> int:
+        """Returns the target of the next block: the target of the tip,
+        retargeted every DEFAULT_RETARGET_INTERVAL blocks by how long the
+        last interval took compared to DEFAULT_BLOCK_TIME per block.
+
+        The first block of the interval is taken from interval_start, or
+        from the chain; the DB is never asked, as this runs on the loop.
+        Raises RetargetError if it is neither."""
+        tip = self.chain.tip
+        if tip is None:
+            return DEFAULT_TARGET
+        next_index = tip.index + 1
+        if next_index % DEFAULT_RETARGET_INTERVAL != 0:
+            return tip.target
+        first_index = next_index - DEFAULT_RETARGET_INTERVAL
+        first = self.chain.get(first_index)
+        if first is None and interval_start is not None:
+            first = interval_start if interval_start.index == first_index else None
+        if first is None:
+            # guessing would make the target depend on reaching the DB, so
+            # nodes could disagree on it and reject each other's blocks
+            raise RetargetError(f"block {first_index} to retarget from is missing")
+        actual_time = (tip.get_timestamp() - first.get_timestamp()) // timedelta(
+            milliseconds=1
+        )
+        expected_time = int((DEFAULT_RETARGET_INTERVAL - 1) * DEFAULT_BLOCK_TIME * 1000)
+        return retarget(tip.target, actual_time, expected_time)
+
+    def snapshot(self) -> Snapshot:
+        """Captures the node state; the pending transactions of the mempool
+        are kept as the current block of the snapshot."""
+        return self.commands.call(self.__snapshot)
+
+    def __snapshot(self) -> Snapshot:
+        pending = self.mempool.select()
+        pending_block = None
+        if pending:
+            pending_block = Block(
+                index=self.chain.next_index(),
+                prev_hash=self.chain.tip_hash,
+                transactions=pending,
+            )
+        return Snapshot(
+            dict(self.registered_users),
+            self.chain.tip,
+            pending_block,
+            self.committed.copy(),
+        )
+
+    def restore(self, snapshot: Snapshot):
+        """Resumes from the snapshot; the blocks after its tip are then
+        appended by syncing."""
+        self.commands.call(self.__restore, snapshot)
+
+    def __restore(self, snapshot: Snapshot):
+        self.registered_users = dict(snapshot.registered_users)
+        self.users_changed = True
+        if snapshot.committed is not None:
+            self.committed = snapshot.committed
+        self.chain = Chain()
+        if snapshot.tip is not None:
+            self.chain.append(snapshot.tip)
+        self.current_block = None
+        if snapshot.current_block is not None:
+            for transaction in snapshot.current_block.transactions:
+                self.mempool.add(transaction)
+        self.log.info(
+            f"restored {len(self.registered_users)} users, "
+            f"{len(self.mempool)} pending transactions, "
+            f"tip at block {self.chain.next_index() - 1}"
+        )
+
+    def append_synced_block(self, block: Block) -> bool:
+        """Appends a block streamed from a peer or the DB while syncing.
+        The block must extend the tip, carry a valid proof of work and
+        commit to its transactions with its Merkle root; the transactions
+        were verified when it was mined, so the user registry is updated
+        from them without checking signatures again."""
+        interval_start = self.interval_start(block.index)
+        return self.commands.call(self.__append_synced_block, block, interval_start)
+
+    def __verify_timestamp(self, timestamp: str) -> bool:
+        """Timestamps of blocks have to increase, and may be ahead of the
+        local clock by DEFAULT_MAX_CLOCK_DRIFT seconds at most, so a miner
+        cannot stretch a retarget interval to make the target easier."""
+        try:
+            block_time = Timestamp.fromisoformat(timestamp)
+        except ValueError:
+            return False
+        tip = self.chain.tip
+        if tip is not None and block_time <= tip.get_timestamp():
+            return False
+        return block_time <= Timestamp.now() + timedelta(
+            seconds=DEFAULT_MAX_CLOCK_DRIFT
+        )
+
+    def __append_synced_block(
+        self, block: Block, interval_start: Optional[Block] = None
+    ) -> bool:
+        if block.index != self.chain.next_index():
+            self.log.error(f"synced block {block.index} does not follow the tip")
+            return False
+        if block.prev_hash != self.chain.tip_hash:
+            self.log.error(f"synced block {block.index} does not link to the tip")
+            return False
+        if not block.verify_merkle_root():
+            self.log.error(f"synced block {block.index} has other transactions")
+            return False
+        try:
+            proven = block.verify_proof()
+        except ValueError as e:
+            # e.g. a hash which is not hex or a timestamp too long
+            self.log.error(f"synced block {block.index} has a malformed header: {e}")
+            return False
+        if not proven:
+            self.log.error(f"synced block {block.index} has no valid proof")
+            return False
+        tip = self.chain.tip
+        if tip is not None and block.version < tip.version:
+            self.log.error(f"synced block {block.index} has an earlier version")
+            return False
+        if not self.__verify_timestamp(block.timestamp):
+            self.log.error(f"synced block {block.index} has a wrong timestamp")
+            return False
+        try:
+            target = self.next_target(interval_start)
+        except RetargetError as e:
+            self.log.error(f"could not check target of synced block: {e}")
+            return False
+        if block.version >= Block.TARGET_VERSION and block.target != target:
+            self.log.error(f"synced block {block.index} has a wrong target")
+            return False
+
+        # keys are decoded before the registry is changed, so a rejected
+        # block leaves no users of it behind
+        try:
+            public_keys = [
+                (
+                    decode_public_key_cached(transaction.data.payload)
+                    if transaction.data.T == "register"
+                    else None
+                )
+                for transaction in block.transactions
+            ]
+        except ValueError as e:
+            self.log.error(f"synced block {block.index} has a malformed key: {e}")
+            return False
 
-    def __verify_transaction_and_perform_action(self, transaction: Transaction) -> bool:
+        for transaction, public_key in zip(block.transactions, public_keys):
+            data = transaction.data
+            if public_key is not None:
+                self.registered_users[transaction.user_guid] = public_key
+                self.users_changed = True
+            elif data.T == "revoke":
+                self.registered_users.pop(transaction.user_guid, None)
+                self.users_changed = True
+            self.transaction_blocks.put(transaction.id(), block)
+            self.committed.add(transaction.id())
+        self.chain.append(block)
+        self.mempool.remove(block.transactions)
+
+        if self.current_block is not None and self.current_block.index <= block.index:
+            self.current_block = None
+        return True
+
+    def __verify_transaction_and_perform_action(
+        self, transaction: Transaction, check: SignatureCheck
+    ) -> bool:
         def _register_user(_user_guid, _public_key_base64) -> bool:
             if user_guid in self.registered_users.keys():
                 self.log.error("user already registered, not verified")
                 return False
-            _public_key = decode_public_key(_public_key_base64)
-            if not transaction.verify(_public_key):
+            _public_key = check.decode_public_key(_public_key_base64)
+            if not check.verify(_public_key):
                 self.log.error(
                     "transaction not verified, "
                     "wrong signature for the public key in payload"
                 )
                 return False
             self.registered_users.update({_user_guid: _public_key})
+            self.users_changed = True
             self.log.debug(f"registered users: {list(self.registered_users.keys())}")
             return True
 
@@ -69,7 +389,7 @@ class Node:
             return False
 
         public_key = self.registered_users[user_guid]
-        if not transaction.verify(public_key):
+        if not check.verify(public_key):
             self.log.error(
                 "transaction not verified, wrong signature for this public key"
             )
@@ -77,124 +397,325 @@ class Node:
 
         if data.T == "revoke":
             self.registered_users.pop(user_guid)
+            self.users_changed = True
 
         self.log.info("transaction verified")
         return True
 
+    def __is_committed(self, transaction_id: str) -> bool:
+        """Only ids the committed filter may contain are looked up in the DB;
+        if the DB cannot be asked, the transaction is presumed committed."""
+        if transaction_id not in self.committed:
+            return False
+        if self.transaction_blocks.get(transaction_id) is not None:
+            return True
+        try:
+            return self.invoke_db("has_transactions", [transaction_id])[0]
+        except CommunicationError as e:
+            self.log.error(f"could not check transaction in DB: {e}")
+            return True
+
+    def __admit_transaction(self, transaction: Transaction, check: SignatureCheck):
+        """Submits a transaction verified by the intake, unless committed.
+        It runs on the intake thread, so the DB is not asked on the loop."""
+        if self.__is_committed(transaction.id()):
+            self.log.debug("transaction already committed, skipping")
+            return
+        self.commands.post(self.__append_transaction, transaction, check)
+
+    def __append_transaction(self, transaction: Transaction, check: SignatureCheck):
+        # a block committing the transaction may have been appended since it
+        # was admitted, its transactions are then in transaction_blocks
+        transaction_id = transaction.id()
+        if transaction_id in self.mempool or (
+            transaction_id in self.committed
+            and self.transaction_blocks.get(transaction_id) is not None
+        ):
+            self.log.debug("transaction already known, skipping")
+            return
+        if not self.mempool.fits(transaction):
+            self.log.warn("mempool full, transaction rejected")
+            return
+        if self.__verify_transaction_and_perform_action(transaction, check):
+            self.mempool.add(transaction)
+
+    def __open_block(self, interval_start: Optional[Block] = None) -> Optional[Block]:
+        """Returns the current block, or opens it with the transactions
+        selected from the mempool, see next_target for interval_start."""
+        if self.current_block is None:
+            transactions = self.mempool.select(DEFAULT_BLOCK_MAX_TRANSACTIONS)
+            if transactions:
+                self.current_block = Block(
+                    index=self.chain.next_index(),
+                    prev_hash=self.chain.tip_hash,
+                    transactions=transactions,
+                    target=self.next_target(interval_start),
+                )
+        return self.current_block
+
     @oneway
     @expose
     def add_transaction(self, transaction_json: str):
-        def _add_new_block_if_current_empty():
-            if not self.blocks:
-                index = 0
-                prev_hash = ""
-            else:
-                index = len(self.blocks)
-                prev_hash = self.blocks[-1].hash()
-            self.current_block = Block(index=index, prev_hash=prev_hash)
-
+        """add_transaction queues the transaction for batched verification,
+        see TransactionIntake"""
         self.log.debug(f"transaction received: {transaction_json}")
-        if transaction_json == self.last_transaction_json:
-            return
         transaction = Transaction.from_json(transaction_json)
-        if self.__verify_transaction_and_perform_action(transaction):
-            if self.current_block is None:
-                _add_new_block_if_current_empty()
-            self.current_block.transactions.append(transaction)  # type: ignore (doesn't see block adding)
+        if transaction.id() in self.mempool:
+            self.log.debug("transaction already pending, skipping")
+            return
+        self.intake.submit(transaction)
+
+    @oneway
+    @expose
+    def add_transactions(self, transaction_jsons: list[str]):
+        """add_transactions queues a batch of transactions in one call,
+        in order, see add_transaction"""
+        self.log.debug(f"{len(transaction_jsons)} transactions received")
+        for transaction_json in transaction_jsons:
+            try:
+                transaction = Transaction.from_json(transaction_json)
+            except (ValueError, KeyError, TypeError) as e:
+                self.log.error(f"malformed transaction skipped: {e}")
+                continue
+            if transaction.id() not in self.mempool:
+                self.intake.submit(transaction)
+
+    @oneway
+    @expose
+    def add_transaction_bytes(self, transaction_bytes: bytes):
+        """add_transaction_bytes is add_transaction for the binary encoding
+        of the transaction, see bb.common.codec"""
+        self.add_transactions_bytes([transaction_bytes])
+
+    @oneway
+    @expose
+    def add_transactions_bytes(self, transaction_bytes_list: list[bytes]):
+        self.log.debug(f"{len(transaction_bytes_list)} transactions received")
+        for transaction_bytes in transaction_bytes_list:
+            try:
+                transaction = Transaction.from_bytes(received_bytes(transaction_bytes))
+            except (ValueError, KeyError, TypeError) as e:
+                self.log.error(f"malformed transaction skipped: {e}")
+                continue
+            if transaction.id() not in self.mempool:
+                self.intake.submit(transaction)
 
     @oneway
     @expose
     def start_proofing(self):
-        if self.current_block is None:
+        interval_start = self.interval_start(self.view.next_index())
+        self.commands.post(self.__start_proofing, interval_start)
+
+    def __start_proofing(self, interval_start: Optional[Block]):
+        if self.__open_block(interval_start) is None:
             self.log.warn("no block for proofing, aborting")
             return
 
         timestamp = Timestamp.now().isoformat(timespec="milliseconds")
 
         self.current_block.timestamp = timestamp
-        block = self.current_block
+        self.current_block.seal()
+        # the miner sets the proof of its own copy, outside of the loop
+        block = replace(self.current_block)
 
         self.log.info("start proofing")
 
-        proofing = Thread(
-            target=lambda x, _: x.put(block.proof_of_work()),
-            args=(self.que, "proof"),
-        )
-        proofing.start()
-        proofing.join()
-
-        while not self.que.empty():
-            self.network.broadcast(
-                "proof_found", self.que.get(), block.hash(), timestamp
-            )
+        def _on_proof(proof: int):
             self.log.debug("this node found proof of work")
+            self.network.broadcast("proof_found", proof, block.hash(), timestamp)
+
+        self.miner.start(block, _on_proof)
 
     @oneway
     @expose
     def proof_found(self, proof: int, hash: str, timestamp: str):
-        if self.is_proof_found or self.current_block is None:
-            self.log.debug("proof found earlier, skipping")
+        interval_start = self.interval_start(self.view.next_index())
+        try:
+            accepted = self.commands.call(
+                self.__accept_proof, proof, hash, timestamp, interval_start
+            )
+        except RetargetError as e:
+            self.log.error(f"could not open block to verify proof: {e}")
             return
+        if accepted:
+            self.network.broadcast("add_block", proof, hash, timestamp)
+
+    def __accept_proof(
+        self,
+        proof: int,
+        hash: str,
+        timestamp: str,
+        interval_start: Optional[Block] = None,
+    ) -> bool:
+        """Returns True if the proof completes the current block."""
+        if self.is_proof_found or self.__open_block(interval_start) is None:
+            self.log.debug("proof found earlier, skipping")
+            return False
         self.log.info(f"proof found, verifying ...")
-        block = replace(self.current_block)
-        block.proof = proof
-        block.timestamp = timestamp
-        if block.verify_hash(hash):
-            self.log.info(f"stop proofing; proof: {proof}")
-            self.is_proof_found = True
-            self.current_block.proof = proof
-            self.current_block.timestamp = timestamp
-            if self.que.full():
-                self.que.get(timeout=1)
-
-            self.network.broadcast("add_block", proof, hash)
-        else:
+        if not self.__verify_proofed(proof, hash, timestamp):
+            return False
+        self.log.info(f"stop proofing; proof: {proof}")
+        self.miner.cancel()
+        self.is_proof_found = True
+        self.current_block.proof = proof
+        self.current_block.timestamp = timestamp
+        return True
+
+    def __verify_proofed(self, proof: int, hash: str, timestamp: str) -> bool:
+        """Tells if the current block, completed with the proof and the
+        timestamp, hashes to hash and meets its target."""
+        if not self.__verify_timestamp(timestamp):
+            self.log.warn(f"wrong timestamp of proofed block: {timestamp}")
+            return False
+        if not self.current_block.merkle_root:
+            self.current_block.seal()
+        block = replace(self.current_block, proof=proof, timestamp=timestamp)
+        try:
+            verified = block.verify_hash(hash) and block.verify_proof()
+        except ValueError:
+            # a timestamp too long for the header
+            verified = False
+        if not verified:
             self.log.warn("hashes don't match")
+        return verified
 
     @oneway
     @expose
-    def add_block(self, proof: int, hash: str):
+    def add_block(self, proof: int, hash: str, timestamp: Optional[str] = None):
+        """add_block appends the current block completed with the proof.
+        The timestamp is the one of the proof_found call, which add_block
+        may overtake; without it, the one accepted by proof_found is used."""
+        block = self.commands.call(self.__add_block, proof, hash, timestamp)
+        if block is None:
+            return
+        self.log.debug(f"appended block {block.index}: {hash}")
+        if self.writer is not None:
+            self.writer.put(block)
+            return
+        self.invoke_db("save_block_bytes", block.to_bytes())
+        self.log.debug("sent block to db")
+
+    def __add_block(
+        self, proof: int, hash: str, timestamp: Optional[str] = None
+    ) -> Optional[Block]:
+        """Returns the block appended to the chain, if any. The block is
+        verified as by proof_found, it is never appended with a proof which
+        does not complete it."""
         if self.current_block is None:
             self.log.debug("current block already added, no new transactions, skipping")
-            return
+            return None
+        if timestamp is None:
+            timestamp = self.current_block.timestamp
+        if not self.__verify_proofed(proof, hash, timestamp):
+            return None
 
+        self.miner.cancel()
         self.current_block.proof = proof
-        if self.current_block.index in [b.index for b in self.blocks]:
+        self.current_block.timestamp = timestamp
+        if not self.chain.append(self.current_block):
             self.log.debug("block already added, skipping")
-            return
+            return None
 
-        self.blocks.append(self.current_block)
-        self.log.debug(f"appended block: {self.current_block.to_json()}")
-        db = self.__locate_db()
-        invoke(db.save_block, self.current_block.to_json())
-        self.log.debug("sent block to db")
+        block = self.current_block
+        for transaction in block.transactions:
+            self.transaction_blocks.put(transaction.id(), block)
+            self.committed.add(transaction.id())
+        self.mempool.remove(block.transactions)
 
         self.current_block = None
         self.is_proof_found = False
+        return block
 
 
-class Network:
-    node_uris: list[str] = []
+@dataclass
+class BroadcastResult:
+    """BroadcastResult lists the nodes a broadcast was delivered to, the
+    ones which did not answer before the deadline and the ones which
+    failed, e.g. because they are not running anymore."""
+
+    method_name: str
+    delivered: list[str] = field(default_factory=list)
+    timed_out: list[str] = field(default_factory=list)
+    failed: list[str] = field(default_factory=list)
 
-    def __init__(self):
+    def all_delivered(self) -> bool:
+        return not self.timed_out and not self.failed
+
+
+class Network:
+    """Network broadcasts to the nodes registered in the nameserver.
+    The listing is cached for DEFAULT_MEMBERSHIP_TTL seconds and the
+    proxies of the nodes are pooled, see bb.common.net.pool
+
+    A broadcast is sent to all nodes in parallel, and each call has to
+    finish within timeout seconds, so a slow node only delays itself."""
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_PEER_TIMEOUT,
+        workers: int = DEFAULT_BROADCAST_WORKERS,
+    ):
         self.log = Logger(self)
+        self.timeout = timeout
+        self.proxies = ProxyPool(timeout=timeout)
+        self.db_proxies = ProxyPool()
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="broadcast")
+        self.nodes = Membership(lambda: get_all_uris(NETWORK_NODE))
+        self.dbs = Membership(lambda: get_all_uris(DB_ENDPOINT))
+
+    @property
+    def node_uris(self) -> list[str]:
+        return self.nodes.uris()
+
+    def is_leader(self, uri: str) -> bool:
+        """The leader is the node with the lowest uri on the network."""
+        return min(self.node_uris + [uri]) == uri
 
     def scan(self):
-        self.node_uris = get_all_uris(NETWORK_NODE)
+        self.nodes.invalidate()
         self.log.debug(f"discovered on network: {self.node_uris}")
 
-    def broadcast(self, method_name: Node.SupportedMethod, *args, **kwargs):
-        self.scan()
-        unreachable_nodes: list[str] = []
-        for node in self.node_uris:
-            method = getattr(proxy_of(node), method_name)
-            try:
-                invoke(method, *args, **kwargs)
-                self.log.info(f"broadcasted {method_name} to {node}")
-            except ConnectionError:
-                unreachable_nodes.append(node)
-                self.log.warn(f"unreachable node: {node}")
-
-        for unreachable_node in unreachable_nodes:
-            self.node_uris.remove(unreachable_node)
-            self.log.debug(f"removing node: {unreachable_node} from network map")
+    def broadcast(
+        self, method_name: Node.SupportedMethod, *args, **kwargs
+    ) -> BroadcastResult:
+        futures = {
+            self.pool.submit(
+                self.proxies.invoke, node, method_name, *args, **kwargs
+            ): node
+            for node in self.node_uris
+        }
+        # a call may be retried once on a new connection, see ProxyPool.invoke
+        done, not_done = wait(futures, timeout=2 * self.timeout)
+
+        result = BroadcastResult(method_name)
+        for future in not_done:
+            result.timed_out.append(futures[future])
+        for future in done:
+            node = futures[future]
+            error = future.exception()
+            if error is None:
+                result.delivered.append(node)
+            elif isinstance(error, PyroTimeoutError):
+                result.timed_out.append(node)
+            else:
+                result.failed.append(node)
+                if isinstance(error, (CommunicationError, ConnectionError)):
+                    self.log.warn(f"unreachable node: {node}")
+                    self.nodes.discard(node)
+                    self.proxies.discard(node)
+                    self.log.debug(f"removing node: {node} from network map")
+                else:
+                    self.log.error(f"{method_name} failed on {node}: {error}")
+
+        for node in result.timed_out:
+            self.log.warn(f"{method_name} timed out on {node}")
+        self.log.info(
+            f"broadcasted {method_name}: {len(result.delivered)} delivered, "
+            f"{len(result.timed_out)} timed out, {len(result.failed)} failed"
+        )
+        return result
+
+    def shutdown(self):
+        self.pool.shutdown()
+        self.proxies.close()
+        self.db_proxies.close()
@@ -0,0 +1,485 @@
+import unittest
+from dataclasses import replace
+from datetime import datetime as Timestamp
+from datetime import timedelta
+from threading import Thread
+from time import monotonic, sleep
+
+from Pyro5.server import Daemon
+
+from bb.common.block import Block, Data, Transaction
+from bb.common.config import DEFAULT_BLOCK_TIME, DEFAULT_RETARGET_INTERVAL
+from bb.common.net.papi import CommunicationError, expose
+from bb.common.net.pool import Membership
+from bb.common.pow import DEFAULT_TARGET, MAX_RETARGET_FACTOR, MAX_TARGET
+from bb.common.sec.scheme import encode_any_public_key, generate_signing_key
+
+from .chain import Chain
+from .miner import Miner
+from .network import Network, Node, RetargetError
+from .snapshot import Snapshot
+from .writer import BlockWriter
+
+
+class TestSyncedBlocks(unittest.TestCase):
+    # given
+    private_key = generate_signing_key("ed25519")
+    public_key_base64 = encode_any_public_key(private_key.public_key())
+
+    def signed(self, user_guid, T, payload) -> Transaction:
+        transaction = Transaction(user_guid=user_guid, data=Data(T=T, payload=payload))
+        transaction.sign(self.private_key)
+        return transaction
+
+    start = Timestamp(2021, 1, 1)
+
+    def mined(self, index, prev_hash, transactions, **kwargs) -> Block:
+        block = Block(
+            index=index,
+            timestamp=(self.start + timedelta(seconds=index)).isoformat(),
+            prev_hash=prev_hash,
+            transactions=transactions,
+            **kwargs,
+        )
+        block.seal()
+        block.proof_of_work()
+        return block
+
+    def setUp(self):
+        self.node = Node(Network(), Miner())
+
+    def tearDown(self):
+        self.node.intake.shutdown()
+        self.node.commands.shutdown()
+
+    def test_append_rebuilds_registry(self):
+        # given
+        genesis = self.mined(
+            0,
+            "",
+            [
+                self.signed("first_user_guid", "register", self.public_key_base64),
+                self.signed("second_user_guid", "register", self.public_key_base64),
+            ],
+        )
+        revoke = self.signed("first_user_guid", "revoke", self.public_key_base64)
+        block = self.mined(1, genesis.hash(), [revoke])
+
+        # when
+        appended = [self.node.append_synced_block(b) for b in (genesis, block)]
+
+        # then
+        self.assertEqual(appended, [True, True])
+        self.assertEqual(list(self.node.registered_users), ["second_user_guid"])
+        self.assertIs(self.node.transaction_blocks.get(revoke.id()), block)
+        self.assertIn(revoke.id(), self.node.committed)
+        self.assertEqual(self.node.chain.tip_hash, block.hash())
+        self.assertIsNone(self.node.current_block)
+        self.assertEqual(self.node.view.tip_hash, block.hash())
+        self.assertEqual(list(self.node.view.registered_users), ["second_user_guid"])
+
+    def test_verified_transactions_pooled_once(self):
+        # given
+        register = self.signed("test_user_guid", "register", self.public_key_base64)
+        data = self.signed("test_user_guid", "data", "test_payload")
+        unregistered = self.signed("other_user_guid", "data", "test_payload")
+
+        # when
+        self.node.intake.process([register, data, data, unregistered])
+        self.node.commands.flush()
+
+        # then
+        self.assertEqual(self.node.mempool.select(), [register, data])
+
+    def test_replay_with_changed_fingerprint_rejected(self):
+        # given
+        register = self.signed("test_user_guid", "register", self.public_key_base64)
+        data = self.signed("test_user_guid", "data", "test_payload")
+        replayed = replace(data, fingerprint=data.fingerprint + "\n")
+        self.node.append_synced_block(self.mined(0, "", [register, data]))
+
+        # when
+        self.node.intake.process([replayed])
+        self.node.commands.flush()
+
+        # then
+        self.assertEqual(len(self.node.mempool), 0)
+
+    def test_add_block_verifies_proof(self):
+        # given
+        register = self.signed("test_user_guid", "register", self.public_key_base64)
+        block = self.mined(0, "", [register])
+        self.node.writer = BlockWriter(lambda _: [], lambda: True, lambda: None)
+
+        def _open():
+            self.node.current_block = replace(block, proof=0, timestamp="")
+
+        self.node.commands.call(_open)
+        wrong_proof = block.proof + 1
+        wrong_hash = replace(block, proof=wrong_proof).hash()
+
+        # when
+        self.node.add_block(wrong_proof, wrong_hash, block.timestamp)
+        self.node.add_block(block.proof, "00" * 32, block.timestamp)
+        rejected = self.node.chain.next_index()
+        self.node.add_block(block.proof, block.hash(), block.timestamp)
+
+        # then
+        self.assertEqual(rejected, 0)
+        self.assertEqual(self.node.chain.tip_hash, block.hash())
+        self.assertEqual([b for b, _ in self.node.writer.pending], [block])
+
+    def test_append_rejects_broken_link(self):
+        # given
+        genesis = self.mined(0, "", [])
+        self.node.append_synced_block(genesis)
+        unlinked = self.mined(1, "00" * 32, [])
+        unproven = replace(self.mined(1, genesis.hash(), []), proof=0)
+
+        # when
+        tested = [self.node.append_synced_block(b) for b in (unlinked, unproven)]
+
+        # then
+        self.assertEqual(tested, [False, False])
+        self.assertEqual(self.node.chain.next_index(), 1)
+
+    def test_append_rejects_tampered_transactions(self):
+        # given
+        genesis = self.mined(0, "", [])
+        self.node.append_synced_block(genesis)
+        block = self.mined(
+            1, genesis.hash(), [self.signed("test_user_guid", "data", "test_payload")]
+        )
+        forged = self.signed("forged_user_guid", "register", self.public_key_base64)
+        tampered = [
+            replace(block, transactions=block.transactions + [forged]),
+            replace(block, transactions=[forged]),
+            replace(block, transactions=[]),
+        ]
+
+        # when
+        tested = [self.node.append_synced_block(b) for b in tampered]
+
+        # then
+        self.assertEqual(tested, [False, False, False])
+        self.assertTrue(all(b.verify_proof() for b in tampered))
+        self.assertEqual(self.node.view.registered_users, {})
+        self.assertIsNone(self.node.transaction_blocks.get(forged.id()))
+        self.assertEqual(self.node.chain.next_index(), 1)
+
+    def test_append_rejects_malformed_blocks(self):
+        # given
+        genesis = self.mined(0, "", [])
+        self.node.append_synced_block(genesis)
+        register = self.signed("test_user_guid", "register", self.public_key_base64)
+        block = self.mined(1, genesis.hash(), [])
+        malformed = [
+            replace(block, merkle_root="zz"),
+            replace(block, prev_hash="zz"),
+            replace(block, timestamp="2021" + "0" * 32),
+            self.mined(
+                1,
+                genesis.hash(),
+                [register, self.signed("other_user_guid", "register", "test_key")],
+            ),
+        ]
+
+        # when
+        tested = [self.node.append_synced_block(b) for b in malformed]
+
+        # then
+        self.assertEqual(tested, [False, False, False, False])
+        self.assertEqual(self.node.view.registered_users, {})
+        self.assertEqual(self.node.chain.next_index(), 1)
+
+    def test_append_rejects_earlier_version(self):
+        # given
+        genesis = self.mined(0, "", [])
+        self.node.append_synced_block(genesis)
+
+        # when
+        tested = self.node.append_synced_block(
+            self.mined(1, genesis.hash(), [], version=Block.HEADER_VERSION)
+        )
+
+        # then
+        self.assertFalse(tested)
+        self.assertEqual(self.node.chain.next_index(), 1)
+
+    def test_append_rejects_wrong_timestamps(self):
+        # given
+        genesis = self.mined(0, "", [])
+        self.node.append_synced_block(genesis)
+        block = self.mined(1, genesis.hash(), [])
+
+        for timestamp in (
+            genesis.timestamp,
+            (self.start - timedelta(seconds=1)).isoformat(),
+            (Timestamp.now() + timedelta(hours=1)).isoformat(),
+            "test_timestamp",
+        ):
+            with self.subTest(timestamp=timestamp):
+                # given
+                tampered = replace(block, timestamp=timestamp)
+                tampered.proof_of_work()
+
+                # when
+                tested = self.node.append_synced_block(tampered)
+
+                # then
+                self.assertFalse(tested)
+        self.assertTrue(self.node.append_synced_block(block))
+
+    def test_view_hides_later_blocks(self):
+        # given
+        genesis = self.mined(0, "", [])
+        self.node.append_synced_block(genesis)
+        view = self.node.view
+        block = self.mined(1, genesis.hash(), [])
+
+        # when
+        self.node.append_synced_block(block)
+
+        # then
+        self.assertEqual(view.next_index(), 1)
+        self.assertIsNone(view.get(1))
+        self.assertIsNone(view.get_by_hash(block.hash()))
+        self.assertEqual(list(view.range(0, 2)), [genesis])
+        self.assertEqual(list(self.node.view.range(0, 2)), [genesis, block])
+
+    def test_state_not_shared_between_nodes(self):
+        # given
+        other_node = Node(Network(), Miner())
+
+        # when
+        self.node.append_synced_block(self.mined(0, "", []))
+
+        # then
+        self.assertEqual(other_node.view.next_index(), 0)
+        self.assertIsNot(other_node.mempool, self.node.mempool)
+        other_node.intake.shutdown()
+        other_node.commands.shutdown()
+
+    def test_snapshot_restore(self):
+        # given
+        genesis = self.mined(
+            0, "", [self.signed("test_user_guid", "register", self.public_key_base64)]
+        )
+        self.node.append_synced_block(genesis)
+        pending = self.signed("test_user_guid", "data", "test_payload")
+        self.node.mempool.add(pending)
+        snapshot = Snapshot.from_bytes(self.node.snapshot().to_bytes())
+        restored_node = Node(Network(), Miner())
+
+        # when
+        restored_node.restore(snapshot)
+
+        # then
+        self.assertEqual(list(restored_node.registered_users), ["test_user_guid"])
+        self.assertEqual(restored_node.chain.tip_hash, genesis.hash())
+        self.assertEqual(restored_node.chain.next_index(), 1)
+        self.assertEqual(restored_node.mempool.select(), [pending])
+        self.assertIsNone(restored_node.current_block)
+        restored_node.intake.shutdown()
+        restored_node.commands.shutdown()
+
+
+class TestMissingDB(unittest.TestCase):
+    # given
+    private_key = generate_signing_key("ed25519")
+    public_key_base64 = encode_any_public_key(private_key.public_key())
+
+    def setUp(self):
+        network = Network()
+        network.dbs = Membership(lambda: [])
+        self.node = Node(network, Miner())
+
+    def tearDown(self):
+        self.node.intake.shutdown()
+        self.node.commands.shutdown()
+
+    def test_db_calls_raise_without_stopping_node(self):
+        # when
+        future = self.node.commands.submit(self.node.locate_db)
+
+        # then
+        with self.assertRaises(CommunicationError):
+            future.result(timeout=5)
+        with self.assertRaises(CommunicationError):
+            self.node.invoke_db("get_tip")
+        self.assertIsNone(self.node.get_block(0))
+        self.assertEqual(self.node.commands.call(lambda: "after"), "after")
+
+    def test_writer_keeps_blocks(self):
+        # given
+        writer = BlockWriter(
+            lambda blocks_bytes: self.node.invoke_db("save_blocks_bytes", blocks_bytes),
+            lambda: True,
+            lambda: self.node.invoke_db("get_last_index"),
+            retry_interval=0.01,
+        )
+        writer.start()
+
+        # when
+        writer.put(Block(index=0))
+        sleep(0.1)
+
+        # then
+        self.assertTrue(writer.thread.is_alive())
+        self.assertEqual(len(writer.pending), 1)
+        writer.shutdown()
+
+    def test_possibly_committed_transaction_presumed_committed(self):
+        # given
+        transaction = Transaction(
+            user_guid="test_user_guid",
+            data=Data(T="register", payload=self.public_key_base64),
+        )
+        transaction.sign(self.private_key)
+        self.node.committed.add(transaction.id())
+
+        # when
+        self.node.intake.process([transaction])
+        self.node.commands.flush()
+
+        # then
+        self.assertEqual(len(self.node.mempool), 0)
+        self.assertEqual(self.node.view.registered_users, {})
+
+
+class TestRetargeting(unittest.TestCase):
+    # given
+    start = Timestamp(2021, 1, 1)
+
+    def setUp(self):
+        self.node = Node(Network(), Miner())
+
+    def tearDown(self):
+        self.node.intake.shutdown()
+        self.node.commands.shutdown()
+
+    def append_blocks(self, count: int, block_time: float):
+        for index in range(count):
+            timestamp = self.start + timedelta(seconds=index * block_time)
+            self.node.chain.append(
+                Block(
+                    index=index,
+                    timestamp=timestamp.isoformat(timespec="milliseconds"),
+                    prev_hash=self.node.chain.tip_hash,
+                    transactions=[],
+                )
+            )
+
+    def test_target_kept_within_interval(self):
+        # given
+        self.append_blocks(DEFAULT_RETARGET_INTERVAL - 2, DEFAULT_BLOCK_TIME / 2)
+
+        # when
+        tested = self.node.next_target()
+
+        # then
+        self.assertEqual(tested, DEFAULT_TARGET)
+
+    def test_target_follows_block_time(self):
+        for block_time, expected_target in [
+            (DEFAULT_BLOCK_TIME / 2, DEFAULT_TARGET // 2),
+            (DEFAULT_BLOCK_TIME, DEFAULT_TARGET),
+            (DEFAULT_BLOCK_TIME * 2, DEFAULT_TARGET * 2),
+            (DEFAULT_BLOCK_TIME / 100, DEFAULT_TARGET // MAX_RETARGET_FACTOR),
+        ]:
+            with self.subTest(block_time=block_time):
+                # given
+                self.node.chain = Chain()
+                self.append_blocks(DEFAULT_RETARGET_INTERVAL, block_time)
+
+                # when
+                tested = self.node.next_target()
+
+                # then
+                self.assertEqual(tested, expected_target)
+
+    def test_missing_interval_start_not_guessed(self):
+        # given
+        self.node.chain.append(
+            Block(
+                index=DEFAULT_RETARGET_INTERVAL - 1,
+                timestamp=self.start.isoformat(timespec="milliseconds"),
+                transactions=[],
+            )
+        )
+        interval_start = Block(index=0, timestamp=self.start.isoformat())
+
+        # then
+        with self.assertRaises(RetargetError):
+            self.node.next_target()
+        with self.assertRaises(RetargetError):
+            self.node.next_target(replace(interval_start, index=1))
+        self.assertEqual(
+            self.node.next_target(interval_start), DEFAULT_TARGET // MAX_RETARGET_FACTOR
+        )
+
+    def test_synced_block_with_wrong_target_rejected(self):
+        # given
+        genesis = Block(index=0, prev_hash="", transactions=[], target=MAX_TARGET)
+        genesis.seal()
+        genesis.proof_of_work()
+
+        # when
+        tested = self.node.append_synced_block(genesis)
+
+        # then
+        self.assertFalse(tested)
+        self.assertEqual(self.node.chain.next_index(), 0)
+
+
+@expose
+class Peer:
+    delay = 0.0
+
+    def add_transaction(self, transaction_json: str):
+        sleep(self.delay)
+
+
+@expose
+class SlowPeer(Peer):
+    delay = 1.0
+
+
+class TestBroadcast(unittest.TestCase):
+    def setUp(self):
+        self.daemon = Daemon()
+        self.peer_uri = str(self.daemon.register(Peer))
+        self.slow_peer_uri = str(self.daemon.register(SlowPeer))
+        self.thread = Thread(target=self.daemon.requestLoop, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.daemon.shutdown()
+        self.thread.join()
+
+    def test_broadcast_classifies_peers(self):
+        # given
+        stopped_daemon = Daemon()
+        stopped_peer_uri = str(stopped_daemon.register(Peer))
+        stopped_daemon.close()
+        uris = [self.slow_peer_uri, stopped_peer_uri, self.peer_uri]
+        network = Network(timeout=0.2)
+        network.nodes = Membership(lambda: uris)
+
+        # when
+        started = monotonic()
+        tested = network.broadcast("add_transaction", "test_transaction_json")
+        elapsed = monotonic() - started
+
+        # then
+        self.assertEqual(tested.delivered, [self.peer_uri])
+        self.assertEqual(tested.timed_out, [self.slow_peer_uri])
+        self.assertEqual(tested.failed, [stopped_peer_uri])
+        self.assertFalse(tested.all_delivered())
+        self.assertLess(elapsed, SlowPeer.delay)
+        self.assertEqual(network.node_uris, [self.slow_peer_uri, self.peer_uri])
+        network.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
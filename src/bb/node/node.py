@@ -1,24 +1,99 @@
+from typing import Literal, Optional
+
+from bb.common.codec import DecodeError
+from bb.common.config import (
+    DEFAULT_MINING_WORKERS,
+    DEFAULT_SEAL_MAX_BYTES,
+    DEFAULT_SEAL_MAX_TRANSACTIONS,
+    DEFAULT_SEAL_MAX_WAIT,
+)
 from bb.common.names import NETWORK_NODE, NODE_ENDPOINT
+from bb.common.net.fapi import FrameServer
 from bb.common.net.papi import Daemon
 from bb.common.sec.guid import generate_guid
 
 from .endpoint import Endpoint
+from .miner import Miner
 from .network import Network, Node
+from .scheduler import SealScheduler
+from .snapshot import Snapshot, SnapshotWriter
+from .sync import ChainSync
+from .writer import BlockWriter
+
+Transport = Literal["pyro", "asyncio"]
+TRANSPORTS: tuple[Transport, ...] = ("pyro", "asyncio")
 
 
-def start():
-    daemon = Daemon()
+def start(
+    mining_workers: int = DEFAULT_MINING_WORKERS,
+    snapshot_path: Optional[str] = None,
+    auto_seal: bool = True,
+    seal_max_transactions: int = DEFAULT_SEAL_MAX_TRANSACTIONS,
+    seal_max_bytes: int = DEFAULT_SEAL_MAX_BYTES,
+    seal_max_wait: float = DEFAULT_SEAL_MAX_WAIT,
+    transport: Transport = "pyro",
+):
+    """Starts the node. With the asyncio transport, the endpoint and the
+    node are served by a FrameServer instead of a Pyro daemon; other nodes
+    and clients pick the transport from the registered uri."""
+    daemon = Daemon() if transport == "pyro" else FrameServer()
     network = Network()
-    node = Node(network)
+    miner = Miner(mining_workers)
+    node = Node(network, miner)
     endpoint = Endpoint(network, node)
+    endpoint.gossip.start()
+
+    snapshot_writer = None
+    if snapshot_path is not None:
+        try:
+            snapshot = Snapshot.load(snapshot_path)
+        except DecodeError as e:
+            node.log.warn(f"ignoring damaged snapshot {snapshot_path}: {e}")
+            snapshot = None
+        if snapshot is not None:
+            node.restore(snapshot)
+        snapshot_writer = SnapshotWriter(node.snapshot, snapshot_path)
+
+    ChainSync(node).sync()
+    if snapshot_writer is not None:
+        snapshot_writer.start()
 
     endpoint_name = f"{NODE_ENDPOINT}.{generate_guid()}"
     daemon.register(endpoint, endpoint_name)
 
     network_node_name = f"{NETWORK_NODE}.{generate_guid()}"
-    daemon.register(node, network_node_name)
+    network_node_uri = daemon.register(node, network_node_name)
 
     network.scan()
 
+    node.writer = BlockWriter(
+        lambda blocks_bytes: node.invoke_db("save_blocks_bytes", blocks_bytes),
+        lambda: network.is_leader(network_node_uri),
+        lambda: node.invoke_db("get_last_index"),
+    )
+    node.writer.start()
+
+    seal_scheduler = None
+    if auto_seal:
+        seal_scheduler = SealScheduler(
+            node,
+            network,
+            network_node_uri,
+            seal_max_transactions,
+            seal_max_bytes,
+            seal_max_wait,
+        )
+        seal_scheduler.start()
+
     daemon.start()
     daemon.shutdown_with_ns_cleanup()
+    if seal_scheduler is not None:
+        seal_scheduler.shutdown()
+    endpoint.gossip.shutdown()
+    node.intake.shutdown()
+    if snapshot_writer is not None:
+        snapshot_writer.shutdown()
+    node.commands.shutdown()
+    node.writer.shutdown()
+    miner.shutdown()
+    network.shutdown()
@@ -0,0 +1,94 @@
+from threading import Event, Thread
+from time import monotonic
+from typing import Optional
+
+from bb.common.config import (
+    DEFAULT_SEAL_CHECK_INTERVAL,
+    DEFAULT_SEAL_MAX_BYTES,
+    DEFAULT_SEAL_MAX_TRANSACTIONS,
+    DEFAULT_SEAL_MAX_WAIT,
+)
+from bb.common.log import Logger
+from bb.node.network import Network, Node
+
+
+class SealScheduler:
+    """SealScheduler starts a proofing round, like Endpoint.commit, once the
+    mempool holds max_transactions transactions or max_bytes bytes, or its
+    oldest transaction has waited max_wait seconds, whichever comes first.
+
+    Every node runs a scheduler, but only the leader, the node with the
+    lowest uri on the network, starts rounds, and only while no block is
+    being proofed, so one round runs at a time. If the leader leaves, the
+    next node takes over once the network map is refreshed."""
+
+    def __init__(
+        self,
+        node: Node,
+        network: Network,
+        uri: str,
+        max_transactions: int = DEFAULT_SEAL_MAX_TRANSACTIONS,
+        max_bytes: int = DEFAULT_SEAL_MAX_BYTES,
+        max_wait: float = DEFAULT_SEAL_MAX_WAIT,
+        interval: float = DEFAULT_SEAL_CHECK_INTERVAL,
+    ):
+        self.log = Logger(self)
+        self.node = node
+        self.network = network
+        self.uri = uri
+        self.max_transactions = max_transactions
+        self.max_bytes = max_bytes
+        self.max_wait = max_wait
+        self.interval = interval
+        self.last_round: Optional[tuple[int, float]] = None
+        """index of the block the last round was started for, and when"""
+        self.stopped = Event()
+        self.thread = Thread(target=self.__run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def shutdown(self):
+        self.stopped.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+    def __run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.tick()
+            except Exception as e:
+                self.log.error(f"could not schedule sealing: {e}")
+
+    def is_leader(self) -> bool:
+        return self.network.is_leader(self.uri)
+
+    def is_due(self) -> bool:
+        mempool = self.node.mempool
+        oldest_age = mempool.oldest_age()
+        return oldest_age is not None and (
+            len(mempool) >= self.max_transactions
+            or mempool.size >= self.max_bytes
+            or oldest_age >= self.max_wait
+        )
+
+    def is_round_running(self) -> bool:
+        """A round runs from when it is started until its block is added.
+        A round whose block was not opened in max_wait seconds, e.g. as
+        start_proofing was lost, is considered over."""
+        view = self.node.view
+        if view.is_proofing:
+            return True
+        if self.last_round is None:
+            return False
+        index, started = self.last_round
+        return index == view.next_index() and monotonic() - started < self.max_wait
+
+    def tick(self) -> bool:
+        """Returns True if a round was started."""
+        if self.is_round_running() or not self.is_due() or not self.is_leader():
+            return False
+        self.last_round = (self.node.view.next_index(), monotonic())
+        self.log.info(f"sealing {len(self.node.mempool)} pending transactions")
+        self.network.broadcast("start_proofing")
+        return True
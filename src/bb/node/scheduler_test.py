@@ -0,0 +1,95 @@
+import unittest
+
+from bb.common.block import Block, Data, Transaction
+from bb.common.net.pool import Membership
+
+from .miner import Miner
+from .network import BroadcastResult, Network, Node
+from .scheduler import SealScheduler
+
+
+class RecordingNetwork(Network):
+    def __init__(self, uris: list[str]):
+        super().__init__()
+        self.nodes = Membership(lambda: uris)
+        self.broadcasts: list[str] = []
+
+    def broadcast(self, method_name, *args, **kwargs) -> BroadcastResult:
+        self.broadcasts.append(method_name)
+        return BroadcastResult(method_name)
+
+
+class TestSealScheduler(unittest.TestCase):
+    def setUp(self):
+        self.network = RecordingNetwork(["test_uri_a", "test_uri_b"])
+        self.node = Node(self.network, Miner())
+
+    def tearDown(self):
+        self.node.intake.shutdown()
+        self.node.commands.shutdown()
+        self.network.shutdown()
+
+    def pend(self, count: int):
+        for i in range(count):
+            self.node.mempool.add(
+                Transaction(
+                    user_guid=f"test_user_guid_{i}",
+                    data=Data(T="data", payload="test_payload"),
+                )
+            )
+
+    def scheduler(self, uri: str = "test_uri_a", **kwargs) -> SealScheduler:
+        return SealScheduler(self.node, self.network, uri, **kwargs)
+
+    def test_seals_when_full(self):
+        # given
+        scheduler = self.scheduler(max_transactions=3, max_wait=60)
+        self.pend(2)
+
+        # when
+        not_full = scheduler.tick()
+        self.pend(3)
+        full = scheduler.tick()
+        running = scheduler.tick()
+
+        # then
+        self.assertEqual([not_full, full, running], [False, True, False])
+        self.assertEqual(self.network.broadcasts, ["start_proofing"])
+
+    def test_seals_after_wait(self):
+        # given
+        scheduler = self.scheduler(max_wait=0)
+
+        # when
+        empty = scheduler.tick()
+        self.pend(1)
+        waited = scheduler.tick()
+
+        # then
+        self.assertEqual([empty, waited], [False, True])
+
+    def test_only_leader_seals(self):
+        # given
+        scheduler = self.scheduler("test_uri_b", max_wait=0)
+        self.pend(1)
+
+        # when
+        tested = scheduler.tick()
+
+        # then
+        self.assertFalse(scheduler.is_leader())
+        self.assertFalse(tested)
+
+    def test_waits_for_running_round(self):
+        # given
+        scheduler = self.scheduler(max_wait=0)
+        self.pend(1)
+        self.node.commands.call(setattr, self.node, "current_block", Block(index=0))
+
+        # then
+        self.assertTrue(scheduler.is_round_running())
+        self.assertFalse(scheduler.tick())
+
+
+if __name__ == "__main__":
+    unittest.main()
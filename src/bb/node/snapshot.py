@@ -0,0 +1,149 @@
+import os
+import zlib
+from dataclasses import dataclass
+from threading import Event, Thread
+from typing import Callable, Optional
+
+from bb.common.block import Block
+from bb.common.bloom import ScalableBloomFilter
+from bb.common.codec import DecodeError, Reader, Writer
+from bb.common.config import DEFAULT_SNAPSHOT_INTERVAL
+from bb.common.log import Logger
+from bb.common.sec.scheme import PublicKey, public_key_from_der, public_key_to_der
+
+SNAPSHOT_MAGIC = b"BBSNAP"
+SNAPSHOT_VERSION = 1
+CHECKSUM_SIZE = 4
+
+
+def write_atomically(path: str, data: bytes):
+    """Writes the data to a temporary file first and moves it into place,
+    so a crash leaves either the old or the new file, never a torn one."""
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary_path, path)
+
+
+@dataclass
+class Snapshot:
+    """Snapshot is the state a node needs to resume without replaying the
+    whole chain: the user registry, the tip of the chain and the block
+    being filled with transactions, and the filter of committed transaction
+    ids. Public keys are kept DER encoded and blocks in their binary
+    encoding, followed by a CRC32 of the snapshot."""
+
+    registered_users: dict[str, PublicKey]
+    tip: Optional[Block] = None
+    current_block: Optional[Block] = None
+    committed: Optional[ScalableBloomFilter] = None
+
+    def to_bytes(self) -> bytes:
+        writer = Writer()
+        writer.raw(SNAPSHOT_MAGIC)
+        writer.uint(SNAPSHOT_VERSION)
+        writer.uint(len(self.registered_users))
+        for user_guid, public_key in self.registered_users.items():
+            writer.str(user_guid)
+            writer.bytes(public_key_to_der(public_key))
+        for block in (self.tip, self.current_block):
+            writer.bytes(block.to_bytes() if block is not None else b"")
+        writer.uint(self.committed is not None)
+        if self.committed is not None:
+            self.committed.write(writer)
+        writer.raw(zlib.crc32(writer.buffer).to_bytes(CHECKSUM_SIZE, "big"))
+        return writer.to_bytes()
+
+    @staticmethod
+    def from_bytes(serialized_snapshot: bytes | memoryview) -> "Snapshot":
+        view = memoryview(serialized_snapshot)
+        body, checksum = view[:-CHECKSUM_SIZE], view[-CHECKSUM_SIZE:]
+        if zlib.crc32(body) != int.from_bytes(checksum, "big"):
+            raise DecodeError("snapshot checksum mismatch")
+        reader = Reader(body)
+        if reader.raw(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise DecodeError("not a snapshot")
+        version = reader.uint()
+        if version != SNAPSHOT_VERSION:
+            raise DecodeError(f"unsupported snapshot version: {version}")
+        registered_users = {}
+        for _ in range(reader.uint()):
+            user_guid = reader.str()
+            try:
+                registered_users[user_guid] = public_key_from_der(reader.bytes())
+            except ValueError as e:
+                raise DecodeError(f"invalid public key of {user_guid}: {e}")
+        tip = read_optional_block(reader)
+        current_block = read_optional_block(reader)
+        committed = None
+        if reader.uint():
+            committed = ScalableBloomFilter.read(reader)
+        reader.expect_end()
+        return Snapshot(registered_users, tip, current_block, committed)
+
+    def save(self, path: str):
+        write_atomically(path, self.to_bytes())
+
+    @staticmethod
+    def load(path: str) -> Optional["Snapshot"]:
+        """Returns None if there is no snapshot at the path,
+        raises DecodeError if it is damaged."""
+        try:
+            with open(path, "rb") as f:
+                return Snapshot.from_bytes(f.read())
+        except FileNotFoundError:
+            return None
+
+
+def read_optional_block(reader: Reader) -> Optional[Block]:
+    block_bytes = reader.bytes()
+    return Block.from_bytes(block_bytes) if len(block_bytes) else None
+
+
+class SnapshotWriter:
+    """SnapshotWriter saves the snapshots taken by capture every interval
+    seconds in a background thread, skipping the ones equal to the last
+    saved, and once more on shutdown."""
+
+    def __init__(
+        self,
+        capture: Callable[[], Snapshot],
+        path: str,
+        interval: float = DEFAULT_SNAPSHOT_INTERVAL,
+    ):
+        self.log = Logger(self)
+        self.capture = capture
+        self.path = path
+        self.interval = interval
+        self.last_saved: Optional[bytes] = None
+        self.stopped = Event()
+        self.thread = Thread(target=self.__run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def shutdown(self):
+        self.stopped.set()
+        if self.thread.is_alive():
+            self.thread.join()
+        self.save()
+
+    def __run(self):
+        while not self.stopped.wait(self.interval):
+            self.save()
+
+    def save(self) -> bool:
+        """Returns False, without writing, if nothing changed."""
+        try:
+            snapshot_bytes = self.capture().to_bytes()
+        except Exception as e:
+            self.log.error(f"could not take snapshot: {e}")
+            return False
+        if snapshot_bytes == self.last_saved:
+            return False
+        write_atomically(self.path, snapshot_bytes)
+        self.last_saved = snapshot_bytes
+        self.log.debug(f"saved snapshot to {self.path}")
+        return True
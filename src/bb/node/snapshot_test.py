@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+
+from bb.common.block import Block, Data, Transaction
+from bb.common.bloom import ScalableBloomFilter
+from bb.common.codec import DecodeError
+from bb.common.sec.scheme import generate_signing_key
+
+from .snapshot import Snapshot, SnapshotWriter
+
+
+class TestSnapshot(unittest.TestCase):
+    # given
+    private_key = generate_signing_key("ed25519")
+    rsa_private_key = generate_signing_key("rsa")
+    transaction = Transaction(
+        user_guid="test_user_guid", data=Data(T="data", payload="test_payload")
+    )
+    transaction.sign(private_key)
+    tip = Block(index=3, prev_hash="00" * 32, transactions=[transaction])
+    tip.seal()
+    snapshot = Snapshot(
+        registered_users={
+            "test_user_guid": private_key.public_key(),
+            "test_rsa_user_guid": rsa_private_key.public_key(),
+        },
+        tip=tip,
+        current_block=Block(index=4, prev_hash=tip.hash(), transactions=[transaction]),
+        committed=ScalableBloomFilter(100, 0.01),
+    )
+    snapshot.committed.add(transaction.id())  # type: ignore
+
+    def test_round_trip(self):
+        for snapshot in [self.snapshot, Snapshot(registered_users={})]:
+            with self.subTest(snapshot=snapshot):
+                # when
+                tested = Snapshot.from_bytes(snapshot.to_bytes())
+
+                # then
+                self.assertEqual(tested.to_bytes(), snapshot.to_bytes())
+                self.assertEqual(tested.tip, snapshot.tip)
+                self.assertEqual(tested.current_block, snapshot.current_block)
+                self.assertEqual(tested.committed is None, snapshot.committed is None)
+                self.assertEqual(
+                    list(tested.registered_users), list(snapshot.registered_users)
+                )
+
+    def test_damaged(self):
+        # given
+        snapshot_bytes = bytearray(self.snapshot.to_bytes())
+        snapshot_bytes[len(snapshot_bytes) // 2] ^= 0xFF
+
+        # then
+        with self.assertRaises(DecodeError):
+            Snapshot.from_bytes(snapshot_bytes)
+
+    def test_writer_saves_changes_only(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # given
+            path = os.path.join(directory, "node.snapshot")
+            snapshots = [self.snapshot, self.snapshot, Snapshot(registered_users={})]
+            writer = SnapshotWriter(lambda: snapshots.pop(0), path)
+
+            # when
+            saved = [writer.save() for _ in range(3)]
+            tested = Snapshot.load(path)
+
+            # then
+            self.assertEqual(saved, [True, False, True])
+            self.assertEqual(tested, Snapshot(registered_users={}))
+            self.assertEqual(os.listdir(directory), ["node.snapshot"])
+            self.assertIsNone(Snapshot.load(os.path.join(directory, "missing")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+from bb.common.block import Block
+from bb.common.codec import DecodeError
+from bb.common.config import DEFAULT_SYNC_BATCH_SIZE
+from bb.common.log import Logger
+from bb.common.names import DB_ENDPOINT, NODE_ENDPOINT
+from bb.common.net.papi import (
+    CommunicationError,
+    Proxy,
+    get_all_uris,
+    invoke_stream,
+    proxy_of,
+    received_bytes,
+)
+from bb.node.network import Node
+
+
+class SyncError(Exception):
+    pass
+
+
+class ChainSync:
+    """ChainSync brings the chain of a node up to date before it joins the
+    network. Blocks after the node's tip are streamed from a source with
+    get_range_bytes, in batches of batch_size, and appended one at a time,
+    so the chain is never held in memory twice. Streaming stops at the
+    first block which does not extend the tip."""
+
+    def __init__(self, node: Node, batch_size: int = DEFAULT_SYNC_BATCH_SIZE):
+        self.log = Logger(self)
+        self.node = node
+        self.batch_size = batch_size
+
+    def sync_from(self, source: Proxy) -> int:
+        """Returns the number of blocks appended. Raises SyncError if the
+        source streams a block which does not extend the tip."""
+        synced = 0
+        while True:
+            start = self.node.view.next_index()
+            batch = invoke_stream(
+                source, "get_range_bytes", start, start + self.batch_size
+            )
+            streamed = 0
+            for block_bytes in batch:
+                try:
+                    block = Block.from_bytes(received_bytes(block_bytes))
+                except DecodeError as e:
+                    raise SyncError(
+                        f"malformed block after {synced} synced blocks: {e}"
+                    )
+                if not self.node.append_synced_block(block):
+                    raise SyncError(f"invalid block after {synced} synced blocks")
+                streamed += 1
+            synced += streamed
+            if streamed == 0:
+                return synced
+            self.log.debug(f"synced up to block {self.node.view.next_index() - 1}")
+
+    def sync(self) -> int:
+        """Syncs from the DB first, then tops up from the other nodes,
+        which may hold blocks not saved yet. Unreachable or invalid sources
+        are skipped."""
+        synced = 0
+        for uri in get_all_uris(DB_ENDPOINT) + get_all_uris(NODE_ENDPOINT):
+            try:
+                synced += self.sync_from(proxy_of(uri))
+            except (CommunicationError, SyncError) as e:
+                self.log.warn(f"could not sync from {uri}: {e}")
+        self.log.info(
+            f"synced {synced} blocks, {len(self.node.view.registered_users)} users"
+        )
+        return synced
@@ -0,0 +1,125 @@
+from collections import deque
+from itertools import islice
+from threading import Condition, Thread
+from time import monotonic
+from typing import Callable, Optional
+
+from bb.common.block import Block
+from bb.common.config import (
+    DEFAULT_WRITE_BATCH_SIZE,
+    DEFAULT_WRITE_RETRY_INTERVAL,
+    DEFAULT_WRITE_TAKEOVER_AFTER,
+)
+from bb.common.log import Logger
+
+
+class BlockWriter:
+    """BlockWriter saves the blocks appended to the chain to the DB in a
+    background thread, so adding a block does not wait for the DB. The
+    blocks appended while a batch is being saved are sent together in the
+    next one, see Database.save_blocks_bytes, which syncs once per batch.
+
+    Every node appends the same blocks, but only the writer, the leader of
+    the network, sends them. The other nodes keep their blocks until the
+    DB stores them, as told by last_stored, and send them themselves if it
+    has not after takeover_after seconds, e.g. as the leader crashed while
+    still listed in the nameserver; the DB skips the ones it has."""
+
+    def __init__(
+        self,
+        save: Callable[[list[bytes]], list[int]],
+        is_writer: Callable[[], bool],
+        last_stored: Callable[[], Optional[int]],
+        batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+        retry_interval: float = DEFAULT_WRITE_RETRY_INTERVAL,
+        takeover_after: float = DEFAULT_WRITE_TAKEOVER_AFTER,
+    ):
+        self.log = Logger(self)
+        self.save = save
+        self.is_writer = is_writer
+        self.last_stored = last_stored
+        self.batch_size = batch_size
+        self.retry_interval = retry_interval
+        self.takeover_after = takeover_after
+        self.pending: deque[tuple[Block, float]] = deque()
+        """pending blocks and when they were put, removed only once the DB
+        stored them"""
+        self.changed = Condition()
+        self.stopped = False
+        self.thread = Thread(target=self.__run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def put(self, block: Block):
+        with self.changed:
+            self.pending.append((block, monotonic()))
+            self.changed.notify()
+
+    def shutdown(self):
+        """Stops the writer, trying once more to save the pending blocks."""
+        with self.changed:
+            self.stopped = True
+            self.changed.notify()
+        if self.thread.is_alive():
+            self.thread.join()
+        try:
+            self.write()
+        except Exception as e:
+            self.log.error(f"could not save blocks: {e}")
+
+    def __run(self):
+        while True:
+            with self.changed:
+                self.changed.wait_for(lambda: self.pending or self.stopped)
+                if self.stopped:
+                    return
+            try:
+                written = self.write()
+            except Exception as e:
+                self.log.error(f"could not save blocks: {e}")
+                written = False
+            if not written:
+                with self.changed:
+                    self.changed.wait_for(lambda: self.stopped, self.retry_interval)
+
+    def write(self) -> bool:
+        """Sends the pending blocks in batches. Returns False if some are
+        left, as the DB did not answer, or this node is not the writer and
+        the writer may still save them."""
+        if not self.is_writer() and not self.__take_over():
+            return False
+        while True:
+            with self.changed:
+                batch = [block for block, _ in islice(self.pending, self.batch_size)]
+            if not batch:
+                return True
+            try:
+                stored = self.save([block.to_bytes() for block in batch])
+            except Exception as e:
+                self.log.warn(f"could not save {len(batch)} blocks: {e}")
+                return False
+            with self.changed:
+                # blocks are only appended meanwhile, the batch is still first
+                for _ in batch:
+                    self.pending.popleft()
+            self.log.debug(f"db acknowledged blocks {stored}")
+
+    def __take_over(self) -> bool:
+        """Drops the pending blocks the DB stored, and tells if the others
+        waited too long for the writer."""
+        last_stored = self.last_stored()
+        with self.changed:
+            while (
+                self.pending
+                and last_stored is not None
+                and self.pending[0][0].index <= last_stored
+            ):
+                self.pending.popleft()
+            if not self.pending:
+                return True
+            waited = monotonic() - self.pending[0][1]
+        if waited < self.takeover_after:
+            return False
+        self.log.warn(f"blocks not saved by the writer for {waited:.1f}s, saving")
+        return True
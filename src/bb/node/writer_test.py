@@ -0,0 +1,117 @@
+import unittest
+from threading import Event
+
+from bb.common.block import Block, block_index_of
+from bb.common.net.papi import CommunicationError
+
+from .writer import BlockWriter
+
+
+class TestBlockWriter(unittest.TestCase):
+    # given
+    blocks = [Block(index=i, prev_hash="") for i in range(4)]
+
+    def setUp(self):
+        self.batches: list[list[int]] = []
+        self.is_writer = True
+        self.last_stored = None
+        self.failing = False
+
+    def save(self, blocks_bytes: list[bytes]) -> list[int]:
+        if self.failing:
+            raise CommunicationError("test_error")
+        indexes = [block_index_of(block_bytes) for block_bytes in blocks_bytes]
+        self.batches.append(indexes)
+        return indexes
+
+    def writer(self, **kwargs) -> BlockWriter:
+        return BlockWriter(
+            self.save, lambda: self.is_writer, lambda: self.last_stored, **kwargs
+        )
+
+    def test_blocks_put_while_saving_batched(self):
+        # given
+        saving, released = Event(), Event()
+
+        def _save(blocks_bytes: list[bytes]) -> list[int]:
+            saving.set()
+            released.wait(timeout=5)
+            return self.save(blocks_bytes)
+
+        writer = BlockWriter(_save, lambda: True, lambda: None)
+        writer.start()
+
+        # when
+        writer.put(self.blocks[0])
+        saving.wait(timeout=5)
+        for block in self.blocks[1:]:
+            writer.put(block)
+        released.set()
+        writer.shutdown()
+
+        # then
+        self.assertEqual(self.batches, [[0], [1, 2, 3]])
+        self.assertFalse(writer.pending)
+
+    def test_batch_size(self):
+        # given
+        writer = self.writer(batch_size=3)
+        for block in self.blocks:
+            writer.put(block)
+
+        # when
+        tested = writer.write()
+
+        # then
+        self.assertTrue(tested)
+        self.assertEqual(self.batches, [[0, 1, 2], [3]])
+
+    def test_only_writer_saves(self):
+        # given
+        self.is_writer = False
+        self.last_stored = 1
+        writer = self.writer(takeover_after=60)
+        for block in self.blocks:
+            writer.put(block)
+
+        # when
+        not_writer = writer.write()
+        self.is_writer = True
+        writer_elected = writer.write()
+
+        # then
+        self.assertEqual([not_writer, writer_elected], [False, True])
+        self.assertEqual(self.batches, [[2, 3]])
+
+    def test_blocks_saved_when_writer_does_not(self):
+        # given
+        self.is_writer = False
+        writer = self.writer(takeover_after=0)
+        writer.put(self.blocks[0])
+
+        # when
+        tested = writer.write()
+
+        # then
+        self.assertTrue(tested)
+        self.assertEqual(self.batches, [[0]])
+
+    def test_blocks_kept_until_acknowledged(self):
+        # given
+        writer = self.writer()
+        writer.put(self.blocks[0])
+        self.failing = True
+
+        # when
+        failed = writer.write()
+        self.failing = False
+        retried = writer.write()
+
+        # then
+        self.assertEqual([failed, retried], [False, True])
+        self.assertEqual(self.batches, [[0]])
+        self.assertFalse(writer.pending)
+
+
+if __name__ == "__main__":
+    unittest.main()
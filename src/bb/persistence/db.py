@@ -1,49 +1,230 @@
 import os
+import shutil
+from typing import Iterator, Optional
 
-from bb.common.block import Block
+from bb.common.block import Block, block_bytes_to_json, block_index_of
+from bb.common.codec import DecodeError
 from bb.common.log import Logger
 from bb.common.names import DB_ENDPOINT
-from bb.common.net.papi import Daemon, expose
+from bb.common.net.papi import Daemon, expose, received_bytes
+from bb.persistence.index import TransactionIndex
+from bb.persistence.store import BlockStore
 
 
 class DBBackend:
-    def save_block(self, block_json: str):
-        with open("data/blocks.txt", "a+") as blocks_file:
-            blocks_file.write(f"{block_json}\n")
+    def __init__(self, directory: str = "data"):
+        self.directory = directory
+        self.blocks = BlockStore(os.path.join(directory, "blocks"))
+        self.transactions = TransactionIndex(
+            os.path.join(directory, "transactions.sqlite")
+        )
+        self.data_file = open(os.path.join(directory, "data.txt"), "a+")
+        self.__import_legacy_blocks()
+
+    def __import_legacy_blocks(self):
+        """Moves blocks from the blocks.txt file used by earlier versions
+        into the block store."""
+        legacy_path = os.path.join(self.directory, "blocks.txt")
+        if not os.path.exists(legacy_path):
+            return
+        with open(legacy_path, "r") as blocks_file:
+            for block_json in blocks_file:
+                block = Block.from_json(block_json.rstrip("\n"))
+                self.save_block(block.index, block.to_bytes())
+        os.remove(legacy_path)
+
+    def has_block(self, block_index: int) -> bool:
+        return block_index in self.blocks
+
+    def save_block(self, block_index: int, block_bytes: bytes) -> bool:
+        return self.blocks.append(block_index, block_bytes)
+
+    def sync(self):
+        """Syncs the blocks saved so far to disk."""
+        self.blocks.flush(sync=True)
+
+    def read_block(self, block_index: int) -> Optional[str]:
+        record = self.blocks.read(block_index)
+        if not record:
+            return None
+        return block_bytes_to_json(record)
+
+    def read_block_bytes(self, block_index: int) -> Optional[bytes]:
+        return self.blocks.read(block_index) or None
 
     def save_data(self, data: str):
-        with open("data/data.txt", "a+") as data_file:
-            data_file.write(f"{data}\n")
+        self.data_file.write(f"{data}\n")
+        self.data_file.flush()
 
     def cleanup(self):
-        if os.path.exists("data/blocks.txt"):
-            os.remove("data/blocks.txt")
-        if os.path.exists("data/data.txt"):
-            os.remove("data/data.txt")
+        self.blocks.close()
+        self.transactions.close()
+        self.data_file.close()
+        shutil.rmtree(os.path.join(self.directory, "blocks"), ignore_errors=True)
+        for name in os.listdir(self.directory):
+            if name.startswith("transactions"):
+                os.remove(os.path.join(self.directory, name))
+        if os.path.exists(os.path.join(self.directory, "data.txt")):
+            os.remove(os.path.join(self.directory, "data.txt"))
 
 
 class Database:
-    saved_block_indexes: list[int] = []
-
     def __init__(self, db_backend: DBBackend):
         self.db_backend = db_backend
         self.log = Logger(self)
+        self.__index_saved_blocks()
+
+    def __index_saved_blocks(self):
+        """Indexes the blocks saved after the last one in the transaction
+        index, e.g. before a crash; the others are not read."""
+        transactions = self.db_backend.transactions
+        last_indexed = transactions.last_indexed_block
+        for block_index in self.db_backend.blocks.keys():
+            if last_indexed is not None and block_index <= last_indexed:
+                continue
+            block = Block.from_bytes(self.db_backend.read_block_bytes(block_index))  # type: ignore
+            transactions.add_block(block)
 
     @expose
     def save_block(self, block_json: str):
         block = Block.from_json(block_json)
-        if block.index in self.saved_block_indexes:
+        self.__save_block(block, block.to_bytes())
+
+    @expose
+    def save_block_bytes(self, block_bytes: bytes):
+        """save_block_bytes is save_block for the binary encoding of the
+        block, which is stored as it is"""
+        block_bytes = received_bytes(block_bytes)
+        self.__save_block(Block.from_bytes(block_bytes), block_bytes)
+
+    @expose
+    def save_blocks_bytes(self, blocks_bytes: list[bytes]) -> list[int]:
+        """save_blocks_bytes saves a batch of binary encoded blocks and syncs
+        them to disk at once, before indexing them. Returns the indexes of
+        the blocks of the batch which are stored, including the ones saved
+        earlier, which are skipped without decoding more than their index.
+        Malformed blocks are skipped; the batch is decoded before any block
+        is saved."""
+        decoded: list[tuple[int, Optional[Block], bytes]] = []
+        for block_bytes in blocks_bytes:
+            try:
+                block_bytes = received_bytes(block_bytes)
+                block_index = block_index_of(block_bytes)
+                block = None
+                if not self.db_backend.has_block(block_index):
+                    block = Block.from_bytes(block_bytes)
+            except (DecodeError, ValueError, TypeError, KeyError) as e:
+                self.log.warn(f"malformed block in batch skipped: {e}")
+                continue
+            decoded.append((block_index, block, block_bytes))
+
+        stored = []
+        saved = []
+        try:
+            for block_index, block, block_bytes in decoded:
+                if block is not None and self.db_backend.save_block(
+                    block_index, block_bytes
+                ):
+                    saved.append(block)
+                stored.append(block_index)
+            if saved:
+                self.db_backend.sync()
+        finally:
+            # blocks once appended are skipped when sent again, so they are
+            # indexed even if the batch fails
+            for block in saved:
+                self.__commit_block(block)
+        self.log.debug(f"saved {len(saved)} of {len(stored)} blocks in batch")
+        return stored
+
+    def __save_block(self, block: Block, block_bytes: bytes):
+        if not self.db_backend.save_block(block.index, block_bytes):
             self.log.debug("duplicate block arrived, skipping")
             return
+        self.__commit_block(block)
 
-        self.saved_block_indexes.append(block.index)
-        self.db_backend.save_block(block_json)
-        self.log.info(f"saved block: {block_json}")
+    def __commit_block(self, block: Block):
+        self.log.info(f"saved block {block.index}: {block.hash()}")
+        self.db_backend.transactions.add_block(block)
         for transaction in block.transactions:
             if transaction.data.T == "data":
                 self.db_backend.save_data(transaction.data.payload)
                 self.log.info(f"saved data: {transaction.data.payload}")
 
+    @expose
+    def get_block(self, index: int) -> Optional[str]:
+        return self.db_backend.read_block(index)
+
+    @expose
+    def get_range(self, start: int, end: int) -> Iterator[str]:
+        """Streams saved blocks with indexes from start up to end (exclusive)."""
+        last_index = self.db_backend.blocks.last_key
+        if last_index is None:
+            return
+        for index in range(start, min(end, last_index + 1)):
+            block_json = self.db_backend.read_block(index)
+            if block_json is not None:
+                yield block_json
+
+    @expose
+    def get_last_index(self) -> Optional[int]:
+        return self.db_backend.blocks.last_key
+
+    @expose
+    def get_tip(self) -> Optional[str]:
+        last_index = self.db_backend.blocks.last_key
+        return (
+            self.db_backend.read_block(last_index) if last_index is not None else None
+        )
+
+    @expose
+    def get_block_by_hash(self, hash: str) -> Optional[str]:
+        index = self.db_backend.transactions.get_block_index(hash)
+        return self.db_backend.read_block(index) if index is not None else None
+
+    @expose
+    def get_block_bytes(self, index: int) -> Optional[bytes]:
+        return self.db_backend.read_block_bytes(index)
+
+    @expose
+    def get_range_bytes(self, start: int, end: int) -> Iterator[bytes]:
+        last_index = self.db_backend.blocks.last_key
+        if last_index is None:
+            return
+        for index in range(start, min(end, last_index + 1)):
+            block_bytes = self.db_backend.read_block_bytes(index)
+            if block_bytes is not None:
+                yield block_bytes
+
+    @expose
+    def get_tip_bytes(self) -> Optional[bytes]:
+        last_index = self.db_backend.blocks.last_key
+        if last_index is None:
+            return None
+        return self.db_backend.read_block_bytes(last_index)
+
+    @expose
+    def get_block_by_hash_bytes(self, hash: str) -> Optional[bytes]:
+        index = self.db_backend.transactions.get_block_index(hash)
+        return self.db_backend.read_block_bytes(index) if index is not None else None
+
+    @expose
+    def has_transactions(self, transaction_ids: list[str]) -> list[bool]:
+        """Tells for each transaction id if the transaction is committed."""
+        transactions = self.db_backend.transactions
+        return [transaction_id in transactions for transaction_id in transaction_ids]
+
+    @expose
+    def get_inclusion_proof(self, transaction_id: str) -> Optional[str]:
+        block_index = self.db_backend.transactions.get(transaction_id)
+        if block_index is None:
+            return None
+        block_bytes = self.db_backend.read_block_bytes(block_index)
+        if block_bytes is None:
+            return None
+        proof = Block.from_bytes(block_bytes).inclusion_proof(transaction_id)
+        return proof.to_json() if proof is not None else None
+
     def cleanup(self):
         self.log.debug("cleaning up")
         self.db_backend.cleanup()
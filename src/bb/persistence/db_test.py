@@ -0,0 +1,134 @@
+import os
+import tempfile
+import unittest
+from dataclasses import replace
+
+from bb.common.block import Block, Data, Transaction
+
+from .db import Database, DBBackend
+
+
+class TestDatabase(unittest.TestCase):
+    # given
+    blocks = [
+        Block(
+            index=i,
+            prev_hash="",
+            transactions=[
+                Transaction(
+                    user_guid=f"test_user_guid_{i}",
+                    data=Data(T="register", payload="test_payload"),
+                )
+            ],
+        )
+        for i in range(2)
+    ]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.backend = DBBackend(self.tmp.name)
+
+    def tearDown(self):
+        self.backend.cleanup()
+        self.tmp.cleanup()
+
+    def test_legacy_blocks_imported(self):
+        # given
+        legacy_block = replace(self.blocks[0], version=Block.LEGACY_VERSION)
+        block = self.blocks[1]
+        with open(os.path.join(self.tmp.name, "blocks.txt"), "w") as blocks_file:
+            blocks_file.write(f"{legacy_block.to_json()}\n")
+        self.backend.cleanup()
+        self.backend = DBBackend(self.tmp.name)
+        database = Database(self.backend)
+
+        # when
+        database.save_block_bytes(block.to_bytes())
+
+        # then
+        tested = [legacy_block, block]
+        for b in tested:
+            self.assertEqual(database.get_block(b.index), b.to_json())
+            self.assertEqual(database.get_block_bytes(b.index), b.to_bytes())
+        self.assertEqual(
+            list(database.get_range_bytes(0, 5)), [b.to_bytes() for b in tested]
+        )
+        self.assertEqual(database.get_tip(), block.to_json())
+        self.assertEqual(
+            database.get_block_by_hash(legacy_block.hash()), legacy_block.to_json()
+        )
+        self.assertEqual(
+            database.has_transactions([legacy_block.transactions[0].id()]), [True]
+        )
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "blocks.txt")))
+
+    def test_duplicate_block_saved_once(self):
+        # given
+        database = Database(self.backend)
+        block = self.blocks[0]
+
+        # when
+        database.save_block(block.to_json())
+        database.save_block_bytes(block.to_bytes())
+
+        # then
+        self.assertEqual(len(self.backend.blocks), 1)
+        self.assertEqual(
+            database.has_transactions([block.transactions[0].id()]), [True]
+        )
+
+    def test_save_blocks_in_batch(self):
+        # given
+        database = Database(self.backend)
+        first, second = self.blocks
+        database.save_block_bytes(first.to_bytes())
+
+        # when
+        tested = database.save_blocks_bytes([first.to_bytes(), second.to_bytes()])
+
+        # then
+        self.assertEqual(tested, [0, 1])
+        self.assertEqual(list(self.backend.blocks.keys()), [0, 1])
+        self.assertEqual(database.get_block_bytes(1), second.to_bytes())
+        self.assertEqual(
+            database.has_transactions([second.transactions[0].id()]), [True]
+        )
+
+    def test_malformed_block_in_batch_skipped(self):
+        # given
+        database = Database(self.backend)
+        first, second = self.blocks
+
+        # when
+        tested = database.save_blocks_bytes(
+            [first.to_bytes(), b"test_malformed", second.to_bytes()]
+        )
+
+        # then
+        self.assertEqual(tested, [0, 1])
+        self.assertEqual(database.get_last_index(), 1)
+        self.assertEqual(
+            database.has_transactions([b.transactions[0].id() for b in self.blocks]),
+            [True, True],
+        )
+
+    def test_block_by_hash_after_restart(self):
+        # given
+        first, second = self.blocks
+        Database(self.backend).save_blocks_bytes([b.to_bytes() for b in self.blocks])
+        self.backend.blocks.close()
+        self.backend.transactions.close()
+        self.backend.data_file.close()
+        self.backend = DBBackend(self.tmp.name)
+
+        # when
+        tested = Database(self.backend)
+
+        # then
+        self.assertEqual(tested.get_block_by_hash(second.hash()), second.to_json())
+        self.assertEqual(tested.get_block_by_hash_bytes(first.hash()), first.to_bytes())
+        self.assertIsNone(tested.get_block_by_hash("00" * 32))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import sqlite3
+from threading import Lock
+from typing import Optional
+
+from bb.common.block import Block
+
+LAST_INDEXED_KEY = "last_indexed_block"
+"""key of the last block indexed in the meta table"""
+
+
+class TransactionIndex:
+    """TransactionIndex maps ids of committed transactions, and hashes of
+    blocks, to the indexes of their blocks. It is kept on disk in an SQLite
+    database, whose B-tree is paged in on demand, so its memory use does not
+    grow with the chain, and each lookup is one primary key read. Ids and
+    hashes are stored as raw 32 byte digests."""
+
+    def __init__(self, path: str):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # a crash may lose the last commits, the blocks after the last
+        # indexed one are indexed again on start, see Database
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS transactions "
+            "(id BLOB PRIMARY KEY, block INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS blocks "
+            "(hash BLOB PRIMARY KEY, block INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS meta "
+            "(key TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+        )
+        self.db.commit()
+        self.lock = Lock()
+
+    @property
+    def last_indexed_block(self) -> Optional[int]:
+        with self.lock:
+            row = self.db.execute(
+                "SELECT value FROM meta WHERE key = ?", (LAST_INDEXED_KEY,)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def add_block(self, block: Block):
+        with self.lock, self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO transactions VALUES (?, ?)",
+                [
+                    (transaction.digest(), block.index)
+                    for transaction in block.transactions
+                ],
+            )
+            self.db.execute(
+                "INSERT OR REPLACE INTO blocks VALUES (?, ?)",
+                (bytes.fromhex(block.hash()), block.index),
+            )
+            self.db.execute(
+                "INSERT INTO meta VALUES (?, ?) ON CONFLICT (key) "
+                "DO UPDATE SET value = max(value, excluded.value)",
+                (LAST_INDEXED_KEY, block.index),
+            )
+
+    def get(self, transaction_id: str) -> Optional[int]:
+        try:
+            key = bytes.fromhex(transaction_id)
+        except ValueError:
+            return None
+        with self.lock:
+            row = self.db.execute(
+                "SELECT block FROM transactions WHERE id = ?", (key,)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def get_block_index(self, block_hash: str) -> Optional[int]:
+        try:
+            key = bytes.fromhex(block_hash)
+        except ValueError:
+            return None
+        with self.lock:
+            row = self.db.execute(
+                "SELECT block FROM blocks WHERE hash = ?", (key,)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def __contains__(self, transaction_id: str) -> bool:
+        return self.get(transaction_id) is not None
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+from bb.common.block import Block, Data, Transaction
+
+from .index import TransactionIndex
+
+
+class TestTransactionIndex(unittest.TestCase):
+    # given
+    transactions = [
+        Transaction(
+            user_guid=f"test_user_guid_{i}", data=Data(T="data", payload="test")
+        )
+        for i in range(3)
+    ]
+    blocks = [
+        Block(index=0, transactions=transactions[:2]),
+        Block(index=1, transactions=transactions[2:]),
+    ]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "transactions")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_add_and_get(self):
+        # given
+        index = TransactionIndex(self.path)
+
+        # when
+        for block in self.blocks:
+            index.add_block(block)
+
+        # then
+        self.assertEqual(
+            [index.get(transaction.id()) for transaction in self.transactions],
+            [0, 0, 1],
+        )
+        self.assertNotIn("00" * 32, index)
+        self.assertNotIn("not_a_transaction_id", index)
+        self.assertEqual(
+            [index.get_block_index(block.hash()) for block in self.blocks], [0, 1]
+        )
+        self.assertIsNone(index.get_block_index("not_a_block_hash"))
+        index.close()
+
+    def test_persisted(self):
+        # given
+        index = TransactionIndex(self.path)
+        self.assertIsNone(index.last_indexed_block)
+        for block in self.blocks:
+            index.add_block(block)
+        index.close()
+
+        # when
+        tested = TransactionIndex(self.path)
+
+        # then
+        self.assertEqual(tested.last_indexed_block, 1)
+        self.assertIn(self.transactions[2].id(), tested)
+        self.assertEqual(tested.get_block_index(self.blocks[1].hash()), 1)
+        tested.close()
+
+    def test_last_indexed_block_not_lowered(self):
+        # given
+        index = TransactionIndex(self.path)
+        for block in reversed(self.blocks):
+            index.add_block(block)
+
+        # when
+        tested = index.last_indexed_block
+
+        # then
+        self.assertEqual(tested, 1)
+        index.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
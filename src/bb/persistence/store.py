@@ -0,0 +1,222 @@
+import mmap
+import os
+import struct
+import zlib
+from threading import RLock
+from typing import Iterator, NamedTuple, Optional
+
+from bb.common.log import Logger
+
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+
+RECORD_HEADER = struct.Struct(">QII")
+"""key, payload length, payload crc32"""
+INDEX_ENTRY = struct.Struct(">QIQI")
+"""key, segment number, record offset, payload length"""
+
+
+class Location(NamedTuple):
+    segment: int
+    offset: int
+    length: int
+
+
+class Segment:
+    """Segment is one append-only file of the store. Reads go through
+    a memory map, which is extended when the file grows."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "a+b")
+        self.size = self.file.seek(0, os.SEEK_END)
+        self.map: Optional[mmap.mmap] = None
+
+    def append(self, record: bytes) -> int:
+        offset = self.size
+        self.file.write(record)
+        self.size += len(record)
+        return offset
+
+    def flush(self, sync: bool = False):
+        self.file.flush()
+        if sync:
+            os.fsync(self.file.fileno())
+
+    def read(self, offset: int, length: int) -> memoryview:
+        end = offset + length
+        if end > self.size:
+            raise IndexError(f"read past the end of {self.path}")
+        if self.map is None or len(self.map) < end:
+            self.file.flush()
+            self.close_map()
+            self.map = mmap.mmap(self.file.fileno(), self.size, access=mmap.ACCESS_READ)
+        return memoryview(self.map)[offset:end]
+
+    def truncate(self, size: int):
+        self.close_map()
+        self.file.truncate(size)
+        self.size = size
+
+    def close_map(self):
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                # a memoryview is still exported, the map is closed with it
+                pass
+            self.map = None
+
+    def close(self):
+        self.close_map()
+        self.file.close()
+
+
+class BlockStore:
+    """BlockStore is an append-only record store split into segment files of
+    bounded size, with a persistent index from record keys (block indexes)
+    to their location.
+
+    Each record is written as a header with its key, length and checksum,
+    followed by the payload; its index entry is written after the record.
+    On open, the records after the last indexed one are checked: complete
+    records are indexed again, and a record torn by a crash is truncated."""
+
+    def __init__(self, directory: str, segment_size: int = DEFAULT_SEGMENT_SIZE):
+        self.log = Logger(self)
+        self.directory = directory
+        self.segment_size = segment_size
+        self.locations: dict[int, Location] = {}
+        self.last_key: Optional[int] = None
+        self.segments: list[Segment] = []
+        self.lock = RLock()
+        os.makedirs(directory, exist_ok=True)
+        self.__open_segments()
+        self.index_file = open(os.path.join(directory, "index"), "a+b")
+        self.__load_index()
+        self.__recover()
+
+    def __segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"segment-{number:06d}.log")
+
+    def __open_segments(self):
+        number = 0
+        while os.path.exists(self.__segment_path(number)):
+            self.segments.append(Segment(self.__segment_path(number)))
+            number += 1
+        if not self.segments:
+            self.segments.append(Segment(self.__segment_path(0)))
+
+    def __load_index(self):
+        self.index_file.seek(0)
+        index_bytes = self.index_file.read()
+        whole_size = len(index_bytes) - len(index_bytes) % INDEX_ENTRY.size
+        if whole_size != len(index_bytes):
+            self.log.warn("torn index entry, truncating")
+            self.index_file.truncate(whole_size)
+        for key, segment, offset, length in INDEX_ENTRY.iter_unpack(
+            index_bytes[:whole_size]
+        ):
+            self.__set_location(key, Location(segment, offset, length))
+
+    def __recover(self):
+        """Indexes complete records written after the last index entry,
+        and truncates the segment after the last complete record."""
+        last_segment = len(self.segments) - 1
+        indexed_ends = [
+            location.offset + RECORD_HEADER.size + location.length
+            for location in self.locations.values()
+            if location.segment == last_segment
+        ]
+        segment = self.segments[last_segment]
+        offset = max(indexed_ends, default=0)
+        while offset < segment.size:
+            record = self.__read_record(segment, offset)
+            if record is None:
+                self.log.warn(f"torn record at {segment.path}:{offset}, truncating")
+                segment.truncate(offset)
+                break
+            key, length = record
+            if key not in self.locations:
+                self.__write_index_entry(key, Location(last_segment, offset, length))
+            offset += RECORD_HEADER.size + length
+        self.flush()
+
+    def __read_record(self, segment: Segment, offset: int) -> Optional[tuple[int, int]]:
+        try:
+            key, length, checksum = RECORD_HEADER.unpack(
+                segment.read(offset, RECORD_HEADER.size)
+            )
+            payload = segment.read(offset + RECORD_HEADER.size, length)
+        except IndexError:
+            return None
+        if zlib.crc32(payload) != checksum:
+            return None
+        return key, length
+
+    def __set_location(self, key: int, location: Location):
+        self.locations[key] = location
+        if self.last_key is None or key > self.last_key:
+            self.last_key = key
+
+    def __write_index_entry(self, key: int, location: Location):
+        self.index_file.write(INDEX_ENTRY.pack(key, *location))
+        self.__set_location(key, location)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self.locations
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def keys(self) -> Iterator[int]:
+        return iter(sorted(self.locations))
+
+    def append(self, key: int, payload: bytes, sync: bool = False) -> bool:
+        """Returns False, without writing, if the key is already stored."""
+        with self.lock:
+            if key in self.locations:
+                return False
+            self.__append_record(key, payload, sync)
+            return True
+
+    def __append_record(self, key: int, payload: bytes, sync: bool):
+        record_size = RECORD_HEADER.size + len(payload)
+        segment = self.segments[-1]
+        if segment.size > 0 and segment.size + record_size > self.segment_size:
+            # a full segment is synced once, as flush syncs only the last one
+            segment.flush(sync=True)
+            segment = Segment(self.__segment_path(len(self.segments)))
+            self.segments.append(segment)
+        header = RECORD_HEADER.pack(key, len(payload), zlib.crc32(payload))
+        offset = segment.append(header + payload)
+        self.__write_index_entry(
+            key, Location(len(self.segments) - 1, offset, len(payload))
+        )
+        self.flush(sync)
+
+    def read(self, key: int) -> Optional[bytes]:
+        with self.lock:
+            location = self.locations.get(key)
+            if location is None:
+                return None
+            segment = self.segments[location.segment]
+            with segment.read(
+                location.offset + RECORD_HEADER.size, location.length
+            ) as payload:
+                return payload.tobytes()
+
+    def flush(self, sync: bool = False):
+        """With sync, the records appended so far are on disk when flush
+        returns, so a batch appended without sync is synced at once."""
+        with self.lock:
+            self.segments[-1].flush(sync)
+            self.index_file.flush()
+            if sync:
+                os.fsync(self.index_file.fileno())
+
+    def close(self):
+        with self.lock:
+            self.flush()
+        for segment in self.segments:
+            segment.close()
+        self.index_file.close()
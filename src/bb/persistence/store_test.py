@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+from .store import RECORD_HEADER, BlockStore
+
+
+class TestBlockStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, "blocks")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_append_and_read(self):
+        # given
+        store = BlockStore(self.directory, segment_size=64)
+
+        # when
+        appended = [store.append(i, f"block {i}".encode()) for i in range(10)]
+        duplicate_appended = store.append(3, b"duplicate")
+
+        # then
+        self.assertEqual(appended, [True] * 10)
+        self.assertFalse(duplicate_appended)
+        self.assertGreater(len(store.segments), 1)
+        self.assertEqual(store.read(3), b"block 3")
+        self.assertIsNone(store.read(10))
+        store.close()
+
+    def test_reopen_uses_persistent_index(self):
+        # given
+        store = BlockStore(self.directory, segment_size=64)
+        for i in range(10):
+            store.append(i, f"block {i}".encode())
+        store.close()
+
+        # when
+        tested = BlockStore(self.directory, segment_size=64)
+
+        # then
+        self.assertEqual(list(tested.keys()), list(range(10)))
+        self.assertEqual(tested.read(9), b"block 9")
+        tested.close()
+
+    def test_recover_torn_write(self):
+        # given
+        store = BlockStore(self.directory)
+        store.append(0, b"block 0")
+        store.append(1, b"block 1")
+        store.close()
+        # index entry of block 1 lost, record of block 2 torn
+        index_path = os.path.join(self.directory, "index")
+        with open(index_path, "r+b") as index_file:
+            index_file.truncate(os.path.getsize(index_path) - 3)
+        segment_path = store.segments[0].path
+        with open(segment_path, "ab") as segment_file:
+            segment_file.write(RECORD_HEADER.pack(2, 100, 0) + b"bl")
+
+        # when
+        tested = BlockStore(self.directory)
+
+        # then
+        self.assertEqual(list(tested.keys()), [0, 1])
+        self.assertEqual(tested.read(1), b"block 1")
+        self.assertTrue(tested.append(2, b"block 2"))
+        self.assertEqual(tested.read(2), b"block 2")
+        tested.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
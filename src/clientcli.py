@@ -2,14 +2,25 @@ import argparse
 from typing import Optional
 
 from bb.client.client import Client
+from bb.common.config import DEFAULT_SIGNATURE_SCHEME
 from bb.common.log import Logger
+from bb.common.sec.scheme import SCHEMES
 
 if __name__ == "__main__":
     p = argparse.ArgumentParser()
     p.add_argument("-u", "--user-guid", type=str, required=False, default=None)
+    p.add_argument(
+        "-s",
+        "--scheme",
+        type=str,
+        required=False,
+        default=DEFAULT_SIGNATURE_SCHEME,
+        choices=SCHEMES.keys(),
+    )
     args = p.parse_args()
     user_guid: Optional[str] = args.user_guid
+    scheme: str = args.scheme
     log = Logger()
     log.set_logger_params()
     log.debug("starting client")
-    Client().start(user_guid)
+    Client().start(user_guid, scheme)
@@ -1,8 +1,77 @@
+import argparse
+from typing import Optional
+
+from bb.common.config import (
+    DEFAULT_MINING_WORKERS,
+    DEFAULT_SEAL_MAX_BYTES,
+    DEFAULT_SEAL_MAX_TRANSACTIONS,
+    DEFAULT_SEAL_MAX_WAIT,
+)
 from bb.common.log import Logger
-from bb.node.node import start
+from bb.node.node import TRANSPORTS, start
 
 if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument(
+        "-w",
+        "--mining-workers",
+        type=int,
+        required=False,
+        default=DEFAULT_MINING_WORKERS,
+    )
+    p.add_argument(
+        "-s",
+        "--snapshot",
+        required=False,
+        default=None,
+        help="path of the state snapshot, written periodically and on shutdown",
+    )
+    p.add_argument(
+        "--manual-seal",
+        action="store_true",
+        help="seal blocks only when a client commits",
+    )
+    p.add_argument(
+        "--seal-transactions",
+        type=int,
+        required=False,
+        default=DEFAULT_SEAL_MAX_TRANSACTIONS,
+        help="seal a block once this many transactions are pending",
+    )
+    p.add_argument(
+        "--seal-bytes",
+        type=int,
+        required=False,
+        default=DEFAULT_SEAL_MAX_BYTES,
+        help="seal a block once this many bytes of transactions are pending",
+    )
+    p.add_argument(
+        "--seal-wait",
+        type=float,
+        required=False,
+        default=DEFAULT_SEAL_MAX_WAIT,
+        help="seal a block once a transaction is pending for this many seconds",
+    )
+    p.add_argument(
+        "-t",
+        "--transport",
+        required=False,
+        default="pyro",
+        choices=TRANSPORTS,
+        help="serve the endpoint and the node with Pyro or with asyncio",
+    )
+    args = p.parse_args()
+    mining_workers: int = args.mining_workers
+    snapshot_path: Optional[str] = args.snapshot
     log = Logger()
     log.set_logger_params()
     log.debug("starting node")
-    start()
+    start(
+        mining_workers,
+        snapshot_path,
+        not args.manual_seal,
+        args.seal_transactions,
+        args.seal_bytes,
+        args.seal_wait,
+        args.transport,
+    )